@@ -0,0 +1,329 @@
+# -*- coding: utf-8 -*-
+"""
+群聊目录 - 从 chatrooms_raw.json 流式提取紧凑的群聊目录
+
+/api/v1/chatroom 返回的 JSON 绝大部分字节都是成员列表 (users)，而各个工具
+只需要 name / nickName / remark。这里对原始文件做一次 mmap + 正则扫描，
+只解码每个群聊对象里除 users 以外的字段，写成 JSON Lines 目录文件；
+成员列表只记录它在原始文件中的字节区间，需要时再按群聊单独读取。
+
+用法:
+    from chatroom_directory import load_chatroom_directory
+
+    directory = load_chatroom_directory()
+    room_id = directory.resolve('Coze实战课程 2 群')
+    members = directory.members(room_id)
+"""
+
+import json
+import mmap
+import os
+import re
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+BASE_DIR = Path(__file__).parent
+RAW_FILE = BASE_DIR / 'chatrooms_raw.json'
+INDEX_FILE = BASE_DIR / 'chatrooms_index.jsonl'
+INDEX_VERSION = 1
+
+# JSON 字符串或结构括号；数字/true/null 等标量不影响层级，直接跳过
+_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[\[\]{}]')
+_WS = b' \t\r\n'
+
+
+def iter_chatrooms(raw_path=RAW_FILE) -> Iterator[Dict]:
+    """流式扫描原始群聊 JSON，逐个产出群聊摘要
+
+    支持 {"items": [...]} 和顶层数组两种结构。成员列表不会被解码，
+    只统计人数并记录字节区间 (offset, length)。
+
+    Args:
+        raw_path: chatrooms_raw.json 路径
+
+    Yields:
+        {'name', 'nickName', 'remark', 'owner', 'userCount', 'users'} 字典
+    """
+    with open(raw_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            yield from _scan(data)
+
+
+def _scan(data) -> Iterator[Dict]:
+    stack = []              # 打开的容器: '{' 或 '['
+    items_depth = None      # 群聊数组所在层级
+    last_key = None         # 最近一个关心的键 ("items" / "users")
+    item_start = None
+    users_start = users_end = None
+    user_count = 0
+
+    for m in _TOKEN.finditer(data):
+        token = m.group()
+        depth = len(stack)
+
+        if token[0] == 0x22:  # '"'
+            if depth == 1 or (items_depth is not None and depth == items_depth + 1):
+                # 只关心根对象的 "items" 和群聊对象的 "users" 两个键
+                if token in (b'"items"', b'"users"') and _followed_by_colon(data, m.end()):
+                    last_key = token
+                else:
+                    last_key = None
+            continue
+
+        if token == b'[':
+            if items_depth is None and (depth == 0 or (depth == 1 and last_key == b'"items"')):
+                items_depth = depth + 1
+            elif items_depth is not None and depth == items_depth + 1 and last_key == b'"users"':
+                users_start = m.start()
+                user_count = 0
+            stack.append(token)
+        elif token == b'{':
+            if items_depth is not None:
+                if depth == items_depth:
+                    item_start = m.start()
+                    users_start = users_end = None
+                    user_count = 0
+                elif users_start is not None and users_end is None and depth == items_depth + 2:
+                    user_count += 1
+            stack.append(token)
+        else:
+            if not stack:
+                raise ValueError(f"JSON 结构错误: 位置 {m.start()} 出现多余的 {token!r}")
+            stack.pop()
+            depth = len(stack)
+            if items_depth is None:
+                continue
+            if token == b']' and depth == items_depth + 1 and users_start is not None and users_end is None:
+                users_end = m.end()
+            elif token == b'}' and depth == items_depth and item_start is not None:
+                yield _decode_item(data, item_start, m.end(), users_start, users_end, user_count)
+                item_start = None
+            elif token == b']' and depth == items_depth - 1:
+                return
+
+
+def _followed_by_colon(data, pos: int) -> bool:
+    """判断字符串后面紧跟冒号（即它是对象的键）"""
+    size = len(data)
+    while pos < size and data[pos] in _WS:
+        pos += 1
+    return pos < size and data[pos] == 0x3A  # ':'
+
+
+def _decode_item(data, start: int, end: int, users_start: Optional[int],
+                 users_end: Optional[int], user_count: int) -> Dict:
+    """只解码群聊对象中除 users 以外的部分"""
+    if users_start is not None and users_end is not None:
+        raw = data[start:users_start] + b'[]' + data[users_end:end]
+        users = [users_start, users_end - users_start]
+    else:
+        raw = data[start:end]
+        users = None
+
+    item = json.loads(raw.decode('utf-8'))
+    return {
+        'name': item.get('name', ''),
+        'nickName': item.get('nickName', '') or '',
+        'remark': item.get('remark', '') or '',
+        'owner': item.get('owner', '') or '',
+        'userCount': user_count,
+        'users': users,
+    }
+
+
+def build_index(raw_path=RAW_FILE, index_path=INDEX_FILE) -> int:
+    """从原始 JSON 生成紧凑目录文件
+
+    第一行是头信息（原始文件的大小和修改时间），之后每行一个群聊。
+
+    Returns:
+        写入的群聊数
+    """
+    raw_path = Path(raw_path)
+    index_path = Path(index_path)
+    stat = raw_path.stat()
+    tmp_path = index_path.with_suffix(index_path.suffix + '.tmp')
+
+    count = 0
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        header = {
+            'version': INDEX_VERSION,
+            'source': raw_path.name,
+            'size': stat.st_size,
+            'mtime': stat.st_mtime,
+        }
+        f.write(json.dumps(header, ensure_ascii=False) + '\n')
+        for room in iter_chatrooms(raw_path):
+            f.write(json.dumps(room, ensure_ascii=False, separators=(',', ':')) + '\n')
+            count += 1
+
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def fetch_raw(base_url: str = 'http://127.0.0.1:5030', raw_path=RAW_FILE, timeout: int = 10) -> Path:
+    """从 Chatlog 下载群聊列表到 raw_path（流式写盘，不解码 JSON）"""
+    import requests
+
+    raw_path = Path(raw_path)
+    tmp_path = raw_path.with_suffix(raw_path.suffix + '.tmp')
+    with requests.get(f'{base_url}/api/v1/chatroom', params={'format': 'json'},
+                      timeout=timeout, stream=True) as response:
+        response.raise_for_status()
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+
+    os.replace(tmp_path, raw_path)
+    return raw_path
+
+
+class ChatroomDirectory:
+    """紧凑群聊目录，成员列表按需加载"""
+
+    def __init__(self, rooms: List[Dict], raw_path=RAW_FILE):
+        self.rooms = rooms
+        self.raw_path = Path(raw_path)
+        self._by_id = {room['name']: room for room in rooms if room.get('name')}
+        self._members_cache = {}
+
+    @classmethod
+    def load(cls, index_path=INDEX_FILE, raw_path=RAW_FILE) -> 'ChatroomDirectory':
+        """读取目录文件；目录不存在或落后于原始文件时自动重建"""
+        index_path = Path(index_path)
+        raw_path = Path(raw_path)
+
+        if not _index_is_fresh(index_path, raw_path):
+            build_index(raw_path, index_path)
+
+        with open(index_path, 'r', encoding='utf-8') as f:
+            f.readline()  # 头信息
+            rooms = [json.loads(line) for line in f if line.strip()]
+
+        return cls(rooms, raw_path)
+
+    def __len__(self) -> int:
+        return len(self.rooms)
+
+    def __iter__(self):
+        return iter(self.rooms)
+
+    def get(self, room_id: str) -> Optional[Dict]:
+        return self._by_id.get(room_id)
+
+    @staticmethod
+    def display_name(room: Dict) -> str:
+        """群聊显示名称：备注优先，其次昵称"""
+        return room.get('remark') or room.get('nickName') or ''
+
+    def name_map(self) -> Dict[str, str]:
+        """名称 -> 群聊ID 映射，ID / nickName / remark 都可以作为键"""
+        mapping = {}
+        for room in self.rooms:
+            room_id = room.get('name')
+            if not room_id:
+                continue
+            mapping[room_id] = room_id
+            if room.get('nickName'):
+                mapping[room['nickName']] = room_id
+            if room.get('remark'):
+                mapping[room['remark']] = room_id
+        return mapping
+
+    def resolve(self, name: str) -> Optional[str]:
+        """把显示名称解析成群聊ID，找不到返回 None"""
+        if name in self._by_id:
+            return name
+        for room in self.rooms:
+            if name in (room.get('nickName'), room.get('remark')):
+                return room['name']
+        return None
+
+    def search(self, keyword: str) -> List[Dict]:
+        """按 nickName / remark 子串搜索群聊"""
+        return [
+            room for room in self.rooms
+            if keyword and (keyword in room.get('nickName', '') or keyword in room.get('remark', ''))
+        ]
+
+    def members(self, room_id: str) -> List[Dict]:
+        """按需读取单个群聊的成员列表"""
+        if room_id in self._members_cache:
+            return self._members_cache[room_id]
+
+        room = self._by_id.get(room_id)
+        if not room or not room.get('users'):
+            return []
+
+        offset, length = room['users']
+        with open(self.raw_path, 'rb') as f:
+            f.seek(offset)
+            members = json.loads(f.read(length).decode('utf-8'))
+
+        self._members_cache[room_id] = members
+        return members
+
+
+def _index_is_fresh(index_path: Path, raw_path: Path) -> bool:
+    if not index_path.exists():
+        return False
+    if not raw_path.exists():
+        return True  # 只有目录文件也可以用，只是不能加载成员
+
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            header = json.loads(f.readline())
+    except (OSError, ValueError):
+        return False
+
+    stat = raw_path.stat()
+    return (header.get('version') == INDEX_VERSION
+            and header.get('size') == stat.st_size
+            and header.get('mtime') == stat.st_mtime)
+
+
+def load_chatroom_directory(
+    base_url: str = 'http://127.0.0.1:5030',
+    refresh: bool = False,
+    max_age_hours: Optional[float] = None,
+    raw_path=RAW_FILE,
+    index_path=INDEX_FILE
+) -> ChatroomDirectory:
+    """加载群聊目录，必要时先从 Chatlog 下载最新的群聊列表
+
+    Args:
+        base_url: Chatlog 服务地址
+        refresh: 强制重新下载
+        max_age_hours: 原始文件超过该时长则重新下载 (None 表示不过期)
+        raw_path: 原始 JSON 路径
+        index_path: 目录文件路径
+
+    Returns:
+        ChatroomDirectory
+    """
+    raw_path = Path(raw_path)
+    index_path = Path(index_path)
+
+    stale = not raw_path.exists() and not index_path.exists()
+    if raw_path.exists() and max_age_hours is not None:
+        stale = time.time() - raw_path.stat().st_mtime > max_age_hours * 3600
+
+    if refresh or stale:
+        fetch_raw(base_url, raw_path)
+
+    return ChatroomDirectory.load(index_path, raw_path)
+
+
+if __name__ == '__main__':
+    import sys
+
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    started = time.perf_counter()
+    total = build_index()
+    print(f"已生成 {INDEX_FILE.name}: {total} 个群聊, 耗时 {(time.perf_counter() - started) * 1000:.1f} ms")
@@ -18,6 +18,10 @@ with open('chatrooms_raw.json', 'w', encoding='utf-8') as f:
     json.dump(data, f, ensure_ascii=False, indent=2)
 
 print("已保存到 chatrooms_raw.json")
+
+# 同步生成紧凑群聊目录，供其他工具快速加载
+from chatroom_directory import build_index
+print(f"已生成 chatrooms_index.jsonl ({build_index()} 个群聊)")
 print()
 
 # 尝试提取群聊
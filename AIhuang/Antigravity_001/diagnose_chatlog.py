@@ -43,27 +43,26 @@ print()
 # 2. 检查群聊
 print("2. 检查群聊...")
 try:
-    response = requests.get(f'{base_url}/api/v1/chatroom', params={'format': 'json'}, timeout=10)
-    if response.status_code == 200:
-        data = response.json()
-        chatrooms = data.get('items', [])
-        print(f"   ✓ 找到 {len(chatrooms)} 个群聊")
-        
-        # 统计有名称的群聊
-        with_name = sum(1 for r in chatrooms if r.get('nickName') or r.get('remark'))
-        print(f"   其中 {with_name} 个有昵称/备注")
-        
-        if chatrooms:
-            print(f"   前 5 个群聊示例:")
-            for i, room in enumerate(chatrooms[:5], 1):
-                room_id = room.get('name', '')
-                nick = room.get('nickName', '')
-                remark = room.get('remark', '')
-                display = nick or remark or '(无名称)'
-                print(f"     {i}. {display}")
-                print(f"        ID: {room_id}")
-    else:
-        print(f"   ✗ 获取失败: HTTP {response.status_code}")
+    # 重新下载群聊列表（流式写盘）并生成紧凑目录，不解码成员列表
+    from chatroom_directory import load_chatroom_directory
+    chatrooms = load_chatroom_directory(base_url, refresh=True).rooms
+    print(f"   ✓ 找到 {len(chatrooms)} 个群聊")
+    
+    # 统计有名称的群聊
+    with_name = sum(1 for r in chatrooms if r.get('nickName') or r.get('remark'))
+    print(f"   其中 {with_name} 个有昵称/备注")
+    
+    if chatrooms:
+        print(f"   前 5 个群聊示例:")
+        for i, room in enumerate(chatrooms[:5], 1):
+            room_id = room.get('name', '')
+            nick = room.get('nickName', '')
+            remark = room.get('remark', '')
+            display = nick or remark or '(无名称)'
+            print(f"     {i}. {display}")
+            print(f"        ID: {room_id}")
+except requests.HTTPError as e:
+    print(f"   ✗ 获取失败: HTTP {e.response.status_code}")
 except Exception as e:
     print(f"   ✗ 错误: {e}")
 
@@ -1,26 +1,29 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-import requests
-import json
 import sys
 import io
 
+from chatroom_directory import load_chatroom_directory
+
 # Fix Windows console encoding
 if sys.platform == 'win32':
     sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
     sys.stderr = io.TextIOWrapper(sys.stderr.buffer, encoding='utf-8')
 
-# 获取所有群聊
-response = requests.get('http://127.0.0.1:5030/api/v1/chatroom', params={'format':'json'})
-data = response.json()
+# 获取所有群聊（紧凑目录，成员列表按需加载）
+directory = load_chatroom_directory(refresh='--refresh' in sys.argv)
+
+print(f"共找到 {len(directory)} 个群聊\n")
 
-if 'items' in data:
-    print(f"共找到 {len(data['items'])} 个群聊\n")
-    
-    # 只看前3个
-    for i, chat in enumerate(data['items'][:3], 1):
-        print(f"=== 群聊 {i} ===")
-        for key, value in chat.items():
-            if value:  # 只显示非空字段
-                print(f"  {key}: {value}")
-        print()
+# 只看前3个
+for i, chat in enumerate(directory.rooms[:3], 1):
+    print(f"=== 群聊 {i} ===")
+    for key, value in chat.items():
+        if key == 'users':
+            continue
+        if value:  # 只显示非空字段
+            print(f"  {key}: {value}")
+    members = directory.members(chat['name'])
+    if members:
+        print(f"  users: {members}")
+    print()
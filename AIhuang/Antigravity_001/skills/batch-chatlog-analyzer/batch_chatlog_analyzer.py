@@ -16,15 +16,28 @@ Version: 1.0.0
 License: MIT
 """
 
+import heapq
 import json
+import math
+import operator
+import queue
 import re
 import sys
+import threading
+import zlib
+from array import array
 from datetime import datetime, timedelta
+from itertools import compress
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
-from collections import defaultdict
+from typing import Any, Callable, Iterator, List, Dict, Optional, Tuple
+from collections import Counter, defaultdict
 import logging
 
+try:
+    import numpy as np
+except ImportError:  # Optional: SessionSegmenter falls back to pure Python
+    np = None
+
 # Fix Windows console encoding for Chinese characters
 if sys.platform == 'win32':
     import io
@@ -60,10 +73,17 @@ class ChecklistParser:
 
 ## 说明
 - 群聊名称: 必填,需与MCP中的群聊名称完全一致
-- 日期: 支持"昨天"、"今天"、"前天"或"YYYY-MM-DD"格式,默认为"昨天"
+  - "匹配:关键词" 展开为名称包含关键词的所有群聊 (也支持 * ? 通配符)
+  - "活跃:7天" 展开为最近7天内有消息的所有群聊
+- 日期: 支持"昨天"、"今天"、"前天"、"本月"、"最近7天"、"YYYY-MM-DD"
+  或"YYYY-MM-DD~YYYY-MM-DD"格式,默认为"昨天"
 - 格式: 目前仅支持HTML,可省略
+- 分段: 可选,"突发"按群聊自身节奏切分话题,"45分钟"按固定静默时长切分,默认30分钟
+- 同一群聊同一日期只会分析一次
 """
     
+    RECENT_DAYS_PATTERN = re.compile(r'^(?:最近|近)\s*(\d+)\s*天$')
+    
     def __init__(self, filepath: str = "群聊清单.md"):
         self.filepath = Path(filepath)
     
@@ -83,13 +103,15 @@ class ChecklistParser:
         chats = []
         
         # Parse each chat entry
-        pattern = r'-\s*群聊名称:\s*(.+?)(?:\n\s+日期:\s*(.+?))?(?:\n\s+格式:\s*(.+?))?(?=\n-|\n#|\Z)'
+        pattern = (r'-\s*群聊名称:\s*(.+?)(?:\n\s+日期:\s*(.+?))?(?:\n\s+格式:\s*(.+?))?'
+                   r'(?:\n\s+分段:\s*(.+?))?(?=\n-|\n#|\Z)')
         matches = re.finditer(pattern, content, re.MULTILINE | re.DOTALL)
         
         for match in matches:
             name = match.group(1).strip()
             date_str = match.group(2).strip() if match.group(2) else "昨天"
             format_type = match.group(3).strip() if match.group(3) else "HTML"
+            segmentation = match.group(4).strip() if match.group(4) else ""
             
             date = self._normalize_date(date_str)
             
@@ -97,7 +119,8 @@ class ChecklistParser:
                 'name': name,
                 'date': date,
                 'date_str': date_str,
-                'format': format_type
+                'format': format_type,
+                'segmentation': segmentation
             })
         
         logger.info(f"📋 Parsed {len(chats)} chat(s) from checklist")
@@ -125,6 +148,24 @@ class ChecklistParser:
             today_str = today.strftime("%Y-%m-%d")
             return f"{first_day},{today_str}"
         
+        # Handle "最近N天" (today included)
+        recent = self.RECENT_DAYS_PATTERN.match(date_str)
+        if recent:
+            days = max(1, int(recent.group(1)))
+            first_day = (today - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+            return f"{first_day},{today.strftime('%Y-%m-%d')}"
+        
+        # Handle explicit ranges: YYYY-MM-DD~YYYY-MM-DD or YYYY-MM-DD,YYYY-MM-DD
+        bounds = re.split(r'\s*[~,，至]\s*', date_str)
+        if len(bounds) == 2:
+            try:
+                start, end = sorted(datetime.strptime(b, "%Y-%m-%d") for b in bounds)
+                if start == end:
+                    return start.strftime("%Y-%m-%d")
+                return f"{start.strftime('%Y-%m-%d')},{end.strftime('%Y-%m-%d')}"
+            except ValueError:
+                pass
+        
         # Handle absolute dates (assume already in YYYY-MM-DD format)
         # Basic validation
         try:
@@ -135,6 +176,86 @@ class ChecklistParser:
             return (today - timedelta(days=1)).strftime("%Y-%m-%d")
 
 
+class ChecklistPlanner:
+    """Compile parsed checklist entries into a deduplicated job plan.
+    
+    Besides plain group names, an entry's 群聊名称 may be a pattern:
+    - "匹配:孵化器" / "*孵化器*": every chatroom whose nickName or remark matches
+    - "活跃:7天": every chatroom with a message in the last N days
+    
+    Each job is keyed by (resolved chatroom ID, date), so a group listed by name
+    and also caught by a pattern is analyzed only once.
+    """
+    
+    MATCH_PATTERN = re.compile(r'^(?:匹配|包含|match)\s*[:：]\s*(.+)$', re.IGNORECASE)
+    ACTIVE_PATTERN = re.compile(r'^(?:活跃|active)\s*[:：]\s*(?:最近|近)?\s*(\d+)\s*(?:天|d|days?)?$', re.IGNORECASE)
+    
+    def __init__(self, mcp_client: 'MCPClient'):
+        self.mcp_client = mcp_client
+    
+    def plan(self, entries: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Expand entries into jobs, keeping first-seen order."""
+        jobs = {}
+        expansions = {}  # the same name/pattern is only expanded once
+        for entry in entries:
+            name = entry['name']
+            if name not in expansions:
+                expansions[name] = self._expand(name)
+            for chat_id, display_name in expansions[name]:
+                key = (chat_id, entry['date'])
+                if key in jobs:
+                    continue
+                jobs[key] = {
+                    'name': display_name,
+                    'chat_id': chat_id,
+                    'date': entry['date'],
+                    'date_str': entry['date_str'],
+                    'format': entry['format'],
+                    'segmentation': entry.get('segmentation', '')
+                }
+        
+        logger.info(f"🗂️ Planned {len(jobs)} job(s) from {len(entries)} checklist entries")
+        return list(jobs.values())
+    
+    def _expand(self, name: str) -> List[Tuple[str, str]]:
+        """Return [(chatroom ID, display name)] for one 群聊名称 value."""
+        directory = self.mcp_client.chatroom_directory
+        
+        match = self.MATCH_PATTERN.match(name)
+        if match or '*' in name or '?' in name:
+            if directory is None:
+                logger.warning(f"⚠️ Chatroom directory unavailable, cannot expand '{name}'")
+                return []
+            keyword = match.group(1).strip() if match else name
+            rooms = self._match_rooms(directory, keyword)
+            logger.info(f"🔎 '{name}' matched {len(rooms)} chatroom(s)")
+            return [(room['name'], directory.display_name(room) or room['name']) for room in rooms]
+        
+        active = self.ACTIVE_PATTERN.match(name)
+        if active:
+            room_ids = self.mcp_client.active_chatroom_ids(int(active.group(1)))
+            logger.info(f"🔎 '{name}' matched {len(room_ids)} active chatroom(s)")
+            result = []
+            for room_id in room_ids:
+                room = directory.get(room_id) if directory is not None else None
+                result.append((room_id, (room and directory.display_name(room)) or room_id))
+            return result
+        
+        return [(self.mcp_client._resolve_chat_name(name), name)]
+    
+    @staticmethod
+    def _match_rooms(directory, keyword: str) -> List[Dict]:
+        if '*' not in keyword and '?' not in keyword:
+            return directory.search(keyword)
+        
+        from fnmatch import fnmatchcase
+        return [
+            room for room in directory
+            if any(fnmatchcase(field, keyword)
+                   for field in (room.get('nickName', ''), room.get('remark', '')) if field)
+        ]
+
+
 
 
 
@@ -142,11 +263,14 @@ class ChecklistParser:
 class MCPClient:
     """Wrapper for MCP (Model Context Protocol) chat queries."""
     
+    CHATROOM_CACHE_MAX_AGE_HOURS = 24
+    
     def __init__(self):
         """Initialize MCP client."""
         self.base_url = 'http://127.0.0.1:5030'
         self.mcp_available = False
         self.chatroom_cache = {}  # Cache for chatroom name -> ID mapping
+        self.chatroom_directory = None  # Compact chatroom directory (lazy member lists)
         
         # Load custom chatroom mappings first
         self._load_custom_mappings()
@@ -204,45 +328,71 @@ class MCPClient:
             return False
     
     def _load_chatroom_cache(self):
-        """Load chatroom list and build name -> ID mapping cache."""
+        """Load chatroom directory and build name -> ID mapping cache.
+        
+        Uses the compact directory from chatroom_directory.py (project root), which
+        streams chatrooms_raw.json once and never decodes member lists. The raw
+        snapshot is re-downloaded when it is older than CHATROOM_CACHE_MAX_AGE_HOURS.
+        """
         try:
-            import requests
+            from chatroom_directory import load_chatroom_directory
             
-            response = requests.get(
-                f'{self.base_url}/api/v1/chatroom',
-                params={'format': 'json'},
-                timeout=10
+            directory = load_chatroom_directory(
+                self.base_url,
+                max_age_hours=self.CHATROOM_CACHE_MAX_AGE_HOURS
             )
             
-            if response.status_code == 200:
-                data = response.json()
-                chatrooms = data.get('items', [])
-                
-                # Build cache: both nickName and name can be used as keys
-                for room in chatrooms:
-                    room_id = room.get('name', '')
-                    nick_name = room.get('nickName', '')
-                    remark = room.get('remark', '')
-                    
-                    if room_id:
-                        # Map ID to itself
-                        self.chatroom_cache[room_id] = room_id
-                        
-                        # Map nickName to ID if available
-                        if nick_name:
-                            self.chatroom_cache[nick_name] = room_id
-                        
-                        # Map remark to ID if available
-                        if remark:
-                            self.chatroom_cache[remark] = room_id
-                
-                logger.info(f"📋 Loaded {len(chatrooms)} chatrooms into cache")
-            else:
-                logger.warning(f"⚠️ Failed to load chatroom list: HTTP {response.status_code}")
+            # Build cache: ID, nickName and remark can all be used as keys
+            self.chatroom_cache.update(directory.name_map())
+            
+            self.chatroom_directory = directory
+            logger.info(f"📋 Loaded {len(directory)} chatrooms into cache")
                 
         except Exception as e:
             logger.warning(f"⚠️ Failed to load chatroom cache: {e}")
     
+    def active_chatroom_ids(self, days: int) -> List[str]:
+        """Chatroom IDs with a message in the last `days` days, most recent first.
+        
+        Uses the session list (GET /api/v1/session), whose nTime is the time of
+        each conversation's latest message.
+        """
+        if not self.mcp_available:
+            logger.warning("⚠️ Chatlog server not available, cannot list active chatrooms")
+            return []
+        
+        try:
+            import requests
+            
+            response = requests.get(
+                f'{self.base_url}/api/v1/session',
+                params={'format': 'json'},
+                timeout=15
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to load sessions: {e}")
+            return []
+        
+        sessions = data.get('items', []) if isinstance(data, dict) else data
+        cutoff = datetime.now() - timedelta(days=days)
+        active = []
+        for session in sessions or []:
+            room_id = session.get('userName', '')
+            if not room_id.endswith('@chatroom'):
+                continue
+            try:
+                # '2025-12-13T10:20:30+08:00' -> local wall-clock time
+                last_time = datetime.fromisoformat(str(session.get('nTime', ''))[:19])
+            except ValueError:
+                continue
+            if last_time >= cutoff:
+                active.append((last_time, room_id))
+        
+        active.sort(reverse=True)
+        return [room_id for _, room_id in active]
+    
     def _resolve_chat_name(self, chat_name: str) -> Optional[str]:
         """Resolve display name to chatroom ID."""
         # First, check exact match in cache
@@ -395,20 +545,765 @@ class MCPClient:
                     'sender': msg.get('sender') or msg.get('from') or msg.get('user') or msg.get('author') or 'Unknown',
                     'content': msg.get('content') or msg.get('text') or msg.get('message') or msg.get('body') or ''
                 }
+                # Classify while the raw WeChat type/subType are still available
+                normalized_msg['msg_type'] = MessageType.classify(
+                    normalized_msg['content'],
+                    normalized_msg['sender'],
+                    msg.get('type'),
+                    msg.get('subType')
+                )
                 normalized.append(normalized_msg)
         
-        return normalized if normalized else messages
+        return MessageNormalizer.normalize_all(normalized) if normalized else messages
+
+
+
+
+class MessageType:
+    """Compact message-type codes (fit in a uint8 column) and the classifier.
+    
+    Classification prefers the raw WeChat type/subType from the Chatlog API and
+    falls back to the text markers used by Chatlog's text export.
+    """
+    
+    TEXT = 0
+    SYSTEM = 1
+    RECALL = 2
+    STICKER = 3
+    IMAGE = 4
+    LINK = 5
+    FILE = 6
+    QUOTE = 7
+    
+    LABELS = {
+        TEXT: '文字',
+        SYSTEM: '系统消息',
+        RECALL: '撤回',
+        STICKER: '表情',
+        IMAGE: '图片',
+        LINK: '链接',
+        FILE: '文件',
+        QUOTE: '引用回复',
+    }
+    
+    # Types that carry discussion text; lookup table indexed by type code
+    TEXT_TYPES = (TEXT, QUOTE)
+    TEXT_MASK = bytes(map(TEXT_TYPES.__contains__, range(256)))
+    
+    # WeChat message types (type, subType) as returned by the Chatlog API
+    WECHAT_TYPES = {
+        1: TEXT,
+        3: IMAGE,
+        47: STICKER,
+        10000: SYSTEM,
+        10002: RECALL,
+    }
+    WECHAT_APP_SUBTYPES = {
+        6: FILE,
+        57: QUOTE,
+    }
+    
+    SYSTEM_PATTERN = re.compile(r'加入了群聊|移出了群聊|修改群名为|拍了拍|^系统消息')
+    STICKER_PATTERN = re.compile(r'^!?\[(动画表情|表情)\]')
+    IMAGE_PATTERN = re.compile(r'^!?\[图片\]')
+    LINK_PATTERN = re.compile(r'^\[(链接|视频号|小程序|名片)\||^https?://\S+$')
+    FILE_PATTERN = re.compile(r'^\[文件\|')
+    
+    @classmethod
+    def classify(cls, content, sender: str = '', raw_type=None, raw_subtype=None) -> int:
+        """Return the type code for one message."""
+        if raw_type in cls.WECHAT_TYPES:
+            return cls.WECHAT_TYPES[raw_type]
+        if raw_type == 49:
+            return cls.WECHAT_APP_SUBTYPES.get(raw_subtype, cls.LINK)
+        
+        if not isinstance(content, str):
+            content = str(content)
+        text = content.strip()
+        
+        if '撤回了一条消息' in text:
+            return cls.RECALL
+        if sender == '系统消息' or cls.SYSTEM_PATTERN.search(text):
+            return cls.SYSTEM
+        if cls.STICKER_PATTERN.match(text):
+            return cls.STICKER
+        if cls.IMAGE_PATTERN.match(text):
+            return cls.IMAGE
+        if cls.FILE_PATTERN.match(text):
+            return cls.FILE
+        if cls.LINK_PATTERN.match(text):
+            return cls.LINK
+        if text.startswith('>'):
+            return cls.QUOTE
+        return cls.TEXT
+    
+    @classmethod
+    def column(cls, messages: List[Dict]) -> array:
+        """Per-message type codes as a uint8 array."""
+        return array('B', (msg['msg_type'] for msg in messages))
+    
+    @classmethod
+    def counts(cls, codes: array) -> Dict[str, int]:
+        """Per-type counts keyed by display label, in code order."""
+        tally = [0] * len(cls.LABELS)
+        for code in codes:
+            tally[code] += 1
+        return {cls.LABELS[code]: n for code, n in enumerate(tally) if n}
+    
+    @classmethod
+    def text_only(cls, messages: List[Dict], codes: Optional[array] = None) -> List[Dict]:
+        """Drop non-text messages with a single mask over the type column."""
+        if codes is None:
+            codes = cls.column(messages)
+        return list(compress(messages, codes.tobytes().translate(cls.TEXT_MASK)))
+
 
+class MessageNormalizer:
+    """Content normalization stage, computed once per message at ingestion.
+    
+    Adds precomputed fields to each message record so that title, summary and
+    keyword extraction read them instead of re-running cleanup regexes:
+    
+    - clean: content with [emoji] and @mentions removed
+    - length: length of the stripped original content
+    - emoji_spans / mention_spans: (start, end) offsets in the original content
+    - is_noise: emoji-only, mention-only, punctuation/number-only or filler reply
+    - msg_type: MessageType code (kept if the parser already classified it)
+    - epoch: timestamp as integer epoch seconds, None if unparseable
+    """
+    
+    EMOJI_PATTERN = re.compile(r'\[.*?\]')
+    MENTION_PATTERN = re.compile(r'@\w+')
+    NOISE_PATTERN = re.compile('|'.join([
+        r'^\[.*\]$',  # Only emoji like [微笑]
+        r'^@\w+\s*$',  # Only @mention
+        r'^[？?!！]+$',  # Only punctuation
+        r'^\d+$',  # Only numbers
+        r'^(嗯|哦|啊|呵呵|哈哈|好的|ok|OK|收到|谢谢|感谢)+$',  # Simple responses
+    ]))
+    
+    @classmethod
+    def normalize(cls, msg: Dict) -> Dict:
+        """Add normalized fields to a single message record (in place)."""
+        content = msg.get('content', '')
+        if not isinstance(content, str):
+            content = str(content)
+        
+        stripped = content.strip()
+        without_emoji = cls.EMOJI_PATTERN.sub('', content)
+        msg['clean'] = cls.MENTION_PATTERN.sub('', without_emoji).strip()
+        msg['length'] = len(stripped)
+        msg['emoji_spans'] = [m.span() for m in cls.EMOJI_PATTERN.finditer(content)]
+        msg['mention_spans'] = [m.span() for m in cls.MENTION_PATTERN.finditer(content)]
+        msg['is_noise'] = bool(cls.NOISE_PATTERN.match(stripped))
+        if 'msg_type' not in msg:
+            msg['msg_type'] = MessageType.classify(content, msg.get('sender', ''))
+        msg['epoch'] = cls._parse_epoch(msg.get('timestamp', ''))
+        return msg
+    
+    @staticmethod
+    def _parse_epoch(timestamp) -> Optional[int]:
+        if isinstance(timestamp, (int, float)):
+            return int(timestamp)
+        try:
+            return int(datetime.fromisoformat(str(timestamp)).timestamp())
+        except ValueError:
+            return None
+    
+    @classmethod
+    def normalize_all(cls, messages: List[Dict]) -> List[Dict]:
+        """Normalize every message that has not been normalized yet."""
+        for msg in messages:
+            if 'clean' not in msg:
+                cls.normalize(msg)
+        return messages
 
 
+class SessionSegmenter:
+    """Split a message timeline into sessions at silences longer than a threshold.
+    
+    Works on an int64 column of epoch seconds: sort once, take adjacent gaps and
+    cut wherever a gap exceeds the threshold. Uses numpy when available
+    (argsort + diff + flatnonzero); otherwise the same steps run over an array('q').
+    """
+    
+    def __init__(self, gap_minutes: float):
+        self.gap_seconds = int(gap_minutes * 60)
+    
+    def segment(self, epochs) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Return (order, ranges).
+        
+        order: indices into `epochs` in time order (stable for equal timestamps)
+        ranges: (start, end) half-open ranges into `order`, one per session
+        """
+        n = len(epochs)
+        if n == 0:
+            return [], []
+        
+        if np is not None:
+            values = np.asarray(epochs, dtype=np.int64)
+            order = np.argsort(values, kind='stable')
+            cuts = np.flatnonzero(np.diff(values[order]) > self.gap_seconds) + 1
+            bounds = np.concatenate(([0], cuts, [n])).tolist()
+            return order.tolist(), list(zip(bounds[:-1], bounds[1:]))
+        
+        order = sorted(range(n), key=epochs.__getitem__)
+        ranges = []
+        start = 0
+        previous = epochs[order[0]]
+        for position in range(1, n):
+            current = epochs[order[position]]
+            if current - previous > self.gap_seconds:
+                ranges.append((start, position))
+                start = position
+            previous = current
+        ranges.append((start, n))
+        return order, ranges
+
+
+class BurstSegmenter:
+    """Split a message timeline where activity bursts end (two-state Kleinberg automaton).
+    
+    Gaps between consecutive messages are modelled as exponential: the burst
+    state runs at the group's typical pace (one message per median gap), the
+    base state `scale` times slower. A Viterbi pass over the gap column picks
+    the cheapest state sequence; entering the burst state costs gamma * ln(n),
+    leaving it is free.
+    Sessions are cut at gaps spent in the base state, so the cut-off follows
+    each group's own pace: a busy group splits at a lull of a few minutes, a
+    quiet one only at a long silence. Gaps shorter than `min_gap_minutes` never
+    cut and gaps longer than `max_gap_minutes` always do.
+    
+    Same interface as SessionSegmenter and the same cost profile: one sort plus
+    a linear pass (the Viterbi recurrence is sequential, so it runs in Python
+    even when numpy is available for the sort and diff).
+    """
+    
+    MEDIAN_SAMPLE = 1000
+    
+    def __init__(self, scale: float = 8.0, gamma: float = 1.0,
+                 min_gap_minutes: float = 5, max_gap_minutes: float = 120):
+        self.scale = scale
+        self.gamma = gamma
+        self.min_gap_seconds = int(min_gap_minutes * 60)
+        self.max_gap_seconds = int(max_gap_minutes * 60)
+    
+    def segment(self, epochs) -> Tuple[List[int], List[Tuple[int, int]]]:
+        """Return (order, ranges), as SessionSegmenter.segment."""
+        n = len(epochs)
+        if n == 0:
+            return [], []
+        
+        if np is not None:
+            values = np.asarray(epochs, dtype=np.int64)
+            order_array = np.argsort(values, kind='stable')
+            gaps = np.diff(values[order_array]).tolist()
+            order = order_array.tolist()
+        else:
+            order = sorted(range(n), key=epochs.__getitem__)
+            ordered = [epochs[i] for i in order]
+            gaps = [later - earlier for earlier, later in zip(ordered, ordered[1:])]
+        
+        bounds = [0] + self._cuts(gaps) + [n]
+        return order, list(zip(bounds[:-1], bounds[1:]))
+    
+    def _cuts(self, gaps: List[int]) -> List[int]:
+        """Positions (into the time order) where a new session starts."""
+        m = len(gaps)
+        if m == 0:
+            return []
+        
+        # Median gap from an evenly strided sample; only sets the pace, so
+        # ~1000 gaps are plenty and the pass stays linear
+        sample = sorted(gaps[::max(1, m // self.MEDIAN_SAMPLE)])
+        median_gap = sample[len(sample) // 2]
+        rate1 = 1.0 / max(median_gap, 1)
+        rate0 = rate1 / self.scale
+        up = self.gamma * math.log(m + 1)
+        
+        # Only the difference d = cost(burst) - cost(base) of the cheapest paths
+        # matters: moving to the next gap, base is reached from the cheaper state
+        # (free) and burst from min(burst, base + up), so
+        #     d' = clamp(d, 0, up) + (rate1 - rate0) * gap - ln(rate1 / rate0)
+        # The d before each gap is kept for the backtrack.
+        slope = rate1 - rate0
+        offset = math.log(self.scale)
+        d = up  # start in the base state
+        before = array('d', bytes(8 * m))
+        for i, gap in enumerate(gaps):
+            before[i] = d
+            d = (0.0 if d < 0.0 else up if d > up else d) + slope * gap - offset
+        
+        # Backtrack, cutting at base-state gaps. The base state at gap i came from
+        # base if d >= 0 there; the burst state came from base if d > up.
+        cuts = []
+        base = d >= 0.0
+        min_gap, max_gap = self.min_gap_seconds, self.max_gap_seconds
+        for i in range(m - 1, -1, -1):
+            gap = gaps[i]
+            if gap > max_gap or (base and gap >= min_gap):
+                cuts.append(i + 1)
+            base = before[i] >= 0.0 if base else before[i] > up
+        cuts.reverse()
+        return cuts
+
+
+class MinHasher:
+    """One-permutation MinHash signatures for sets of string shingles.
+
+    Every shingle is hashed once (crc32) and the low bits pick one of
+    `num_perm` bins that keeps its minimum, so building a signature is linear
+    in the number of shingles. Empty bins borrow from the next filled bin
+    (rotation densification). The share of equal positions in two signatures
+    estimates the Jaccard similarity of the sets.
+    """
+
+    def __init__(self, num_perm: int = 64):
+        self.num_perm = num_perm  # power of two: bin = hash & (num_perm - 1)
+        self._bin_bits = num_perm.bit_length() - 1
+
+    def signature(self, shingles) -> List[int]:
+        num_bins = self.num_perm
+        mask = num_bins - 1
+        shift = self._bin_bits
+        empty = 1 << 32
+        bins = [empty] * num_bins
+        for shingle in shingles:
+            h = zlib.crc32(shingle.encode('utf-8'))
+            value = h >> shift
+            if value < bins[h & mask]:
+                bins[h & mask] = value
+
+        # Rotation densification: an empty bin takes the next filled bin's value,
+        # offset by the distance so borrowed values stay distinguishable
+        for index in range(num_bins):
+            if bins[index] != empty:
+                continue
+            for distance in range(1, num_bins):
+                value = bins[(index + distance) % num_bins]
+                if value < empty:
+                    bins[index] = value + distance * empty
+                    break
+        return bins
+
+    def band_keys(self, signature: List[int], bands: int) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """LSH bucket keys: one (band, rows) key per band."""
+        rows = self.num_perm // bands
+        for band in range(bands):
+            yield band, tuple(signature[band * rows:(band + 1) * rows])
+
+    @staticmethod
+    def similarity(left: List[int], right: List[int]) -> float:
+        return sum(map(operator.eq, left, right)) / len(left)
+
+
+class SessionStitcher:
+    """Re-join sessions that a silence gap split but that talk about the same thing.
+
+    Each session's text messages are cut into character shingles and summarized
+    by a MinHash signature (see MinHasher). Signatures are split into bands;
+    sessions sharing a band hash land in the same LSH bucket and become
+    candidate pairs, so only similar sessions are ever compared instead of all
+    pairs. Candidates whose estimated Jaccard similarity reaches the threshold
+    and that lie within `max_gap_hours` of each other are merged with union-find.
+    Only the signature and the first/last epoch of each session are kept, so
+    sessions can be summarized one at a time as they are cut.
+
+    With 32 bands of 2 rows, pairs at the 0.4 threshold become candidates over
+    99% of the time while pairs below 0.1 rarely do; every candidate is then
+    checked against the full signature.
+    """
+
+    SHINGLE_SIZE = 3
+    NUM_PERM = 64  # power of two: bin = hash & (NUM_PERM - 1)
+    BANDS = 32
+    MIN_SHINGLES = 20  # short chit-chat sessions are never stitched
+
+    def __init__(self, threshold: float = 0.4, max_gap_hours: float = 24):
+        self.threshold = threshold
+        self.max_gap_seconds = int(max_gap_hours * 3600)
+        self.minhasher = MinHasher(self.NUM_PERM)
+
+    def signature(self, session: List[Dict]) -> Optional[List[int]]:
+        """MinHash signature of a session, None if it is too short to stitch."""
+        shingles = self._shingles(session)
+        if len(shingles) < self.MIN_SHINGLES:
+            return None
+        return self.minhasher.signature(shingles)
+
+    def stitch(self, signatures: List[Optional[List[int]]],
+               bounds: List[Tuple[int, int]]) -> List[List[int]]:
+        """Group sessions that continue the same discussion.
+
+        Works on per-session summaries only, so callers never need to hold
+        every session's messages at once.
+
+        Args:
+            signatures: Per-session signature (see signature), in time order
+            bounds: Per-session (first epoch, last epoch)
+
+        Returns:
+            Lists of session indices, each in time order, ordered by their
+            first session
+        """
+        count = len(signatures)
+        parent = list(range(count))
+
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            if signature is None:
+                continue
+            for key in self.minhasher.band_keys(signature, self.BANDS):
+                buckets[key].append(index)
+
+        checked = set()
+        for members in buckets.values():
+            for i_pos in range(len(members)):
+                for j_pos in range(i_pos + 1, len(members)):
+                    i, j = members[i_pos], members[j_pos]
+                    if (i, j) in checked:
+                        continue
+                    checked.add((i, j))
+                    if self._gap(bounds[i], bounds[j]) > self.max_gap_seconds:
+                        continue
+                    if MinHasher.similarity(signatures[i], signatures[j]) >= self.threshold:
+                        parent[find(j)] = find(i)
+
+        groups = defaultdict(list)
+        for index in range(count):
+            groups[find(index)].append(index)
+        merged = sorted(groups.values())
+        if len(merged) < count:
+            logger.info(f"🧵 Stitched {count} sessions into {len(merged)}")
+        return merged
+
+    def _shingles(self, session: List[Dict]) -> set:
+        size = self.SHINGLE_SIZE
+        shingles = set()
+        for msg in MessageType.text_only(session):
+            if msg['is_noise']:
+                continue
+            text = msg['clean']
+            shingles.update(text[i:i + size] for i in range(len(text) - size + 1))
+        return shingles
+
+    @staticmethod
+    def _gap(first: Tuple[int, int], second: Tuple[int, int]) -> int:
+        if first[0] > second[0]:
+            first, second = second, first
+        return second[0] - first[1]
+
+
+class TextRankSummarizer:
+    """Extractive summary: the most central messages of a session (TextRank).
+
+    Messages are nodes of a similarity graph; the summary is the few nodes with
+    the highest PageRank, i.e. the ones most of the discussion resembles.
+    Building the graph over all pairs would be O(n^2), so each message gets a
+    character-bigram MinHash signature and only messages sharing an LSH bucket
+    are compared. Oversized buckets (a dense cluster of similar messages) only
+    link each member to its next few neighbours, skipping members that are
+    already well connected, and every node keeps its MAX_NEIGHBORS strongest
+    edges, so the graph stays near-linear in size.
+    A few power iterations then rank the nodes.
+
+    Identical messages are ranked once; how often a text was repeated weights
+    its share of the teleport step (personalized PageRank, 1 + ln(count)), so
+    "+1"-style repetition still counts without inflating the graph or
+    drowning out the discussion. Picked messages that
+    are near-duplicates of an earlier pick are skipped, and the summary lists
+    picks in conversation order.
+    """
+
+    SHINGLE_SIZE = 2
+    NUM_PERM = 32
+    BANDS = 16
+    MIN_SIMILARITY = 0.2
+    MAX_NEIGHBORS = 10
+    MAX_BUCKET = 16  # larger buckets only link each member to its next BUCKET_NEIGHBORS
+    BUCKET_NEIGHBORS = 4
+    DUPLICATE_SIMILARITY = 0.5
+    DAMPING = 0.85
+    ITERATIONS = 20
+    TOLERANCE = 1e-4
+
+    def __init__(self):
+        self.minhasher = MinHasher(self.NUM_PERM)
+
+    def summarize(self, texts: List[str], count: int = 4) -> List[int]:
+        """Indices of the `count` most central, mutually distinct texts, in order."""
+        if len(texts) <= count:
+            return list(range(len(texts)))
+        first_index, weights = self._distinct(texts)
+        signatures = self._signatures(list(first_index))
+        scores = self._pagerank(self._edges(signatures), weights)
+
+        picked = []
+        for node in sorted(range(len(signatures)), key=scores.__getitem__, reverse=True):
+            if all(MinHasher.similarity(signatures[node], signatures[other]) < self.DUPLICATE_SIMILARITY
+                   for other in picked):
+                picked.append(node)
+                if len(picked) >= count:
+                    break
+        indices = list(first_index.values())
+        return sorted(indices[node] for node in picked)
+
+    @staticmethod
+    def _distinct(texts: List[str]) -> Tuple[Dict[str, int], List[float]]:
+        """First index of each distinct text (in order) and its repetition weight."""
+        first_index = {}
+        counts = Counter()
+        for index, text in enumerate(texts):
+            first_index.setdefault(text, index)
+            counts[text] += 1
+        return first_index, [1 + math.log(counts[text]) for text in first_index]
+
+    def _signatures(self, texts: List[str]) -> List[List[int]]:
+        size = self.SHINGLE_SIZE
+        return [
+            self.minhasher.signature({text[i:i + size] for i in range(len(text) - size + 1)} or {text})
+            for text in texts
+        ]
+
+    def _edges(self, signatures: List[List[int]]) -> List[List[Tuple[int, float]]]:
+        """Similarity-weighted adjacency lists, each pruned to its MAX_NEIGHBORS strongest edges."""
+        buckets = defaultdict(list)
+        for index, signature in enumerate(signatures):
+            for key in self.minhasher.band_keys(signature, self.BANDS):
+                buckets[key].append(index)
+
+        n = len(signatures)
+        similar = defaultdict(dict)
+        checked = set()
+        for members in buckets.values():
+            size = len(members)
+            oversized = size > self.MAX_BUCKET
+            reach = self.BUCKET_NEIGHBORS if oversized else size
+            for position, i in enumerate(members):
+                if oversized and len(similar[i]) >= self.MAX_NEIGHBORS:
+                    continue  # already well connected within this cluster
+                for j in members[position + 1:position + 1 + reach]:
+                    pair = i * n + j
+                    if pair in checked:
+                        continue
+                    checked.add(pair)
+                    sim = MinHasher.similarity(signatures[i], signatures[j])
+                    if sim >= self.MIN_SIMILARITY:
+                        similar[i][j] = sim
+                        similar[j][i] = sim
+
+        edges = [[] for _ in signatures]
+        for i, neighbors in similar.items():
+            edges[i] = heapq.nlargest(self.MAX_NEIGHBORS, neighbors.items(), key=lambda item: item[1])
+        return edges
+
+    def _pagerank(self, edges: List[List[Tuple[int, float]]], weights: List[float]) -> List[float]:
+        """Weighted, personalized PageRank by power iteration over sparse adjacency lists.
+        
+        Teleport and dangling mass are spread in proportion to `weights`.
+        """
+        n = len(edges)
+        total = sum(weights)
+        preference = [weight / total for weight in weights]
+        out_weight = [sum(weight for _, weight in neighbors) for neighbors in edges]
+        dangling_nodes = [i for i in range(n) if not out_weight[i]]
+        scores = preference
+        for _ in range(self.ITERATIONS):
+            restart = 1 - self.DAMPING + self.DAMPING * sum(scores[i] for i in dangling_nodes)
+            updated = [restart * p for p in preference]
+            for i, neighbors in enumerate(edges):
+                if not neighbors:
+                    continue
+                share = self.DAMPING * scores[i] / out_weight[i]
+                for j, weight in neighbors:
+                    updated[j] += share * weight
+            delta = sum(abs(a - b) for a, b in zip(updated, scores))
+            scores = updated
+            if delta < self.TOLERANCE:
+                break
+        return scores
+
+
+class KeywordSketch:
+    """Bounded frequency counter for keyword candidates (Misra-Gries summary).
+
+    Keeps at most `capacity` counters. When a new candidate arrives and the
+    table is full, every counter is decremented and zeros are dropped; each
+    decrement cancels an earlier increment, so the total work stays linear in
+    the number of candidates. Any word occurring more than N / (capacity + 1)
+    times is guaranteed to survive, and sessions with fewer distinct candidates
+    than `capacity` are counted exactly.
+    """
+
+    def __init__(self, capacity: int = 512):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+
+    def add(self, word: str) -> None:
+        counts = self.counts
+        if word in counts:
+            counts[word] += 1
+        elif len(counts) < self.capacity:
+            counts[word] = 1
+        else:
+            for key in list(counts):
+                if counts[key] == 1:
+                    del counts[key]
+                else:
+                    counts[key] -= 1
+
+    def update(self, words) -> None:
+        for word in words:
+            self.add(word)
+
+    def items(self):
+        return self.counts.items()
+
+
+class KeywordSelector:
+    """Accept keywords while suppressing near-duplicates (one contains the other).
+
+    Every substring of an accepted keyword goes into `covered`, so "candidate is
+    inside an accepted keyword" is a single set lookup. "An accepted keyword is
+    inside the candidate" slides one window per distinct accepted length over
+    the candidate. Both checks are independent of how many keywords are kept.
+    """
+
+    def __init__(self):
+        self.accepted: List[str] = []
+        self._accepted_set = set()
+        self._lengths = set()
+        self.covered = set()
+
+    def __len__(self) -> int:
+        return len(self.accepted)
+
+    def is_duplicate(self, word: str) -> bool:
+        if word in self.covered:
+            return True
+        accepted = self._accepted_set
+        for length in self._lengths:
+            for start in range(len(word) - length + 1):
+                if word[start:start + length] in accepted:
+                    return True
+        return False
+
+    def add(self, word: str) -> bool:
+        """Accept `word` unless it overlaps an accepted keyword. Returns True if accepted."""
+        if self.is_duplicate(word):
+            return False
+        self.accepted.append(word)
+        self._accepted_set.add(word)
+        self._lengths.add(len(word))
+        n = len(word)
+        self.covered.update(word[i:j] for i in range(n) for j in range(i + 1, n + 1))
+        return True
+
+
+class TopicRanker:
+    """Keep the K best-scoring items seen in a stream.
+    
+    A min-heap of size K holds (score, -sequence, item); a new item only enters
+    by evicting the current worst. Ties keep the earlier item, matching a stable
+    sort by score. TopicAnalyzer pushes index ranges rather than message lists,
+    so the heap itself is small; the day's messages are still held in full by
+    the analyzer.
+    """
+    
+    def __init__(self, k: int):
+        self.k = k
+        self.seen = 0
+        self._heap: List[Tuple[float, int, Any]] = []
+    
+    def __len__(self) -> int:
+        return len(self._heap)
+    
+    def push(self, score: float, item: Any) -> bool:
+        """Offer an item; returns True if it is currently among the best K."""
+        entry = (score, -self.seen, item)
+        self.seen += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+            return True
+        if self.k and entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+            return True
+        return False
+    
+    def results(self) -> List[Tuple[float, Any]]:
+        """[(score, item)] best first."""
+        ranked = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [(score, item) for score, _, item in ranked]
+
 
 class TopicAnalyzer:
     """Analyze messages and extract top topics."""
     
     TIME_WINDOW_MINUTES = 30
     
-    def __init__(self, messages: List[Dict]):
-        self.messages = messages
+    # 分段 values selecting BurstSegmenter; "45分钟" / "45" selects a fixed gap
+    BURST_SEGMENTATION = frozenset({'突发', '自适应', 'burst', 'adaptive'})
+    FIXED_SEGMENTATION_PATTERN = re.compile(r'^(\d+(?:\.\d+)?)\s*(?:分钟|min|minutes?)?$', re.IGNORECASE)
+    
+    # Common Chinese stop words to filter
+    STOP_WORDS = frozenset({
+        '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个',
+        '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好',
+        '自己', '这', '那', '他', '她', '它', '们', '什么', '怎么', '可以', '这个', '那个',
+        '吗', '呢', '啊', '吧', '哦', '嗯', '哈', '呵', '嘻', '哼', '唉', '喂',
+        '如果', '因为', '所以', '但是', '而且', '或者', '还是', '虽然', '不过',
+        '这样', '那样', '这么', '那么', '什么样', '怎么样',
+    })
+    ENGLISH_STOP_WORDS = frozenset({'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all'})
+    
+    CHINESE_WORD_PATTERN = re.compile(r'[\u4e00-\u9fff]{2,6}')
+    ENGLISH_WORD_PATTERN = re.compile(r'[a-zA-Z]{3,}')
+    NUMBER_WORD_PATTERN = re.compile(r'\d+[年月日万亿%]+')
+    
+    # Max distinct keyword candidates tracked per session
+    KEYWORD_SKETCH_CAPACITY = 512
+    
+    def __init__(self, messages: List[Dict], carried: Optional[List[Dict]] = None,
+                 segmentation: str = ''):
+        """
+        Args:
+            messages: Messages of the analyzed day(s)
+            carried: Open session left at the end of the previous day (see
+                SessionCarryover); it joins the first session if the silence
+                before today's first message is short enough
+            segmentation: Checklist 分段 value (see make_segmenter)
+        """
+        self.messages = MessageNormalizer.normalize_all(messages)
+        self.carried = MessageNormalizer.normalize_all(carried or [])
+        self.type_codes = MessageType.column(self.messages)
+        self.type_counts = MessageType.counts(self.type_codes)
+        self.segmenter = self.make_segmenter(segmentation)
+        self.stitcher = SessionStitcher()
+        self.summarizer = TextRankSummarizer()
+        self.open_session: List[Dict] = []
+    
+    @classmethod
+    def make_segmenter(cls, segmentation: str = ''):
+        """Segmenter for a checklist 分段 value.
+        
+        "突发"/"burst" selects BurstSegmenter, "45分钟"/"45" a fixed 45-minute
+        gap; empty or unrecognised values use TIME_WINDOW_MINUTES.
+        """
+        segmentation = (segmentation or '').strip()
+        if segmentation.lower() in cls.BURST_SEGMENTATION:
+            return BurstSegmenter()
+        fixed = cls.FIXED_SEGMENTATION_PATTERN.match(segmentation)
+        if fixed:
+            return SessionSegmenter(float(fixed.group(1)))
+        if segmentation:
+            logger.warning(f"⚠️ Unknown segmentation '{segmentation}', using {cls.TIME_WINDOW_MINUTES}-minute gaps")
+        return SessionSegmenter(cls.TIME_WINDOW_MINUTES)
     
     def analyze(self) -> List[Dict]:
         """
@@ -421,73 +1316,84 @@ class TopicAnalyzer:
         Returns:
             List of topic dicts with title, summary, keywords, etc.
         """
-        # Group messages by session windows (silence > 30 mins = new topic)
-        sessions = self._group_by_session_windows()
-        
-        # Extract topics from each session
-        topics = []
-        for session_messages in sessions:
-            topic = self._extract_topic(session_messages)
-            if topic:  # Only add valid topics
-                topics.append(topic)
-        
-        # Rank topics by score
-        ranked_topics = sorted(topics, key=lambda t: t['score'], reverse=True)
-        
         # Calculate dynamic topic count based on message volume
         # Approximately 1 topic per 50 messages, min 5, max 20
         total_messages = len(self.messages)
         target_topics = max(5, min(20, total_messages // 50))
         
-        # Return top N topics
-        top_topics = ranked_topics[:target_topics]
+        # Cut sessions at silences (> 30 mins = new topic) and re-join the ones
+        # that continue the same discussion. A session is a range into the
+        # time-ordered messages; stitching only sees its signature and time
+        # bounds, and scoring walks the ranges without copying them
+        ordered, ranges = self._session_ranges()
+        signatures = []
+        bounds = []
+        for start, end in ranges:
+            signatures.append(self.stitcher.signature(ordered[start:end]))
+            bounds.append((ordered[start]['epoch'], ordered[end - 1]['epoch']))
+        ranker = TopicRanker(target_topics)
+        for group in self.stitcher.stitch(signatures, bounds):
+            parts = [ranges[index] for index in group]
+            ranker.push(self._score_session(self._session_messages(ordered, parts)), parts)
+        
+        # Message lists, title, summary and keywords are only built for the winners
+        top_topics = [
+            self._extract_topic(list(self._session_messages(ordered, parts)))
+            for _, parts in ranker.results()
+        ]
         
-        logger.info(f"📊 Extracted {len(topics)} topics (sessions), selected top {len(top_topics)}")
+        logger.info(f"📊 Extracted {ranker.seen} topics (sessions), selected top {len(top_topics)}")
         return top_topics
     
-    def _group_by_session_windows(self) -> List[List[Dict]]:
-        """Group messages into sessions based on time gaps.
-        
-        Start a new group if gap between messages > TIME_WINDOW_MINUTES.
-        """
-        if not self.messages:
-            return []
-            
-        sessions = []
-        current_session = []
-        last_time = None
+    def _session_ranges(self) -> Tuple[List[Dict], List[Tuple[int, int]]]:
+        """Messages in time order and the (start, end) range of each session.
         
-        # Ensure messages are sorted by time (they usually are, but just to be safe)
-        # Note: timestamps are strings, so we need to parse them for comparison
-        # But for stability, we assume they are roughly ordered or we rely on their order in list
+        Start a new group if gap between messages > TIME_WINDOW_MINUTES (or
+        wherever the configured segmenter cuts).
+        Messages without a parseable timestamp are left out.
         
-        for msg in self.messages:
-            try:
-                # Handle various timestamp formats if needed, but assuming ISO-like
-                current_time = datetime.fromisoformat(msg['timestamp'])
-            except ValueError:
-                # Try simple string parsing if isoformat fails (for safety)
-                continue
-                
-            if last_time is None:
-                current_session.append(msg)
-            else:
-                gap = current_time - last_time
-                if gap > timedelta(minutes=self.TIME_WINDOW_MINUTES):
-                    # Gap too large, start new session
-                    sessions.append(current_session)
-                    current_session = [msg]
-                else:
-                    # Within window, add to current session
-                    current_session.append(msg)
-            
-            last_time = current_time
+        Carried messages precede the day's own, so they end up in the first
+        session; if nothing today continues them, that session was already
+        reported yesterday and is skipped. Afterwards `open_session` holds the
+        last session, ready to be carried into the next day.
+        """
+        carried = [msg for msg in self.carried if msg['epoch'] is not None]
+        timed = carried + [msg for msg in self.messages if msg['epoch'] is not None]
+        order, ranges = self.segmenter.segment(array('q', (msg['epoch'] for msg in timed)))
+        ordered = [timed[i] for i in order]
+        if ranges:
+            start, end = ranges[-1]
+            self.open_session = ordered[start:end]
+        if carried:
+            ranges = [
+                (start, end) for start, end in ranges
+                if not all(i < len(carried) for i in order[start:end])
+            ]
+        return ordered, ranges
+    
+    @staticmethod
+    def _session_messages(ordered: List[Dict], parts: List[Tuple[int, int]]) -> Iterator[Dict]:
+        """Messages of a (possibly stitched) session, given its ranges."""
+        for start, end in parts:
+            for index in range(start, end):
+                yield ordered[index]
+    
+    @staticmethod
+    def _score_session(messages) -> float:
+        """Value score of a session (weighted formula), in one pass.
         
-        # Add the last session
-        if current_session:
-            sessions.append(current_session)
-            
-        return sessions
+        Bonus for topics with more participants (discussion) vs monologue.
+        """
+        msg_count = 0
+        total_length = 0
+        participants = set()
+        for msg in messages:
+            msg_count += 1
+            total_length += len(msg.get('content', ''))
+            participants.add(msg.get('sender', 'Unknown'))
+        participant_count = len(participants)
+        diversity_bonus = 1.5 if participant_count > 2 else 1.0
+        return ((msg_count * 0.4) + (total_length * 0.1) + (participant_count * 5.0)) * diversity_bonus
     
     def _extract_topic(self, messages: List[Dict]) -> Optional[Dict]:
         """Extract topic information from a session of messages."""
@@ -496,23 +1402,21 @@ class TopicAnalyzer:
             
         # Calculate metrics
         msg_count = len(messages)
-        total_length = sum(len(msg.get('content', '')) for msg in messages)
-        participants = set(msg.get('sender', 'Unknown') for msg in messages)
-        participant_count = len(participants)
+        participant_count = len(set(msg.get('sender', 'Unknown') for msg in messages))
+        score = self._score_session(messages)
         
-        # Calculate score (weighted formula)
-        # Bonus for topics with more participants (discussion) vs monologue
-        diversity_bonus = 1.5 if participant_count > 2 else 1.0
-        score = ((msg_count * 0.4) + (total_length * 0.1) + (participant_count * 5.0)) * diversity_bonus
+        # Title, summary and keywords only look at text; stickers, images,
+        # links and system notices still count towards the score above
+        text_messages = MessageType.text_only(messages) or messages
         
         # Generate title
-        title = self._generate_title(messages)
+        title = self._generate_title(text_messages)
         
         # Generate summary
-        summary = self._generate_summary(messages)
+        summary = self._generate_summary(text_messages)
         
         # Extract keywords
-        keywords = self._extract_keywords(messages)
+        keywords = self._extract_keywords(text_messages)
         
         # Get start time of the topic
         start_time_str = messages[0].get('timestamp', '')
@@ -540,17 +1444,15 @@ class TopicAnalyzer:
         # Find messages with substantial content
         substantial_msgs = []
         for msg in messages:
-            content = msg.get('content', '').strip()
             # Filter out short messages, emoji-only, and system messages
-            if len(content) > 15 and not self._is_noise(content):
-                substantial_msgs.append(content)
+            if msg['length'] > 15 and not msg['is_noise']:
+                substantial_msgs.append(msg['clean'])
         
         if not substantial_msgs:
             # Fallback: use any message with content
             for msg in messages:
-                content = msg.get('content', '').strip()
-                if len(content) > 5:
-                    return self._extract_title_from_content(content)
+                if msg['length'] > 5:
+                    return self._extract_title_from_content(msg['clean'])
             return "群聊讨论"
         
         # Find the most representative message (balance of length and position)
@@ -565,12 +1467,7 @@ class TopicAnalyzer:
         return self._extract_title_from_content(best_msg)
     
     def _extract_title_from_content(self, content: str) -> str:
-        """Extract a concise title from message content."""
-        # Remove common noise patterns
-        content = re.sub(r'\[.*?\]', '', content)  # Remove [emoji]
-        content = re.sub(r'@\w+', '', content)  # Remove @mentions
-        content = content.strip()
-        
+        """Extract a concise title from cleaned message content."""
         # Try to find a sentence or phrase
         # Split by common Chinese/English punctuation
         sentences = re.split(r'[。！？\n，；：]', content)
@@ -592,64 +1489,34 @@ class TopicAnalyzer:
         
         return content if content else "群聊讨论"
     
-    def _is_noise(self, content: str) -> bool:
-        """Check if content is noise (emoji-only, system message, etc.)."""
-        noise_patterns = [
-            r'^\[.*\]$',  # Only emoji like [微笑]
-            r'^@\w+\s*$',  # Only @mention
-            r'^[？?!！]+$',  # Only punctuation
-            r'^\d+$',  # Only numbers
-            r'^(嗯|哦|啊|呵呵|哈哈|好的|ok|OK|收到|谢谢|感谢)+$',  # Simple responses
-        ]
-        for pattern in noise_patterns:
-            if re.match(pattern, content.strip()):
-                return True
-        return False
-    
     def _generate_summary(self, messages: List[Dict]) -> str:
         """Generate intelligent topic summary.
         
-        Strategy: Select 3-5 most representative messages that capture the discussion.
+        Strategy: Select up to 4 most representative messages that capture the
+        discussion (TextRank centrality, near-duplicates skipped).
         """
         # Filter out noise and collect substantial messages
         substantial = []
         for msg in messages:
-            content = msg.get('content', '').strip()
-            if len(content) > 10 and not self._is_noise(content):
+            if msg['length'] > 10 and not msg['is_noise']:
                 substantial.append({
-                    'content': content,
+                    'content': msg['clean'],
                     'sender': msg.get('sender', 'Unknown'),
-                    'length': len(content)
+                    'length': msg['length']
                 })
         
         if not substantial:
             return "暂无详细摘要"
         
-        # Select diverse messages for summary
-        # Strategy: pick messages from different parts of the conversation
-        selected = []
-        n = len(substantial)
-        
-        if n <= 3:
-            selected = substantial
-        else:
-            # Pick from beginning, middle, and end
-            indices = [0, n // 2, n - 1]
-            # Also add longest messages if they're different
-            sorted_by_length = sorted(range(n), key=lambda i: substantial[i]['length'], reverse=True)
-            for idx in sorted_by_length[:2]:
-                if idx not in indices:
-                    indices.append(idx)
-            
-            indices = sorted(set(indices))[:4]
-            selected = [substantial[i] for i in indices]
+        # Select the most central messages, in conversation order
+        indices = self.summarizer.summarize([item['content'] for item in substantial], 4)
+        selected = [substantial[i] for i in indices]
         
         # Build summary
         summary_parts = []
         for item in selected:
             content = item['content']
-            # Clean and truncate
-            content = re.sub(r'\[.*?\]', '', content).strip()
+            # Truncate (already cleaned at ingestion)
             if len(content) > 60:
                 content = content[:60] + "..."
             if content:
@@ -657,48 +1524,40 @@ class TopicAnalyzer:
         
         return " | ".join(summary_parts) if summary_parts else "暂无详细摘要"
     
-    def _extract_keywords(self, messages: List[Dict]) -> List[str]:
-        """Extract meaningful keywords from messages.
-        
-        Strategy: Use Chinese text patterns and filter common words.
-        """
-        # Common Chinese stop words to filter
-        stop_words = {
-            '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一', '一个',
-            '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好',
-            '自己', '这', '那', '他', '她', '它', '们', '什么', '怎么', '可以', '这个', '那个',
-            '吗', '呢', '啊', '吧', '哦', '嗯', '哈', '呵', '嘻', '哼', '唉', '喂',
-            '如果', '因为', '所以', '但是', '而且', '或者', '还是', '虽然', '不过',
-            '这样', '那样', '这么', '那么', '什么样', '怎么样',
-        }
-        
-        # Collect all text
-        all_text = ' '.join(msg.get('content', '') for msg in messages)
+    @classmethod
+    def _keyword_sketch(cls, messages: List[Dict]) -> KeywordSketch:
+        """Count keyword candidates of normalized messages in a KeywordSketch."""
+        # Collect all text (emoji and @mentions already stripped at ingestion)
+        all_text = ' '.join(msg['clean'] for msg in messages)
         
         # Extract potential keywords using patterns
-        keywords_candidates = defaultdict(int)
+        sketch = KeywordSketch(cls.KEYWORD_SKETCH_CAPACITY)
+        stop_words = cls.STOP_WORDS
+        english_stop_words = cls.ENGLISH_STOP_WORDS
         
         # Pattern 1: Chinese phrases (2-6 characters)
-        chinese_words = re.findall(r'[\u4e00-\u9fff]{2,6}', all_text)
-        for word in chinese_words:
-            if word not in stop_words and len(word) >= 2:
-                keywords_candidates[word] += 1
+        sketch.update(word for word in cls.CHINESE_WORD_PATTERN.findall(all_text) if word not in stop_words)
         
         # Pattern 2: English words (3+ letters)
-        english_words = re.findall(r'[a-zA-Z]{3,}', all_text)
-        for word in english_words:
-            word_lower = word.lower()
-            if word_lower not in {'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all'}:
-                keywords_candidates[word] += 1
+        sketch.update(word for word in cls.ENGLISH_WORD_PATTERN.findall(all_text)
+                      if word.lower() not in english_stop_words)
         
         # Pattern 3: Numbers with context (like "2024年" or "100万")
-        num_patterns = re.findall(r'\d+[年月日万亿%]+', all_text)
-        for pattern in num_patterns:
-            keywords_candidates[pattern] += 1
+        sketch.update(cls.NUMBER_WORD_PATTERN.findall(all_text))
+        return sketch
+    
+    def _extract_keywords(self, messages: List[Dict]) -> List[str]:
+        """Extract meaningful keywords from messages.
+        
+        Strategy: Use Chinese text patterns and filter common words.
+        Candidates are counted in a bounded KeywordSketch and near-duplicates
+        are suppressed by a KeywordSelector, so the cost stays linear in text size.
+        """
+        sketch = self._keyword_sketch(messages)
         
         # Score keywords by frequency and length
         scored = []
-        for word, freq in keywords_candidates.items():
+        for word, freq in sketch.items():
             # Higher score for: more frequent, moderate length, multiple occurrences
             length_score = min(len(word) / 4, 1.5)  # Prefer 2-6 chars
             freq_score = min(freq / 3, 2.0)  # Value frequency
@@ -709,23 +1568,13 @@ class TopicAnalyzer:
         # Sort by score and get top keywords
         scored.sort(key=lambda x: x[1], reverse=True)
         
-        # Get top 5 unique keywords
-        keywords = []
-        seen = set()
+        # Get top 5 unique keywords (skip ones contained in / containing an accepted keyword)
+        selector = KeywordSelector()
         for word, score, freq in scored:
-            # Skip if too similar to existing keywords
-            is_duplicate = False
-            for existing in seen:
-                if word in existing or existing in word:
-                    is_duplicate = True
-                    break
-            
-            if not is_duplicate:
-                keywords.append(word)
-                seen.add(word)
-            
-            if len(keywords) >= 5:
+            selector.add(word)
+            if len(selector) >= 5:
                 break
+        keywords = selector.accepted
         
         return keywords if keywords else ["讨论", "交流", "分享"]
 
@@ -810,6 +1659,13 @@ class HTMLGenerator:
             color: #666;
         }}
         
+        .type-breakdown {{
+            margin: -24px 0 40px;
+            text-align: center;
+            font-size: 13px;
+            color: #888;
+        }}
+        
         /* Section Titles */
         .section-title {{
             font-size: 20px;
@@ -947,6 +1803,7 @@ class HTMLGenerator:
                 <span class="stat-label">活跃时段</span>
             </div>
         </div>
+        {type_breakdown_html}
 
         <!-- Hot Topic (First Topic) -->
         {hot_topic_html}
@@ -964,7 +1821,8 @@ class HTMLGenerator:
 """
 
     def generate(self, chat_name: str, date: str, topics: List[Dict], 
-                 message_count: int = 0, participant_count: int = 0) -> str:
+                 message_count: int = 0, participant_count: int = 0,
+                 type_counts: Optional[Dict[str, int]] = None) -> str:
         """Generate HTML report."""
         if not topics:
             return ""
@@ -990,6 +1848,12 @@ class HTMLGenerator:
         else:
             time_span = "全天"
         
+        # Message type breakdown
+        type_breakdown_html = ""
+        if type_counts:
+            breakdown = " · ".join(f"{label} {count}" for label, count in type_counts.items())
+            type_breakdown_html = f'<div class="type-breakdown">{breakdown}</div>'
+        
         # Split topics
         hot_topic = topics[0]
         other_topics = topics[1:]
@@ -1060,6 +1924,7 @@ class HTMLGenerator:
             total_messages=total_msgs,
             total_participants=total_participants,
             time_span=time_span,
+            type_breakdown_html=type_breakdown_html,
             hot_topic_html=hot_topic_html,
             discussions_html=discussions_html,
             gen_time=datetime.now().strftime("%H:%M:%S")
@@ -1071,14 +1936,357 @@ class HTMLGenerator:
         logger.info(f"✅ Generated report: {output_path.name}")
 
 
+class ChatPipeline:
+    """Run jobs through stages connected by bounded queues.
+
+    Each stage is (name, func, workers): `workers` threads take a job from the
+    stage's input queue, call func(job) and put the returned job on the next
+    stage's queue. Queues hold at most `queue_size` jobs, so a fast stage
+    blocks (backpressure) instead of piling up fetched message lists while a
+    slow stage catches up. With fetch ahead of analyze, group N+1 downloads
+    while group N is analyzed.
+
+    A stage returns None to drop a job (e.g. no messages). Exceptions are
+    logged and drop only that job (Log & Continue).
+
+    Stages named in `ordered` receive jobs in input order whatever order the
+    previous stage finishes them in: a dropped or failed job leaves a
+    tombstone so the stage never waits for it. An ordered stage may also map
+    to a key function; jobs with the same key then run one at a time, in input
+    order, even with several workers (used to thread state from one day of a
+    chat to the next).
+    """
+
+    _STOP = object()
+
+    def __init__(self, stages: List[Tuple[str, Callable[[Dict], Optional[Dict]], int]], queue_size: int = 2,
+                 ordered: Optional[Dict[str, Optional[Callable[[Dict], str]]]] = None):
+        self.stages = [(name, func, max(1, workers)) for name, func, workers in stages]
+        self.queue_size = max(1, queue_size)
+        self.ordered = ordered or {}
+
+    def run(self, jobs: List[Dict]) -> List[str]:
+        """Process jobs; returns a status per job, in input order.
+
+        Status: 'done' (passed every stage), 'skipped' (dropped by a stage)
+        or 'failed' (a stage raised).
+        """
+        statuses = ['skipped'] * len(jobs)
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        inboxes = [self._make_inbox(stage_index, q) for stage_index, q in enumerate(queues)]
+        lock = threading.Lock()
+        remaining = [workers for _, _, workers in self.stages]
+        threads = []
+
+        def worker(stage_index: int) -> None:
+            name, func, _ = self.stages[stage_index]
+            inbox = queues[stage_index]
+            outbox = inboxes[stage_index + 1] if stage_index + 1 < len(queues) else None
+            while True:
+                item = inbox.get()
+                if item is self._STOP:
+                    break
+                index, job, turn = item
+                if job is not None:
+                    if turn is not None:
+                        turn[0].wait()  # the previous job with the same key has finished this stage
+                    try:
+                        job = func(job)
+                    except Exception as e:
+                        logger.error(f"❌ [{name}] Error processing '{job.get('name', index)}': {e}")
+                        statuses[index] = 'failed'
+                        job = None
+                    finally:
+                        if turn is not None:
+                            turn[1].set()
+                    if job is not None and outbox is None:
+                        statuses[index] = 'done'
+                if outbox is not None:
+                    outbox(index, job)  # None travels on as a tombstone
+
+            # The last worker of a stage tells every worker of the next stage to stop
+            with lock:
+                remaining[stage_index] -= 1
+                last = remaining[stage_index] == 0
+            if last and stage_index + 1 < len(queues):
+                for _ in range(self.stages[stage_index + 1][2]):
+                    queues[stage_index + 1].put(self._STOP)
+
+        for stage_index, (name, _, workers) in enumerate(self.stages):
+            for n in range(workers):
+                thread = threading.Thread(target=worker, args=(stage_index,), name=f"{name}-{n}", daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        for index, job in enumerate(jobs):
+            inboxes[0](index, job)  # blocks while the first stage is saturated
+        for _ in range(self.stages[0][2]):
+            queues[0].put(self._STOP)
+
+        for thread in threads:
+            thread.join()
+        return statuses
+
+    def _make_inbox(self, stage_index: int, target: queue.Queue) -> Callable[[int, Optional[Dict]], None]:
+        """Return put(index, job) for a stage, resequencing jobs if the stage is ordered."""
+        name = self.stages[stage_index][0]
+        if name not in self.ordered:
+            return lambda index, job: target.put((index, job, None))
+
+        key_func = self.ordered[name]
+        released = threading.Condition()
+        pending: Dict[int, Optional[Dict]] = {}
+        next_index = [0]
+        last_done: Dict[str, threading.Event] = {}
+
+        def put(index: int, job: Optional[Dict]) -> None:
+            with released:
+                pending[index] = job
+                while next_index[0] in pending:
+                    ready_index = next_index[0]
+                    ready = pending.pop(ready_index)
+                    next_index[0] += 1
+                    turn = None
+                    if ready is not None and key_func is not None:
+                        key = key_func(ready)
+                        done = threading.Event()
+                        previous = last_done.get(key)
+                        if previous is None:
+                            previous = threading.Event()
+                            previous.set()
+                        last_done[key] = done
+                        turn = (previous, done)
+                    target.put((ready_index, ready, turn))
+                released.notify_all()
+                # Keep the out-of-order buffer bounded too: early finishers wait
+                # until the job they are queued behind has been released
+                while index in pending and len(pending) > self.queue_size:
+                    released.wait()
+        return put
+
+
+class DailyAggregateStore:
+    """Persistent (chatroom, day) activity cube for fast range reports.
+
+    Every analyzed chat is folded into one cell per calendar day:
+
+    - messages / chars: message count and total stripped content length
+    - hours: 24 hourly message counts
+    - senders: messages per sender
+    - types: messages per MessageType label
+    - keywords: the day's top keyword candidates with their counts
+
+    Weekly, monthly and cross-group statistics are then summed from the cells
+    (`rollup`) without querying or parsing any messages again. Re-analyzing a
+    day replaces its cell, so reruns never double count. Keywords are capped
+    at KEYWORDS_PER_DAY per cell, which makes range keyword totals a lower
+    bound for long-tail words; every other field is exact.
+
+    Stored as a single JSON file: {"chats": {chat_id: {"name": ..., "days":
+    {"YYYY-MM-DD": cell}}}}, written to a temp file and swapped in.
+    """
+
+    KEYWORDS_PER_DAY = 50
+
+    def __init__(self, path: str = "chatlog_aggregates.json"):
+        self.path = Path(path)
+        self.chats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path.exists():
+            try:
+                self.chats = json.loads(self.path.read_text(encoding='utf-8')).get('chats', {})
+            except (ValueError, OSError) as e:
+                logger.warning(f"⚠️ Could not load aggregates from {self.path}: {e}")
+
+    def record(self, chat_id: str, chat_name: str, messages: List[Dict]) -> int:
+        """Fold normalized messages into per-day cells; returns the number of days updated.
+
+        Messages without a parseable timestamp are left out.
+        """
+        by_day = defaultdict(list)
+        for msg in messages:
+            if msg['epoch'] is not None:
+                by_day[datetime.fromtimestamp(msg['epoch']).strftime("%Y-%m-%d")].append(msg)
+
+        cells = {day: self._cell(day_messages) for day, day_messages in by_day.items()}
+        with self._lock:
+            chat = self.chats.setdefault(chat_id, {'name': chat_name, 'days': {}})
+            chat['name'] = chat_name
+            chat['days'].update(cells)
+            self._dirty = self._dirty or bool(cells)
+        return len(cells)
+
+    @classmethod
+    def _cell(cls, messages: List[Dict]) -> Dict:
+        hours = [0] * 24
+        for msg in messages:
+            hours[datetime.fromtimestamp(msg['epoch']).hour] += 1
+
+        sketch = TopicAnalyzer._keyword_sketch(MessageType.text_only(messages))
+        keywords = Counter({word: n for word, n in sketch.items() if n >= 2})
+        return {
+            'messages': len(messages),
+            'chars': sum(msg['length'] for msg in messages),
+            'hours': hours,
+            'senders': dict(Counter(msg.get('sender', 'Unknown') for msg in messages)),
+            'types': MessageType.counts(MessageType.column(messages)),
+            'keywords': dict(keywords.most_common(cls.KEYWORDS_PER_DAY)),
+        }
+
+    def save(self) -> None:
+        """Write the cube back if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            tmp_path.write_text(json.dumps({'chats': self.chats}, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+    def rollup(self, start: str, end: str, chat_ids: Optional[List[str]] = None, top_n: int = 10) -> Dict:
+        """Sum the cells of [start, end] (YYYY-MM-DD, inclusive) across chats.
+
+        Args:
+            start, end: Date range
+            chat_ids: Chats to include (default: every chat in the cube)
+            top_n: Number of senders/keywords to return
+
+        Returns:
+            Dict with totals, hourly counts, top senders/keywords and per-chat totals
+        """
+        hours = [0] * 24
+        senders, types, keywords = Counter(), Counter(), Counter()
+        per_chat = {}
+        days = set()
+        messages = chars = 0
+
+        with self._lock:
+            selected = [(chat_id, self.chats[chat_id]) for chat_id in (chat_ids or list(self.chats))
+                        if chat_id in self.chats]
+            for chat_id, chat in selected:
+                chat_messages = 0
+                for day, cell in chat['days'].items():
+                    if not start <= day <= end:
+                        continue
+                    days.add(day)
+                    chat_messages += cell['messages']
+                    chars += cell['chars']
+                    for hour, n in enumerate(cell['hours']):
+                        hours[hour] += n
+                    senders.update(cell['senders'])
+                    types.update(cell['types'])
+                    keywords.update(cell['keywords'])
+                if chat_messages:
+                    per_chat[chat_id] = {'name': chat['name'], 'messages': chat_messages}
+                    messages += chat_messages
+
+        return {
+            'start': start,
+            'end': end,
+            'days': len(days),
+            'messages': messages,
+            'chars': chars,
+            'participants': len(senders),
+            'hours': hours,
+            'types': dict(types),
+            'top_senders': senders.most_common(top_n),
+            'top_keywords': keywords.most_common(top_n),
+            'chats': per_chat,
+        }
+
+    def report(self, date_str: str) -> Dict:
+        """Log range statistics for a checklist-style date, e.g. "最近7天", "本月"
+        or "2025-12-01~2025-12-07"."""
+        bounds = ChecklistParser()._normalize_date(date_str).split(',')
+        stats = self.rollup(bounds[0], bounds[-1])
+        
+        logger.info(f"📈 {stats['start']} ~ {stats['end']}: {stats['messages']} messages, "
+                    f"{stats['participants']} participants, {len(stats['chats'])} chat(s), {stats['days']} day(s)")
+        for chat in sorted(stats['chats'].values(), key=lambda c: c['messages'], reverse=True):
+            logger.info(f"   {chat['name']}: {chat['messages']}")
+        if stats['top_keywords']:
+            logger.info("🔑 " + ", ".join(f"{word}({n})" for word, n in stats['top_keywords']))
+        return stats
+
+
+class SessionCarryover:
+    """Open-session state handed from one analyzed day to the next.
+
+    Reports are produced per day, so a discussion running from 23:40 to 00:30
+    would otherwise be cut at midnight and each half scored on its own. After
+    a chat's day is analyzed, its last session (the one still open when the
+    day ended) is stored here as compact message records; the next day's
+    analysis resumes from it and the segmenter decides, as in one long run,
+    whether today's first messages continue it. Nothing else from the
+    previous day is re-fetched or re-analyzed.
+
+    Stored as {chat_id: {"YYYY-MM-DD": [message, ...]}} in a single JSON file
+    (written to a temp file and swapped in), keeping the last DAYS_KEPT days
+    per chat so that re-running a day still finds its predecessor.
+    """
+
+    DAYS_KEPT = 3
+    FIELDS = ('timestamp', 'sender', 'content', 'msg_type')
+
+    def __init__(self, path: str = "chatlog_carryover.json"):
+        self.path = Path(path)
+        self.chats: Dict[str, Dict[str, List[Dict]]] = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        if self.path.exists():
+            try:
+                self.chats = json.loads(self.path.read_text(encoding='utf-8'))
+            except (ValueError, OSError) as e:
+                logger.warning(f"⚠️ Could not load session carryover from {self.path}: {e}")
+
+    def load(self, chat_id: str, date: str) -> List[Dict]:
+        """Open session left by the day before `date` (a date or 'start,end' range)."""
+        first_day = datetime.strptime(date.split(',')[0], "%Y-%m-%d")
+        previous = (first_day - timedelta(days=1)).strftime("%Y-%m-%d")
+        with self._lock:
+            return [dict(msg) for msg in self.chats.get(chat_id, {}).get(previous, [])]
+
+    def record(self, chat_id: str, date: str, session: List[Dict]) -> None:
+        """Store the session still open at the end of `date` (last day of a range)."""
+        last_day = date.split(',')[-1]
+        compact = [{field: msg[field] for field in self.FIELDS if field in msg} for msg in session]
+        with self._lock:
+            days = self.chats.setdefault(chat_id, {})
+            days[last_day] = compact
+            for day in sorted(days)[:-self.DAYS_KEPT]:
+                del days[day]
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the state back if anything changed."""
+        with self._lock:
+            if not self._dirty:
+                return
+            tmp_path = self.path.with_name(self.path.name + '.tmp')
+            tmp_path.write_text(json.dumps(self.chats, ensure_ascii=False), encoding='utf-8')
+            tmp_path.replace(self.path)
+            self._dirty = False
+
+
 class BatchChatlogAnalyzer:
     """Main orchestrator for batch chatlog analysis."""
-    
-    def __init__(self, checklist_path: str = "群聊清单.md"):
+
+    def __init__(self, checklist_path: str = "群聊清单.md", fetch_workers: int = 4,
+                 analyze_workers: int = 1, render_workers: int = 1, queue_size: int = 2,
+                 aggregates_path: str = "chatlog_aggregates.json",
+                 carryover_path: str = "chatlog_carryover.json"):
         self.checklist_path = checklist_path
         self.parser = ChecklistParser(checklist_path)
         self.mcp_client = MCPClient()
+        self.planner = ChecklistPlanner(self.mcp_client)
         self.html_generator = HTMLGenerator()
+        self.aggregates = DailyAggregateStore(aggregates_path)
+        self.carryover = SessionCarryover(carryover_path)
+        self.fetch_workers = fetch_workers
+        self.analyze_workers = analyze_workers
+        self.render_workers = render_workers
+        self.queue_size = queue_size
     
     def run(self) -> None:
         """Execute the complete batch analysis workflow."""
@@ -1090,7 +2298,7 @@ class BatchChatlogAnalyzer:
             self.parser.create_template()
             return
         
-        chats = self.parser.parse()
+        chats = self.planner.plan(self.parser.parse())
         if not chats:
             logger.error("❌ No chats found in checklist")
             return
@@ -1101,21 +2309,22 @@ class BatchChatlogAnalyzer:
         output_dir.mkdir(exist_ok=True)
         logger.info(f"📁 Output directory: {output_dir}")
         
-        # Phase 2-4: Process each chat
-        success_count = 0
-        skip_count = 0
-        
-        for chat in chats:
-            try:
-                result = self._process_chat(chat, output_dir)
-                if result:
-                    success_count += 1
-                else:
-                    skip_count += 1
-            except Exception as e:
-                logger.error(f"❌ Error processing '{chat['name']}': {e}")
-                skip_count += 1
-                continue  # Log & Continue strategy
+        # Phase 2-4: Fetch, analyze and render as an overlapped pipeline
+        # Analysis threads each chat's open session into its next day, so days are
+        # analyzed oldest first and one at a time per chat, whatever order the
+        # concurrent fetches complete in
+        pipeline = ChatPipeline([
+            ('fetch', self._fetch, self.fetch_workers),
+            ('analyze', self._analyze, self.analyze_workers),
+            ('render', self._render, self.render_workers),
+        ], queue_size=self.queue_size, ordered={'analyze': self._chat_key})
+        jobs = sorted((dict(chat, output_dir=output_dir) for chat in chats),
+                      key=lambda job: job['date'].split(',')[0])
+        statuses = pipeline.run(jobs)
+        self.aggregates.save()
+        self.carryover.save()
+        success_count = statuses.count('done')
+        skip_count = len(statuses) - success_count
         
         # Phase 5: Summary
         logger.info("=" * 60)
@@ -1124,61 +2333,107 @@ class BatchChatlogAnalyzer:
             logger.info(f"⚠️ Skipped {skip_count} chat(s) (see logs above)")
         logger.info("🎉 Batch analysis complete!")
     
-    def _process_chat(self, chat: Dict, output_dir: Path) -> bool:
-        """
-        Process a single chat.
-        
-        Returns:
-            True if successful, False if skipped
-        """
-        chat_name = chat['name']
-        date = chat['date']
+    @staticmethod
+    def _chat_key(job: Dict) -> str:
+        """Identity under which a chat's carried session is stored."""
+        return job.get('chat_id') or job['name']
+
+    def _fetch(self, job: Dict) -> Optional[Dict]:
+        """Pipeline stage 1: query messages (network bound)."""
+        chat_name = job['name']
+        date = job['date']
         
-        logger.info(f"\\n📊 Processing: {chat_name} ({date})")
+        logger.info(f"📊 Processing: {chat_name} ({date})")
         
         # Query messages
-        messages = self.mcp_client.query_messages(chat_name, date)
+        messages = self.mcp_client.query_messages(job.get('chat_id') or chat_name, date)
         if not messages:
             logger.warning(f"⚠️ No messages found for '{chat_name}' on {date}, skipping...")
-            return False
+            return None
         
-        # Analyze topics
-        analyzer = TopicAnalyzer(messages)
+        job['messages'] = messages
+        return job
+    
+    def _analyze(self, job: Dict) -> Optional[Dict]:
+        """Pipeline stage 2: extract topics (CPU bound)."""
+        messages = job.pop('messages')
+        
+        # Analyze topics, resuming the session left open at the end of the previous day
+        chat_id = self._chat_key(job)
+        analyzer = TopicAnalyzer(messages, carried=self.carryover.load(chat_id, job['date']),
+                                 segmentation=job.get('segmentation', ''))
+        self.aggregates.record(chat_id, job['name'], analyzer.messages)
         topics = analyzer.analyze()
+        self.carryover.record(chat_id, job['date'], analyzer.open_session)
         
         if not topics:
-            logger.warning(f"⚠️ No topics extracted for '{chat_name}', skipping...")
-            return False
+            logger.warning(f"⚠️ No topics extracted for '{job['name']}', skipping...")
+            return None
         
-        # Calculate stats
-        message_count = len(messages)
-        participants = set(msg.get('sender', 'Unknown') for msg in messages)
-        participant_count = len(participants)
+        # Calculate stats (raw messages are released after this stage)
+        job['topics'] = topics
+        job['message_count'] = len(messages)
+        job['participant_count'] = len(set(msg.get('sender', 'Unknown') for msg in messages))
+        job['type_counts'] = analyzer.type_counts
+        return job
+    
+    def _render(self, job: Dict) -> Dict:
+        """Pipeline stage 3: generate and save the HTML report."""
+        chat_name = job['name']
+        date = job['date']
         
         # Generate HTML
         html = self.html_generator.generate(
             chat_name=chat_name,
             date=date,
-            topics=topics,
-            message_count=message_count,
-            participant_count=participant_count
+            topics=job['topics'],
+            message_count=job['message_count'],
+            participant_count=job['participant_count'],
+            type_counts=job['type_counts']
         )
         
         # Save report
         output_filename = f"{chat_name}_{date.replace('-', '')}.html"
-        output_path = output_dir / output_filename
+        output_path = job['output_dir'] / output_filename
         self.html_generator.save(html, output_path)
         
-        return True
+        return job
 
 
 def main():
     """Main entry point."""
+    import argparse
+    
     # Parse command line arguments
-    checklist_path = sys.argv[1] if len(sys.argv) > 1 else "群聊清单.md"
+    parser = argparse.ArgumentParser(description="Batch chatlog analyzer")
+    parser.add_argument('checklist', nargs='?', default="群聊清单.md", help="Checklist file (default: 群聊清单.md)")
+    parser.add_argument('--fetch-workers', type=int, default=4, help="Concurrent Chatlog queries (default: 4)")
+    parser.add_argument('--analyze-workers', type=int, default=1, help="Analysis threads (default: 1)")
+    parser.add_argument('--render-workers', type=int, default=1, help="Report writer threads (default: 1)")
+    parser.add_argument('--queue-size', type=int, default=2, help="Jobs buffered between stages (default: 2)")
+    parser.add_argument('--aggregates', default="chatlog_aggregates.json",
+                        help="Daily aggregate file (default: chatlog_aggregates.json)")
+    parser.add_argument('--carryover', default="chatlog_carryover.json",
+                        help="Sessions carried across midnight (default: chatlog_carryover.json)")
+    parser.add_argument('--rollup', metavar='DATE',
+                        help="Print range statistics from stored aggregates instead of analyzing, e.g. 最近7天")
+    args = parser.parse_args()
+    
+    # Range statistics come straight from the aggregate cube
+    if args.rollup:
+        DailyAggregateStore(args.aggregates).report(args.rollup)
+        return
     
     # Run analyzer
-    analyzer = BatchChatlogAnalyzer(checklist_path)
+    analyzer = BatchChatlogAnalyzer(
+        args.checklist,
+        fetch_workers=args.fetch_workers,
+        analyze_workers=args.analyze_workers,
+        render_workers=args.render_workers,
+        queue_size=args.queue_size,
+        aggregates_path=args.aggregates,
+        carryover_path=args.carryover
+    )
     analyzer.run()
 
 
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Segmenter benchmark
+===================
+Times SessionSegmenter (fixed 30-minute gaps) against BurstSegmenter on
+synthetic bursty timelines of increasing size, and prints how many sessions
+each produces.
+
+Usage:
+    python benchmark_segmenters.py
+    python benchmark_segmenters.py --sizes 1000 100000 --repeat 7
+"""
+
+import argparse
+import random
+import time
+from array import array
+
+from batch_chatlog_analyzer import BurstSegmenter, SessionSegmenter, TopicAnalyzer, np
+
+
+def synthetic_epochs(n: int, seed: int = 0) -> array:
+    """Bursts of 20-200 messages a few seconds apart, separated by 5 min - 3 h of silence."""
+    rng = random.Random(seed)
+    epochs = array('q')
+    t = 1765000000
+    while len(epochs) < n:
+        t += rng.randint(5 * 60, 3 * 3600)
+        pace = rng.choice((5, 15, 60))
+        for _ in range(min(rng.randint(20, 200), n - len(epochs))):
+            t += int(rng.expovariate(1 / pace))
+            epochs.append(t)
+    # Arrival order is not guaranteed to be time order
+    for i in range(0, n - 1, 50):
+        epochs[i], epochs[i + 1] = epochs[i + 1], epochs[i]
+    return epochs
+
+
+def best_time(segmenter, epochs, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _, ranges = segmenter.segment(epochs)
+        best = min(best, time.perf_counter() - started)
+    return best, len(ranges)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark session segmenters")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    fixed = SessionSegmenter(TopicAnalyzer.TIME_WINDOW_MINUTES)
+    burst = BurstSegmenter()
+
+    print(f"numpy: {'yes' if np is not None else 'no'}")
+    print(f"{'messages':>10} {'fixed ms':>10} {'burst ms':>10} {'ratio':>6} {'fixed n':>8} {'burst n':>8}")
+    for size in args.sizes:
+        epochs = synthetic_epochs(size)
+        fixed_time, fixed_sessions = best_time(fixed, epochs, args.repeat)
+        burst_time, burst_sessions = best_time(burst, epochs, args.repeat)
+        print(f"{size:>10} {fixed_time * 1000:>10.2f} {burst_time * 1000:>10.2f} "
+              f"{burst_time / fixed_time:>6.2f} {fixed_sessions:>8} {burst_sessions:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+实时热点监控 - 持续跟踪 Chatlog 新消息，发现正在升温的词和讨论
+
+每隔几秒向 /api/v1/chatlog 拉取关注群聊的新消息，词、发言人和群聊各维护
+两组指数衰减计数：短窗口（默认半衰期 10 分钟）反映当前速率，长窗口
+（默认 24 小时）作为基线。短窗口速率远高于基线的词和会话被标记为热点，
+结果持续写入一个小的 JSON + HTML 状态文件。启动时先读入最近几天
+（--history-days，默认 2）的历史消息作为基线，之后每次只按偏移量拉取新消息。
+
+衰减是惰性的：计数统一以某个参考时刻为基准放大保存，读取时才乘回衰减
+因子，所以每条消息只做常数次字典更新；放大倍数过大时才整体换一次基准
+并清理接近 0 的计数（均摊 O(1)）。
+
+用法:
+    python trending_monitor.py 技术讨论组 产品团队
+    python trending_monitor.py 技术讨论组 --interval 15 --status trending
+    python trending_monitor.py 技术讨论组 --once    # 拉取一次，写出状态后退出
+"""
+
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Hashable, Iterable, List, Optional, Tuple
+
+BASE_URL = 'http://127.0.0.1:5030'
+
+STOP_WORDS = frozenset({
+    '的', '了', '是', '在', '我', '有', '和', '就', '不', '人', '都', '一个',
+    '没有', '自己', '什么', '怎么', '可以', '这个', '那个', '如果', '因为', '所以',
+    '但是', '而且', '或者', '还是', '这样', '那样', '这么', '那么', '怎么样',
+    '哈哈', '哈哈哈', '好的', '谢谢', '收到', '大家', '我们', '你们', '他们',
+})
+ENGLISH_STOP_WORDS = frozenset({'the', 'and', 'for', 'are', 'but', 'not', 'you', 'all', 'http', 'https', 'www'})
+
+_CHINESE_WORD = re.compile(r'[\u4e00-\u9fff]{2,6}')
+_ENGLISH_WORD = re.compile(r'[a-zA-Z]{3,}')
+_BRACKET = re.compile(r'\[.*?\]|@\S+')
+
+
+def extract_terms(content: str) -> set:
+    """消息中的候选词（每条消息每个词只算一次）"""
+    text = _BRACKET.sub(' ', content)
+    terms = {word for word in _CHINESE_WORD.findall(text) if word not in STOP_WORDS}
+    terms.update(word.lower() for word in _ENGLISH_WORD.findall(text)
+                 if word.lower() not in ENGLISH_STOP_WORDS)
+    return terms
+
+
+class DecayedCounter:
+    """指数衰减计数器（惰性衰减）
+
+    一次计数在 dt 秒后的权重为 2^(-dt / half_life)。内部保存的是相对
+    参考时刻 origin 放大后的值 count * e^(λ(t - origin))，读取时乘以
+    e^(-λ(now - origin))；放大指数超过 REBASE_EXPONENT 时把参考时刻移到
+    当前时间，顺便删掉已经衰减到 PRUNE_BELOW 以下的键。
+
+    稳态下计数值 ≈ 速率 × half_life / ln2，rate() 据此换算成每小时速率。
+    """
+
+    REBASE_EXPONENT = 16.0
+    PRUNE_BELOW = 0.01
+
+    def __init__(self, half_life_seconds: float):
+        self.half_life = half_life_seconds
+        self.decay = math.log(2) / half_life_seconds
+        self.origin: Optional[float] = None
+        self.values: Dict[Hashable, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def add(self, key: Hashable, t: float, amount: float = 1.0) -> None:
+        """在时刻 t（epoch 秒）给 key 计数"""
+        if self.origin is None:
+            self.origin = t
+        exponent = self.decay * (t - self.origin)
+        if exponent > self.REBASE_EXPONENT:
+            self._rebase(t)
+            exponent = 0.0
+        self.values[key] = self.values.get(key, 0.0) + amount * math.exp(exponent)
+
+    def get(self, key: Hashable, now: float) -> float:
+        """key 在 now 时刻的衰减计数"""
+        value = self.values.get(key)
+        if value is None:
+            return 0.0
+        return value * self._factor(now)
+
+    def rate(self, key: Hashable, now: float) -> float:
+        """key 在 now 时刻的估计速率（次/小时）"""
+        return self.get(key, now) * self.decay * 3600
+
+    def items(self, now: float) -> Iterable[Tuple[Hashable, float]]:
+        """全部 (key, 衰减计数)"""
+        factor = self._factor(now)
+        return ((key, value * factor) for key, value in self.values.items())
+
+    def _factor(self, now: float) -> float:
+        if self.origin is None:
+            return 0.0
+        return math.exp(-self.decay * (now - self.origin))
+
+    def _rebase(self, t: float) -> None:
+        factor = self._factor(t)
+        self.values = {
+            key: value * factor
+            for key, value in self.values.items()
+            if value * factor >= self.PRUNE_BELOW
+        }
+        self.origin = t
+
+
+class TrendDetector:
+    """词 / 发言人 / 会话的突增检测
+
+    - 词：短窗口速率 ≥ ratio × 基线速率，且短窗口计数 ≥ min_count
+    - 会话：按群聊以 session_gap 分钟的静默切分；当前会话所在群聊的
+      消息速率同样与基线比较，超过阈值即为热门讨论
+    - 基线速率至少取 baseline_floor（次/小时），新词不会因为基线为 0
+      而被无限放大
+
+    每条消息的开销与其中的词数成正比，与历史长度无关。
+    速率和会话是否结束都按查询时刻（默认当前时间）计算，而不是最新消息的
+    时间：群聊安静下来以后，热词会逐渐衰减、会话会按静默时长结束。
+    """
+
+    def __init__(self, short_minutes: float = 10, baseline_hours: float = 24,
+                 ratio: float = 3.0, min_count: int = 5, session_gap_minutes: float = 30,
+                 baseline_floor: float = 0.5):
+        self.ratio = ratio
+        self.min_count = min_count
+        self.session_gap = session_gap_minutes * 60
+        self.baseline_floor = baseline_floor
+
+        short = short_minutes * 60
+        baseline = baseline_hours * 3600
+        self.terms_short = DecayedCounter(short)
+        self.terms_baseline = DecayedCounter(baseline)
+        self.term_chats = DecayedCounter(short)
+        self.senders_short = DecayedCounter(short)
+        self.chats_short = DecayedCounter(short)
+        self.chats_baseline = DecayedCounter(baseline)
+
+        self.sessions: Dict[str, Dict] = {}
+        self.names: Dict[str, str] = {}
+        self.latest = 0.0
+        self.message_count = 0
+
+    def add(self, chat_id: str, epoch: float, sender: str, content: str, text: bool = True) -> None:
+        """
+        处理一条消息（按时间顺序输入）
+
+        Args:
+            chat_id: 群聊ID
+            epoch: 消息时间（epoch 秒）
+            sender: 发言人
+            content: 消息内容
+            text: 是否为文字消息（非文字消息只计入速率，不提取词）
+        """
+        self.latest = max(self.latest, epoch)
+        self.message_count += 1
+
+        self.chats_short.add(chat_id, epoch)
+        self.chats_baseline.add(chat_id, epoch)
+        self.senders_short.add((chat_id, sender), epoch)
+
+        session = self.sessions.get(chat_id)
+        if session is None or epoch - session['last'] > self.session_gap:
+            session = {'start': epoch, 'last': epoch, 'messages': 0, 'senders': set()}
+            self.sessions[chat_id] = session
+        session['last'] = max(session['last'], epoch)
+        session['messages'] += 1
+        session['senders'].add(sender)
+
+        if not text:
+            return
+        for term in extract_terms(content):
+            self.terms_short.add(term, epoch)
+            self.terms_baseline.add(term, epoch)
+            self.term_chats.add((term, chat_id), epoch)
+
+    def _lift(self, short: DecayedCounter, baseline: DecayedCounter, key: Hashable, now: float) -> float:
+        base_rate = max(baseline.rate(key, now), self.baseline_floor)
+        return short.rate(key, now) / base_rate
+
+    def _query_time(self, now: Optional[float]) -> float:
+        """查询时刻：默认当前时间，且不早于最新消息（服务器时钟略快时不至于反向衰减）"""
+        return max(time.time() if now is None else now, self.latest)
+
+    def trending_terms(self, top_n: int = 10, now: float = None) -> List[Dict]:
+        """now 时刻（默认当前时间）的热词，按突增倍数排序"""
+        now = self._query_time(now)
+        chats_by_term: Dict[str, Counter] = {}
+        for (term, chat_id), count in self.term_chats.items(now):
+            chats_by_term.setdefault(term, Counter())[chat_id] = count
+
+        trending = []
+        for term, count in self.terms_short.items(now):
+            if count < self.min_count:
+                continue
+            lift = self._lift(self.terms_short, self.terms_baseline, term, now)
+            if lift < self.ratio:
+                continue
+            chats = chats_by_term.get(term, Counter())
+            trending.append({
+                'term': term,
+                'count': round(count, 1),
+                'rate_per_hour': round(self.terms_short.rate(term, now), 1),
+                'baseline_per_hour': round(self.terms_baseline.rate(term, now), 2),
+                'lift': round(lift, 1),
+                'chats': [self.names.get(chat_id, chat_id) for chat_id, _ in chats.most_common(3)],
+            })
+        trending.sort(key=lambda item: item['lift'], reverse=True)
+        return trending[:top_n]
+
+    def hot_sessions(self, now: float = None) -> List[Dict]:
+        """now 时刻（默认当前时间）仍在进行、且群聊速率明显高于基线的会话"""
+        now = self._query_time(now)
+        hot = []
+        for chat_id, session in self.sessions.items():
+            if now - session['last'] > self.session_gap or session['messages'] < self.min_count:
+                continue
+            lift = self._lift(self.chats_short, self.chats_baseline, chat_id, now)
+            if lift < self.ratio:
+                continue
+            senders = Counter({sender: count for (chat, sender), count in self.senders_short.items(now)
+                               if chat == chat_id})
+            terms = Counter({term: count for (term, chat), count in self.term_chats.items(now)
+                             if chat == chat_id})
+            hot.append({
+                'chat_id': chat_id,
+                'chat': self.names.get(chat_id, chat_id),
+                'start': datetime.fromtimestamp(session['start']).strftime('%Y-%m-%d %H:%M'),
+                'last': datetime.fromtimestamp(session['last']).strftime('%H:%M'),
+                'messages': session['messages'],
+                'participants': len(session['senders']),
+                'rate_per_hour': round(self.chats_short.rate(chat_id, now), 1),
+                'lift': round(lift, 1),
+                'keywords': [term for term, _ in terms.most_common(5)],
+                'active_senders': [sender for sender, _ in senders.most_common(3)],
+            })
+        hot.sort(key=lambda item: item['lift'], reverse=True)
+        return hot
+
+    def snapshot(self, top_n: int = 10, now: float = None) -> Dict:
+        """now 时刻（默认当前时间，即本次轮询时刻）的状态（写入状态文件的内容）"""
+        now = self._query_time(now)
+        return {
+            'updated': datetime.fromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S'),
+            'latest_message': datetime.fromtimestamp(self.latest).strftime('%Y-%m-%d %H:%M:%S') if self.latest else None,
+            'messages_seen': self.message_count,
+            'trending_terms': self.trending_terms(top_n, now),
+            'hot_sessions': self.hot_sessions(now),
+        }
+
+
+def parse_epoch(value) -> Optional[float]:
+    """Chatlog 时间字段 -> epoch 秒"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00')).timestamp()
+    except ValueError:
+        return None
+
+
+class ChatlogTail:
+    """轮询 Chatlog，逐个群聊返回上次之后的新消息
+
+    每个群聊记住读到了哪一天、这一天已经读了多少条，下次按 limit/offset
+    从这个位置往后分页拉取，已处理的消息不会重复下载；这一天读完且已经
+    过了零点，就换到下一天从 0 开始（跨零点也不会漏）。
+
+    首次拉取从 history_days 天前开始，先用这几天的历史消息给基线计数
+    预热；否则冷启动时基线只有下限值，出现几次的词就会被当成热词。
+    """
+
+    PAGE_SIZE = 500
+
+    def __init__(self, chat_ids: List[str], base_url: str = BASE_URL, timeout: int = 10,
+                 history_days: int = 2):
+        self.chat_ids = chat_ids
+        self.base_url = base_url
+        self.timeout = timeout
+        self.history_days = history_days
+        self.cursors: Dict[str, Tuple[str, int]] = {}
+
+    def poll(self) -> List[Tuple[str, Dict]]:
+        """拉取全部关注群聊的新消息，按时间排序返回 (chat_id, message)"""
+        fresh = []
+        for chat_id in self.chat_ids:
+            try:
+                fresh.extend((chat_id, msg) for msg in self._poll_chat(chat_id))
+            except Exception as e:
+                print(f"[WARN] 拉取失败 {chat_id}: {e}")
+        fresh.sort(key=lambda item: item[1]['epoch'])
+        return fresh
+
+    def _poll_chat(self, chat_id: str) -> List[Dict]:
+        today = datetime.now().strftime('%Y-%m-%d')
+        first_day = (datetime.now() - timedelta(days=self.history_days)).strftime('%Y-%m-%d')
+        day, offset = self.cursors.get(chat_id, (first_day, 0))
+
+        fresh = []
+        while True:
+            page = self._fetch_page(chat_id, day, offset)
+            offset += len(page)
+            for raw in page:
+                msg = self._parse(raw)
+                if msg:
+                    fresh.append(msg)
+            if len(page) >= self.PAGE_SIZE:
+                continue
+            if day >= today:
+                break
+            day = (datetime.strptime(day, '%Y-%m-%d') + timedelta(days=1)).strftime('%Y-%m-%d')
+            offset = 0
+
+        # 出错时直接抛出、不更新游标，下次从原位置重新拉取
+        self.cursors[chat_id] = (day, offset)
+        return fresh
+
+    def _fetch_page(self, chat_id: str, day: str, offset: int) -> List[Dict]:
+        """某个群聊某一天从 offset 开始的一页原始消息"""
+        import requests
+
+        response = requests.get(
+            f'{self.base_url}/api/v1/chatlog',
+            params={'time': day, 'talker': chat_id, 'format': 'json',
+                    'limit': self.PAGE_SIZE, 'offset': offset},
+            timeout=self.timeout
+        )
+        if response.status_code != 200:
+            raise RuntimeError(f"HTTP {response.status_code}")
+        data = response.json()
+        if isinstance(data, dict):
+            data = data.get('data') or data.get('messages') or data.get('items') or []
+        return data if isinstance(data, list) else []
+
+    @staticmethod
+    def _parse(raw: Dict) -> Optional[Dict]:
+        """原始消息 -> {'epoch', 'sender', 'content', 'text'}，没有时间的返回 None"""
+        epoch = parse_epoch(raw.get('time') or raw.get('timestamp'))
+        if epoch is None:
+            return None
+        content = raw.get('content') or ''
+        msg_type = raw.get('type')
+        return {
+            'epoch': epoch,
+            'sender': raw.get('senderName') or raw.get('sender') or 'Unknown',
+            'content': content if isinstance(content, str) else str(content),
+            'text': msg_type in (None, 1) or (msg_type == 49 and raw.get('subType') == 57),
+        }
+
+
+def write_status(snapshot: Dict, prefix: str = 'trending_status') -> None:
+    """写出 {prefix}.json 和 {prefix}.html（先写临时文件再替换）"""
+    _write_atomic(Path(prefix + '.json'), json.dumps(snapshot, ensure_ascii=False, indent=2))
+    _write_atomic(Path(prefix + '.html'), render_html(snapshot))
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    tmp_path = path.with_name(path.name + '.tmp')
+    tmp_path.write_text(text, encoding='utf-8')
+    os.replace(tmp_path, path)
+
+
+def render_html(snapshot: Dict, refresh_seconds: int = 30) -> str:
+    """状态页（自动刷新）"""
+    from html import escape
+
+    term_rows = ''.join(
+        f"<tr><td>{escape(item['term'])}</td><td>{item['lift']}×</td><td>{item['rate_per_hour']}</td>"
+        f"<td>{item['baseline_per_hour']}</td><td>{escape('、'.join(item['chats']))}</td></tr>"
+        for item in snapshot['trending_terms']
+    ) or '<tr><td colspan="5">暂无</td></tr>'
+    session_rows = ''.join(
+        f"<tr><td>{escape(item['chat'])}</td><td>{item['start']} - {item['last']}</td>"
+        f"<td>{item['messages']}</td><td>{item['participants']}</td><td>{item['lift']}×</td>"
+        f"<td>{escape(' / '.join(item['keywords']))}</td></tr>"
+        for item in snapshot['hot_sessions']
+    ) or '<tr><td colspan="6">暂无</td></tr>'
+
+    return f"""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+<meta charset="UTF-8">
+<meta http-equiv="refresh" content="{refresh_seconds}">
+<title>群聊实时热点</title>
+<style>
+body {{ font-family: -apple-system, "Microsoft YaHei", sans-serif; margin: 24px; color: #333; }}
+table {{ border-collapse: collapse; margin-bottom: 24px; min-width: 60%; }}
+th, td {{ border-bottom: 1px solid #eee; padding: 6px 12px; text-align: left; }}
+th {{ background: #f5f5fa; }}
+.meta {{ color: #888; font-size: 13px; }}
+</style>
+</head>
+<body>
+<h1>🔥 群聊实时热点</h1>
+<p class="meta">更新于 {snapshot['updated']} · 最新消息 {snapshot['latest_message'] or '-'} · 已处理 {snapshot['messages_seen']} 条</p>
+<h2>热词</h2>
+<table><tr><th>词</th><th>突增</th><th>速率(次/时)</th><th>基线(次/时)</th><th>群聊</th></tr>{term_rows}</table>
+<h2>热门讨论</h2>
+<table><tr><th>群聊</th><th>时间</th><th>消息</th><th>人数</th><th>突增</th><th>关键词</th></tr>{session_rows}</table>
+</body>
+</html>
+"""
+
+
+def resolve_chats(names: List[str], base_url: str = BASE_URL) -> Dict[str, str]:
+    """群聊名称 -> 群聊ID（目录不可用时按原样当作ID）"""
+    try:
+        from chatroom_directory import load_chatroom_directory
+        directory = load_chatroom_directory(base_url)
+    except Exception as e:
+        print(f"[WARN] 群聊目录不可用，名称按ID处理: {e}")
+        return {name: name for name in names}
+
+    resolved = {}
+    for name in names:
+        room_id = directory.resolve(name)
+        if room_id is None:
+            print(f"[WARN] 未找到群聊: {name}，按ID处理")
+            room_id = name
+        resolved[room_id] = name
+    return resolved
+
+
+def main():
+    import argparse
+    import sys
+
+    if sys.platform == 'win32':
+        import io
+        sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="群聊实时热点监控")
+    parser.add_argument('chats', nargs='+', help="关注的群聊名称或ID")
+    parser.add_argument('--interval', type=float, default=30, help="轮询间隔秒数 (默认 30)")
+    parser.add_argument('--status', default='trending_status', help="状态文件前缀 (默认 trending_status)")
+    parser.add_argument('--short-minutes', type=float, default=10, help="短窗口半衰期分钟 (默认 10)")
+    parser.add_argument('--baseline-hours', type=float, default=24, help="基线半衰期小时 (默认 24)")
+    parser.add_argument('--ratio', type=float, default=3.0, help="突增倍数阈值 (默认 3)")
+    parser.add_argument('--min-count', type=int, default=5, help="短窗口最少出现次数 (默认 5)")
+    parser.add_argument('--history-days', type=int, default=2, help="启动时先读入几天历史消息预热基线 (默认 2)")
+    parser.add_argument('--once', action='store_true', help="只拉取一次")
+    parser.add_argument('--base-url', default=BASE_URL, help="Chatlog 服务地址")
+    args = parser.parse_args()
+
+    chats = resolve_chats(args.chats, args.base_url)
+    detector = TrendDetector(args.short_minutes, args.baseline_hours, args.ratio, args.min_count)
+    detector.names.update(chats)
+    tail = ChatlogTail(list(chats), args.base_url, history_days=args.history_days)
+
+    print(f"[INFO] 监控 {len(chats)} 个群聊，每 {args.interval:g} 秒刷新 {args.status}.json / .html")
+    try:
+        while True:
+            for chat_id, msg in tail.poll():
+                detector.add(chat_id, msg['epoch'], msg['sender'], msg['content'], msg['text'])
+
+            snapshot = detector.snapshot()
+            write_status(snapshot, args.status)
+            terms = '、'.join(item['term'] for item in snapshot['trending_terms'][:5]) or '无'
+            print(f"[OK] {snapshot['updated']} 已处理 {snapshot['messages_seen']} 条，热词: {terms}，"
+                  f"热门讨论 {len(snapshot['hot_sessions'])} 个")
+
+            if args.once:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        print("[INFO] 已停止监控")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,14 @@ from .md_parser import MarkdownParser, GroupChatConfig
 from .chatlog_client import ChatlogMCPClient
 from .topic_analyzer import TopicAnalyzer
 from .html_generator import HTMLGenerator
+from .keyword_index import KeywordIndex
+from .segmenter import Segmenter
+from .phrase_miner import PhraseMiner, GroupLexicon
+from .matcher import KeywordMatcher
+from .parallel_analysis import ParallelAnalyzer
+from .interaction import InteractionMatrix
+from .simhash_index import SimHashIndex
+from .link_index import LinkIndex
 
 __all__ = [
     'BatchAnalyzer',
@@ -18,5 +26,14 @@ __all__ = [
     'GroupChatConfig',
     'ChatlogMCPClient',
     'TopicAnalyzer',
-    'HTMLGenerator'
+    'HTMLGenerator',
+    'KeywordIndex',
+    'Segmenter',
+    'PhraseMiner',
+    'GroupLexicon',
+    'KeywordMatcher',
+    'ParallelAnalyzer',
+    'InteractionMatrix',
+    'SimHashIndex',
+    'LinkIndex'
 ]
@@ -7,7 +7,7 @@ import argparse
 import sys
 import os
 from datetime import datetime
-from typing import List, Dict
+from typing import List, Dict, Optional
 import json
 
 # 导入自定义模块
@@ -15,21 +15,63 @@ from md_parser import MarkdownParser, GroupChatConfig
 from chatlog_client import ChatlogMCPClient
 from topic_analyzer import TopicAnalyzer
 from html_generator import HTMLGenerator
+from keyword_index import KeywordIndex
+from phrase_miner import PhraseMiner, GroupLexicon
+from segmenter import get_segmenter
+from parallel_analysis import ParallelAnalyzer, compact_messages
+from simhash_index import SimHashIndex
+from link_index import LinkIndex, link_href
 
 
 class BatchAnalyzer:
     """批量群聊分析器"""
 
-    def __init__(self, mcp_url: str = "http://127.0.0.1:5030"):
+    # 关键词语料库默认文件
+    KEYWORD_INDEX_FILE = 'keyword_index.bin'
+
+    # 群聊新词词库默认文件
+    LEXICON_FILE = 'group_lexicon.json'
+
+    # 转发内容指纹索引默认文件
+    FORWARD_INDEX_FILE = 'forward_index.json'
+
+    # 链接索引默认文件
+    LINK_INDEX_FILE = 'link_index.json'
+
+    # 汇总报告中热门链接的统计天数和数量
+    TOP_LINK_DAYS = 7
+    TOP_LINK_COUNT = 10
+
+    # 话题正文有这么大比例（按字数）是转发内容时，汇总报告把它并入跨群转发
+    FORWARDED_TOPIC_SHARE = 0.5
+
+    def __init__(
+        self,
+        mcp_url: str = "http://127.0.0.1:5030",
+        keyword_index_file: str = None,
+        workers: int = 1,
+        forward_index_file: str = None,
+        link_index_file: str = None
+    ):
         """
         初始化分析器
 
         Args:
             mcp_url: Chatlog MCP服务器URL
+            keyword_index_file: 关键词语料库文件路径 (默认: ./keyword_index.bin)
+            workers: 话题分析进程数，1 为单进程，0 为全部 CPU 核心
+            forward_index_file: 转发内容指纹索引文件路径 (默认: ./forward_index.json)
+            link_index_file: 链接索引文件路径 (默认: ./link_index.json)
         """
         self.mcp_client = ChatlogMCPClient(mcp_url)
-        self.topic_analyzer = TopicAnalyzer()
+        self.keyword_index = KeywordIndex.load(keyword_index_file or self.KEYWORD_INDEX_FILE)
+        self.topic_analyzer = TopicAnalyzer(self.keyword_index)
+        self.phrase_miner = PhraseMiner()
+        self.group_lexicon = GroupLexicon(self.LEXICON_FILE)
+        self.forward_index = SimHashIndex.load(forward_index_file or self.FORWARD_INDEX_FILE)
+        self.link_index = LinkIndex.load(link_index_file or self.LINK_INDEX_FILE)
         self.html_generator = HTMLGenerator()
+        self.workers = workers
 
     def run(
         self,
@@ -94,22 +136,26 @@ class BatchAnalyzer:
 
         # 4. 分析话题
         print("\n[ANALYZE] 步骤4: 分析话题...")
-        analysis_results = {}
-        for group_name, messages in chat_data.items():
-            print(f"  正在分析: {group_name}...")
+        group_dates = {g.name: self.mcp_client._normalize_date(g.date) for g in group_chats}
+        if self.workers == 1 or len(chat_data) <= 1:
+            analysis_results = self._analyze_sequential(chat_data, group_dates)
+        else:
+            analysis_results = self._analyze_parallel(chat_data, group_dates)
+
+        try:
+            self.group_lexicon.save()
+        except OSError as e:
+            print(f"  [WARN] 群聊新词词库保存失败: {str(e)}")
+
+        if self.keyword_index.dirty:
             try:
-                result = self.topic_analyzer.analyze_chat_data(messages)
-                analysis_results[group_name] = result
-                topic_count = len(result.get('topics', []))
-                print(f"    [OK] 找到 {topic_count} 个话题")
-            except Exception as e:
-                print(f"    [ERROR] 分析失败: {str(e)}")
-                analysis_results[group_name] = {
-                    'topics': [],
-                    'total_messages': len(messages),
-                    'total_participants': 0,
-                    'error': str(e)
-                }
+                self.keyword_index.save()
+                print(f"  [OK] 关键词语料库已更新: {self.keyword_index.doc_count} 个文档")
+            except OSError as e:
+                print(f"  [WARN] 关键词语料库保存失败: {str(e)}")
+
+        cross_posted = self._find_cross_posted(chat_data, group_dates)
+        top_links = self._update_link_index(chat_data, group_dates)
 
         # 5. 生成HTML报告
         print("\n[REPORT] 步骤5: 生成HTML报告...")
@@ -135,7 +181,9 @@ class BatchAnalyzer:
             summary_file = self._generate_summary_report(
                 group_chats,
                 analysis_results,
-                output_dir
+                output_dir,
+                cross_posted,
+                top_links
             )
             output_files['summary'] = summary_file
             print(f"  [OK] 汇总报告: {summary_file}")
@@ -150,6 +198,203 @@ class BatchAnalyzer:
 
         return output_files
 
+    def _analyze_sequential(self, chat_data: Dict[str, List[Dict]], group_dates: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        在当前进程中逐个分析群聊
+
+        与并行路径看到相同的语料库：每个群聊分析完就把它那一天从语料库撤回，
+        全部分析完再按清单顺序合并，结果与 workers 数无关。
+
+        Args:
+            chat_data: 群聊名称 -> 消息列表
+            group_dates: 群聊名称 -> 日期
+
+        Returns:
+            群聊名称 -> 分析结果
+        """
+        analysis_results = {}
+        documents = []
+        analyzer = self.topic_analyzer
+        for group_name, messages in chat_data.items():
+            print(f"  正在分析: {group_name}...")
+            doc_id = f"{group_name}|{group_dates.get(group_name, '')}"
+            try:
+                lexicon = self._update_group_lexicon(group_name, messages)
+                result = analyzer.analyze_chat_data(messages, doc_id, lexicon)
+                analysis_results[group_name] = result
+                if analyzer.last_document_terms:
+                    documents.append((doc_id, analyzer.last_document_terms))
+                topic_count = len(result.get('topics', []))
+                print(f"    [OK] 找到 {topic_count} 个话题")
+            except Exception as e:
+                print(f"    [ERROR] 分析失败: {str(e)}")
+                analysis_results[group_name] = self._error_result(messages, str(e))
+            finally:
+                if analyzer.last_document_terms:
+                    self.keyword_index.remove_document(doc_id, analyzer.last_document_terms)
+
+        for doc_id, terms in documents:
+            self.keyword_index.add_document(doc_id, terms)
+        return analysis_results
+
+    def _analyze_parallel(self, chat_data: Dict[str, List[Dict]], group_dates: Dict[str, str]) -> Dict[str, Dict]:
+        """
+        用进程池分析群聊，按清单顺序合并结果
+
+        每个群聊看到的语料库是本批开始前的语料库加上它自己那一天；
+        新词和语料库在主进程中按清单顺序合并。
+
+        Args:
+            chat_data: 群聊名称 -> 消息列表
+            group_dates: 群聊名称 -> 日期
+
+        Returns:
+            群聊名称 -> 分析结果
+        """
+        tasks = [
+            {
+                'group_name': group_name,
+                'doc_id': f"{group_name}|{group_dates.get(group_name, '')}",
+                'messages': compact_messages(messages),
+                'lexicon': self.group_lexicon.get(group_name)
+            }
+            for group_name, messages in chat_data.items()
+        ]
+
+        parallel = ParallelAnalyzer(self.workers)
+        print(f"  [INFO] 使用 {parallel.workers} 个进程分析 {len(tasks)} 个群聊")
+        outcomes = parallel.run(tasks, self.keyword_index)
+
+        analysis_results = {}
+        for task, outcome in zip(tasks, outcomes):
+            group_name = task['group_name']
+            if outcome['error'] is not None:
+                print(f"  [ERROR] {group_name} 分析失败: {outcome['error']}")
+                analysis_results[group_name] = self._error_result(chat_data[group_name], outcome['error'])
+                continue
+
+            added = self.group_lexicon.update(group_name, outcome['phrases'])
+            if outcome['terms']:
+                self.keyword_index.add_document(task['doc_id'], outcome['terms'])
+            analysis_results[group_name] = outcome['result']
+            new_words = f", 发现 {added} 个新词" if added else ""
+            print(f"  [OK] {group_name}: 找到 {len(outcome['result'].get('topics', []))} 个话题{new_words}")
+        return analysis_results
+
+    def _find_cross_posted(self, chat_data: Dict[str, List[Dict]], group_dates: Dict[str, str]) -> List[Dict]:
+        """
+        把当天消息的指纹加入转发索引，找出转发到多个群的内容
+
+        Args:
+            chat_data: 群聊名称 -> 消息列表
+            group_dates: 群聊名称 -> 日期
+
+        Returns:
+            SimHashIndex.cross_posted 的结果
+        """
+        doc_ids = []
+        for group_name, messages in chat_data.items():
+            date = group_dates.get(group_name, '')
+            doc_id = f"{group_name}|{date}"
+            self.forward_index.add_document(doc_id, group_name, date, messages)
+            doc_ids.append(doc_id)
+
+        cross_posted = self.forward_index.cross_posted(doc_ids)
+        if cross_posted:
+            print(f"  [OK] 发现 {len(cross_posted)} 条跨群转发内容")
+
+        if self.forward_index.dirty:
+            try:
+                self.forward_index.save()
+            except OSError as e:
+                print(f"  [WARN] 转发指纹索引保存失败: {str(e)}")
+        return cross_posted
+
+    def _update_link_index(self, chat_data: Dict[str, List[Dict]], group_dates: Dict[str, str]) -> List[Dict]:
+        """
+        把当天消息中的链接加入链接索引，返回截至本批最新日期一周内的热门链接
+
+        Args:
+            chat_data: 群聊名称 -> 消息列表
+            group_dates: 群聊名称 -> 日期
+
+        Returns:
+            LinkIndex.top_links 的结果
+        """
+        shared = 0
+        for group_name, messages in chat_data.items():
+            date = group_dates.get(group_name, '')
+            shared += self.link_index.add_document(f"{group_name}|{date}", group_name, date, messages)
+        if shared:
+            print(f"  [OK] 收录 {shared} 次链接分享")
+
+        if self.link_index.dirty:
+            try:
+                self.link_index.save()
+            except OSError as e:
+                print(f"  [WARN] 链接索引保存失败: {str(e)}")
+
+        dates = [date for date in group_dates.values() if date in self.link_index.days]
+        if not dates:
+            return []
+        return self.link_index.top_links(max(dates), self.TOP_LINK_DAYS, self.TOP_LINK_COUNT)
+
+    def _forwarded_item(self, topic: Dict, forwarded: Dict[str, int]) -> Optional[int]:
+        """
+        判断话题是否主要是某条跨群转发内容
+
+        Args:
+            topic: 话题
+            forwarded: 转发原文 -> 跨群转发内容下标
+
+        Returns:
+            转发内容下标，不是转发话题时为 None
+        """
+        lengths = {}
+        total = 0
+        for msg in topic.get('messages', []):
+            content = msg.get('content') or msg.get('message') or msg.get('text', '')
+            if not isinstance(content, str):
+                continue
+            total += len(content)
+            item = forwarded.get(content)
+            if item is not None:
+                lengths[item] = lengths.get(item, 0) + len(content)
+
+        if not lengths:
+            return None
+        item = max(lengths, key=lengths.get)
+        return item if lengths[item] >= total * self.FORWARDED_TOPIC_SHARE else None
+
+    @staticmethod
+    def _error_result(messages: List[Dict], error: str) -> Dict:
+        """分析失败时的占位结果"""
+        return {
+            'topics': [],
+            'total_messages': len(messages),
+            'total_participants': 0,
+            'error': error
+        }
+
+    def _update_group_lexicon(self, group_name: str, messages: List[Dict]) -> Dict[str, int]:
+        """
+        从当天消息挖掘新词并并入群聊词库
+
+        Args:
+            group_name: 群聊名称
+            messages: 消息列表
+
+        Returns:
+            该群聊的全部新词 -> 词频
+        """
+        known_words = {word for word, freq in get_segmenter().freq.items() if freq}
+        texts = (msg.get('content') or msg.get('message') or msg.get('text', '') for msg in messages)
+        phrases = self.phrase_miner.mine(texts, known_words)
+        added = self.group_lexicon.update(group_name, phrases)
+        if added:
+            print(f"    [OK] 发现 {added} 个新词")
+        return self.group_lexicon.get(group_name)
+
     def _parse_group_list(self, list_file: str, override_date: str = None) -> List[GroupChatConfig]:
         """
         解析群聊清单
@@ -200,43 +445,67 @@ class BatchAnalyzer:
         self,
         group_chats: List[GroupChatConfig],
         analysis_results: Dict,
-        output_dir: str
+        output_dir: str,
+        cross_posted: List[Dict] = None,
+        top_links: List[Dict] = None
     ) -> str:
         """
         生成汇总报告
 
+        主要内容是跨群转发的话题不再在各群里重复计数，合并成一条转发内容，
+        并列出它转发到了哪些群。
+
         Args:
             group_chats: 群聊配置列表
             analysis_results: 分析结果
             output_dir: 输出目录
+            cross_posted: 跨群转发内容（SimHashIndex.cross_posted 的结果）
+            top_links: 近一周热门链接（LinkIndex.top_links 的结果）
 
         Returns:
             汇总报告文件路径
         """
+        cross_posted = cross_posted or []
+        forwarded = {
+            text: item
+            for item, content in enumerate(cross_posted)
+            for text in content['texts']
+        }
+
         summary_data = {
             'total_groups': len(group_chats),
             'total_messages': sum(
                 result.get('total_messages', 0)
                 for result in analysis_results.values()
             ),
-            'total_topics': sum(
-                len(result.get('topics', []))
-                for result in analysis_results.values()
-            ),
-            'groups': []
+            'total_topics': 0,
+            'groups': [],
+            'cross_posted': [],
+            'top_links': top_links or []
         }
 
+        collapsed = set()
         for group_name, result in analysis_results.items():
+            topics = []
+            forwarded_topics = 0
+            for topic in result.get('topics', []):
+                item = self._forwarded_item(topic, forwarded)
+                if item is None:
+                    topics.append(topic)
+                else:
+                    collapsed.add(item)
+                    forwarded_topics += 1
+
             group_info = {
                 'name': group_name,
                 'messages': result.get('total_messages', 0),
                 'participants': result.get('total_participants', 0),
-                'topics': len(result.get('topics', [])),
+                'topics': len(topics),
+                'forwarded_topics': forwarded_topics,
                 'top_topic': None
             }
 
-            # 获取最热门话题
-            topics = result.get('topics', [])
+            # 获取最热门话题（跨群转发的内容不算）
             if topics:
                 top_topic = topics[0]
                 group_info['top_topic'] = {
@@ -246,6 +515,14 @@ class BatchAnalyzer:
                 }
 
             summary_data['groups'].append(group_info)
+            summary_data['total_topics'] += len(topics)
+
+        # 每条转发内容只算一个话题
+        summary_data['total_topics'] += len(collapsed)
+        summary_data['cross_posted'] = [
+            {key: value for key, value in content.items() if key != 'texts'}
+            for content in cross_posted
+        ]
 
         # 生成汇总HTML
         summary_html = self._build_summary_html(summary_data)
@@ -284,6 +561,10 @@ class BatchAnalyzer:
                 <strong>关键词:</strong> {', '.join(top_topic.get('keywords', [])[:3])}
             </div>
             """ if top_topic else '<div style="color: #999; margin-top: 10px;">暂无话题数据</div>'
+            if group.get('forwarded_topics'):
+                topic_info += f"""
+            <div style="color: #999; font-size: 13px; margin-top: 8px;">📤 另有 {group['forwarded_topics']} 个话题是跨群转发内容，已合并到下方"跨群转发"</div>
+            """
 
             card = f"""
             <div style="background: white; border-radius: 15px; padding: 20px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
@@ -307,6 +588,49 @@ class BatchAnalyzer:
             """
             group_cards.append(card)
 
+        # 跨群转发：每条内容一张卡片，列出转发到的群（按首次出现排序）
+        forward_cards = []
+        for content in data.get('cross_posted', []):
+            spread = []
+            for index, group in enumerate(content['groups']):
+                first = '🚩 ' if index == 0 else ''
+                repeated = f" ×{group['count']}" if group['count'] > 1 else ''
+                spread.append(
+                    f'<span style="display: inline-block; background: rgba(102, 126, 234, 0.1); padding: 4px 10px; '
+                    f'border-radius: 12px; margin: 4px 6px 0 0; font-size: 13px;">'
+                    f"{first}{group['name']} · {group['time'] or group['date']}{repeated}</span>"
+                )
+            forward_cards.append(f"""
+            <div style="background: white; border-radius: 15px; padding: 20px; margin-bottom: 20px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                <div style="color: #333; margin-bottom: 10px;">{content['preview']}</div>
+                <div style="color: #667eea; font-size: 13px; font-weight: bold;">转发到 {content['group_count']} 个群 · 共 {content['message_count']} 次</div>
+                <div>{''.join(spread)}</div>
+            </div>
+            """)
+        # 近一周热门链接（直接来自链接索引）
+        link_rows = []
+        for item in data.get('top_links', []):
+            groups = '、'.join(f"{name} ×{count}" if count > 1 else name for name, count in item['groups'][:5])
+            link_rows.append(f"""
+            <div style="background: white; border-radius: 15px; padding: 15px 20px; margin-bottom: 12px; box-shadow: 0 5px 15px rgba(0,0,0,0.1);">
+                <a href="{link_href(item['shared_url'])}" target="_blank" style="color: #667eea; word-break: break-all;">{item['shared_url']}</a>
+                <div style="color: #666; font-size: 13px; margin-top: 6px;">分享 {item['count']} 次 · {item['group_count']} 个群：{groups}</div>
+            </div>
+            """)
+        links_section = f"""
+        <div class="groups" style="margin-bottom: 30px;">
+            <h2>🔗 近{self.TOP_LINK_DAYS}天热门链接</h2>
+            {''.join(link_rows)}
+        </div>
+        """ if link_rows else ''
+
+        forward_section = f"""
+        <div class="groups" style="margin-bottom: 30px;">
+            <h2>📤 跨群转发</h2>
+            {''.join(forward_cards)}
+        </div>
+        """ if forward_cards else ''
+
         html = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -404,6 +728,8 @@ class BatchAnalyzer:
             </div>
         </div>
 
+        {forward_section}
+        {links_section}
         <div class="groups">
             <h2>📋 群聊详情</h2>
             {''.join(group_cards) if group_cards else '<p style="color: #999; text-align: center; padding: 40px;">暂无数据</p>'}
@@ -430,6 +756,9 @@ def main():
   # 覆盖所有群聊的日期
   python batch_analyzer.py --list 群聊清单.md --date 2024-01-15
 
+  # 使用全部CPU核心并行分析
+  python batch_analyzer.py --list 群聊清单.md --workers 0
+
   # 自定义MCP服务器地址
   python batch_analyzer.py --list 群聊清单.md --mcp-url http://192.168.1.100:5030
         """
@@ -472,6 +801,32 @@ def main():
         help='输出格式 (默认: html)'
     )
 
+    parser.add_argument(
+        '--keyword-index',
+        type=str,
+        help='关键词语料库文件路径 (默认: ./keyword_index.bin)'
+    )
+
+    parser.add_argument(
+        '--forward-index',
+        type=str,
+        help='转发内容指纹索引文件路径 (默认: ./forward_index.json)'
+    )
+
+    parser.add_argument(
+        '--link-index',
+        type=str,
+        help='链接索引文件路径 (默认: ./link_index.json)'
+    )
+
+    parser.add_argument(
+        '--workers',
+        '-j',
+        type=int,
+        default=1,
+        help='话题分析进程数，0 表示使用全部 CPU 核心 (默认: 1)'
+    )
+
     parser.add_argument(
         '--template',
         action='store_true',
@@ -496,7 +851,13 @@ def main():
 
     # 运行分析
     try:
-        analyzer = BatchAnalyzer(mcp_url=args.mcp_url)
+        analyzer = BatchAnalyzer(
+            mcp_url=args.mcp_url,
+            keyword_index_file=args.keyword_index,
+            workers=args.workers,
+            forward_index_file=args.forward_index,
+            link_index_file=args.link_index
+        )
         output_files = analyzer.run(
             list_file=args.list,
             output_dir=args.output,
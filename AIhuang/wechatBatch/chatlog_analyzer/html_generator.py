@@ -7,6 +7,11 @@ from typing import Dict, List
 from datetime import datetime
 import os
 
+try:
+    from .link_index import link_href
+except ImportError:
+    from link_index import link_href
+
 
 class HTMLGenerator:
     """HTML报告生成器"""
@@ -59,6 +64,7 @@ class HTMLGenerator:
         stats = analysis_result.get('most_active_users', [])
         avg_length = analysis_result.get('average_message_length', 0)
         peak_hour = analysis_result.get('peak_hour', 0)
+        interaction = analysis_result.get('interaction', {})
 
         # 生成话题卡片
         topic_cards = HTMLGenerator._generate_topic_cards(topics)
@@ -66,6 +72,9 @@ class HTMLGenerator:
         # 生成活跃用户列表
         active_users = HTMLGenerator._generate_active_users(stats)
 
+        # 生成互动对列表
+        reply_pairs = HTMLGenerator._generate_reply_pairs(interaction)
+
         html = f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
@@ -227,6 +236,17 @@ class HTMLGenerator:
             border: 1px solid rgba(102, 126, 234, 0.2);
         }}
 
+        .topic-links {{
+            margin-bottom: 15px;
+            font-size: 13px;
+            word-break: break-all;
+        }}
+
+        .topic-links a {{
+            color: #667eea;
+            margin-right: 12px;
+        }}
+
         .topic-summary {{
             background: rgba(255, 255, 255, 0.6);
             padding: 15px;
@@ -383,6 +403,12 @@ class HTMLGenerator:
             {active_users if active_users else '<p style="color: #999; text-align: center; padding: 40px;">暂无用户数据</p>'}
         </div>
 
+        <!-- 互动最多 -->
+        <div class="section">
+            <h2 class="section-title">🔁 互动最多的组合</h2>
+            {reply_pairs if reply_pairs else '<p style="color: #999; text-align: center; padding: 40px;">暂无互动数据</p>'}
+        </div>
+
         <!-- 页脚 -->
         <div class="footer">
             <p>🤖 由 AI 批量群聊分析工具生成 | 分析时间窗口: 30分钟</p>
@@ -456,6 +482,12 @@ class HTMLGenerator:
                 for kw in topic.get('keywords', [])
             )
 
+            # 话题中分享最多的链接
+            links_html = ''
+            if topic.get('links'):
+                anchors = ''.join(f'<a href="{link_href(link)}" target="_blank">{link}</a>' for link in topic['links'])
+                links_html = f'<div class="topic-links">🔗 {anchors}</div>'
+
             # 生成消息预览
             messages = topic.get('messages', [])[:5]  # 只显示前5条
             messages_html = ''.join(
@@ -477,12 +509,15 @@ class HTMLGenerator:
                     <span>🕐 {time_str}</span>
                     <span>💬 {topic.get('message_count', 0)} 条消息</span>
                     <span>👥 {topic.get('participant_count', 0)} 人参与</span>
+                    <span>🔁 {topic.get('interaction', {}).get('turns', 0)} 轮对话</span>
                 </div>
 
                 <div class="keywords">
                     {keywords_html}
                 </div>
 
+                {links_html}
+
                 <div class="topic-summary">
                     📝 {topic.get('summary', '暂无摘要')}
                 </div>
@@ -512,6 +547,24 @@ class HTMLGenerator:
 
         return f'<div class="user-list">{users_html}</div>'
 
+    @staticmethod
+    def _generate_reply_pairs(interaction: Dict) -> str:
+        """生成互动对列表HTML（独白比例 + 回复最多的发言人对）"""
+        pairs = interaction.get('dominant_pairs', [])
+        if not pairs:
+            return ""
+
+        pairs_html = ''.join(
+            f'''<div class="user-item">
+                <div class="user-name">{' ⇄ '.join(pair['users'])}</div>
+                <div class="user-count">{pair['count']} 次来回 · 占 {pair['share']:.0%}</div>
+            </div>'''
+            for pair in pairs
+        )
+        monologue = f"<p style=\"color: #999; margin-bottom: 12px;\">共 {interaction.get('turns', 0)} 轮发言，连续独白占 {interaction.get('monologue_ratio', 0):.0%}</p>"
+
+        return f'{monologue}<div class="user-list">{pairs_html}</div>'
+
     @staticmethod
     def _generate_time_range(time_range: Dict) -> str:
         """生成时间范围HTML"""
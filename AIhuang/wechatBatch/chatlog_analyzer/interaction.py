@@ -0,0 +1,119 @@
+"""
+互动分析模块
+把发言人序列编码成整数数组，构建稀疏的发言转移矩阵（谁接着谁说话），
+轮次、回复对强度、独白比例和主要对话对都从矩阵中读出
+"""
+
+from array import array
+from collections import Counter
+from itertools import islice
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+
+def encode_senders(users: Iterable[str]) -> Tuple[array, List[str]]:
+    """
+    把发言人名称编码成整数ID数组
+
+    Args:
+        users: 按时间顺序的发言人名称
+
+    Returns:
+        (ID 数组, ID -> 名称 列表)
+    """
+    ids = {}
+    sender_ids = array('i', (ids.setdefault(user, len(ids)) for user in users))
+    return sender_ids, list(ids)
+
+
+class InteractionMatrix:
+    """稀疏发言转移矩阵
+
+    相邻两条消息 (a, b) 记为一次 a -> b 转移，编码成 a * size + b 后
+    一次性交给 Counter 计数（循环在 C 层完成），矩阵只保存出现过的格子。
+
+    - 对角线 a -> a：同一人连续发言（独白）
+    - 非对角线 a -> b：换人发言，即一轮对话；a -> b 与 b -> a 之和是两人的回复强度
+    """
+
+    def __init__(self, sender_ids: Sequence[int], size: int):
+        """
+        构建矩阵
+
+        Args:
+            sender_ids: 按时间顺序的发言人ID（encode_senders 的结果或其切片）
+            size: ID 总数（同一天的各个会话共用一套ID）
+        """
+        self.size = size
+        self.message_counts = Counter(sender_ids)
+        self.message_count = len(sender_ids)
+        self.transitions = Counter(map(int.__add__, map(size.__mul__, sender_ids), islice(sender_ids, 1, None)))
+
+    @property
+    def participants(self) -> int:
+        """发言人数"""
+        return len(self.message_counts)
+
+    @property
+    def self_transitions(self) -> int:
+        """同一人连续发言的次数（矩阵对角线之和）"""
+        transitions = self.transitions
+        size = self.size
+        return sum(transitions.get(sender * (size + 1), 0) for sender in self.message_counts)
+
+    @property
+    def turns(self) -> int:
+        """发言轮次（连续同一人的消息算一轮）"""
+        if not self.message_count:
+            return 0
+        return self.message_count - self.self_transitions
+
+    @property
+    def monologue_ratio(self) -> float:
+        """独白比例：相邻消息中同一人连续发言的占比"""
+        total = self.message_count - 1
+        return self.self_transitions / total if total > 0 else 0.0
+
+    def reply_pairs(self) -> Counter:
+        """两两之间的回复强度（a -> b 与 b -> a 合计），键为 (较小ID, 较大ID)"""
+        pairs = Counter()
+        size = self.size
+        for code, count in self.transitions.items():
+            source, target = divmod(code, size)
+            if source != target:
+                pairs[(min(source, target), max(source, target))] += count
+        return pairs
+
+    def pair_strength(self, a: int, b: int) -> int:
+        """两人之间的回复强度"""
+        if a == b:
+            return 0
+        return self.transitions.get(a * self.size + b, 0) + self.transitions.get(b * self.size + a, 0)
+
+    def dominant_pairs(self, names: List[str], top_n: int = 3) -> List[Dict]:
+        """
+        回复最多的发言人对
+
+        Args:
+            names: ID -> 名称
+            top_n: 返回数量
+
+        Returns:
+            [{'users': [名称, 名称], 'count': 回复次数, 'share': 占全部换人发言的比例}]
+        """
+        handoffs = self.turns - 1
+        return [
+            {
+                'users': [names[a], names[b]],
+                'count': count,
+                'share': round(count / handoffs, 3) if handoffs > 0 else 0.0
+            }
+            for (a, b), count in self.reply_pairs().most_common(top_n)
+        ]
+
+    def summary(self, names: List[str], top_n: int = 3) -> Dict:
+        """轮次、独白比例和主要对话对（可直接写入分析结果）"""
+        return {
+            'turns': self.turns,
+            'monologue_ratio': round(self.monologue_ratio, 3),
+            'dominant_pairs': self.dominant_pairs(names, top_n)
+        }
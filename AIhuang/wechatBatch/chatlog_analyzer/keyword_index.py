@@ -0,0 +1,201 @@
+"""
+关键词语料库模块
+跨群聊、跨日期维护词的文档频率（DF），用 BM25 给话题关键词打分
+"""
+
+import json
+import math
+import os
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List
+
+
+class KeywordIndex:
+    """持久化的文档频率表
+
+    每个"文档"是一个群聊的一天（doc_id 形如 '群聊名称|2025-12-09'），
+    每分析一天就增量加入一次；同一个 doc_id 重复加入会被忽略。
+
+    磁盘格式（紧凑、加载快）：
+        第1行  魔数 KWIDX1
+        第2行  JSON 头：文档数、总词数、词条数、已收录的 doc_id
+        之后   词条，每行一个（UTF-8）
+        最后   uint32 数组，依次是每个词条的文档频率
+    """
+
+    MAGIC = b'KWIDX1'
+
+    # BM25 参数
+    K1 = 1.2
+    B = 0.75
+
+    def __init__(self, path: str = None):
+        """
+        初始化语料库
+
+        Args:
+            path: 存储文件路径（None 表示只在内存中使用）
+        """
+        self.path = path
+        self.doc_count = 0
+        self.total_terms = 0
+        self.doc_ids = set()
+        self.df: Dict[str, int] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'KeywordIndex':
+        """
+        从文件加载语料库，文件不存在时返回空语料库
+
+        Args:
+            path: 存储文件路径
+
+        Returns:
+            KeywordIndex
+        """
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        magic, header_line, rest = data.split(b'\n', 2)
+        if magic != cls.MAGIC:
+            raise ValueError(f"不是关键词语料库文件: {path}")
+
+        header = json.loads(header_line.decode('utf-8'))
+        term_count = header['term_count']
+
+        counts = array('I')
+        if term_count:
+            split_at = len(rest) - term_count * counts.itemsize
+            counts.frombytes(rest[split_at:])
+            terms = rest[:split_at - 1].decode('utf-8').split('\n')
+            index.df = dict(zip(terms, counts))
+
+        index.doc_count = header['doc_count']
+        index.total_terms = header['total_terms']
+        index.doc_ids = set(header['doc_ids'])
+        return index
+
+    def save(self, path: str = None) -> None:
+        """
+        写回文件（先写临时文件再替换）
+
+        Args:
+            path: 存储文件路径，默认使用加载时的路径
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("未指定语料库文件路径")
+
+        terms = list(self.df)
+        header = {
+            'doc_count': self.doc_count,
+            'total_terms': self.total_terms,
+            'term_count': len(terms),
+            'doc_ids': sorted(self.doc_ids)
+        }
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(self.MAGIC + b'\n')
+            f.write(json.dumps(header, ensure_ascii=False).encode('utf-8') + b'\n')
+            if terms:
+                f.write('\n'.join(terms).encode('utf-8') + b'\n')
+                f.write(array('I', (self.df[t] for t in terms)).tobytes())
+
+        os.replace(tmp_path, path)
+        self.path = path
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """是否有未保存的更新"""
+        return self._dirty
+
+    def add_document(self, doc_id: str, terms: Iterable[str]) -> bool:
+        """
+        增量加入一个文档
+
+        Args:
+            doc_id: 文档ID，已收录的会被忽略
+            terms: 文档中的词（可重复）
+
+        Returns:
+            是否新加入
+        """
+        if doc_id in self.doc_ids:
+            return False
+
+        terms = list(terms)
+        for term in set(terms):
+            self.df[term] = self.df.get(term, 0) + 1
+
+        self.doc_ids.add(doc_id)
+        self.doc_count += 1
+        self.total_terms += len(terms)
+        self._dirty = True
+        return True
+
+    def remove_document(self, doc_id: str, terms: Iterable[str]) -> bool:
+        """
+        撤销一次 add_document（terms 必须与加入时相同）
+
+        Args:
+            doc_id: 文档ID
+            terms: 加入时的词
+
+        Returns:
+            是否撤销
+        """
+        if doc_id not in self.doc_ids:
+            return False
+
+        terms = list(terms)
+        for term in set(terms):
+            df = self.df.get(term, 0) - 1
+            if df > 0:
+                self.df[term] = df
+            else:
+                self.df.pop(term, None)
+
+        self.doc_ids.discard(doc_id)
+        self.doc_count -= 1
+        self.total_terms -= len(terms)
+        self._dirty = True
+        return True
+
+    def idf(self, term: str) -> float:
+        """BM25 逆文档频率（恒为正）"""
+        df = self.df.get(term, 0)
+        return math.log((self.doc_count - df + 0.5) / (df + 0.5) + 1)
+
+    def top_keywords(self, term_counts: Counter, top_n: int = 5) -> List[str]:
+        """
+        按 BM25 给一段文本中的词打分，返回得分最高的词
+
+        Args:
+            term_counts: 词频统计
+            top_n: 返回的关键词数量
+
+        Returns:
+            关键词列表
+        """
+        if not term_counts:
+            return []
+        if not self.doc_count:
+            return [word for word, _ in term_counts.most_common(top_n)]
+
+        doc_len = sum(term_counts.values())
+        avg_len = self.total_terms / self.doc_count or doc_len
+        norm = self.K1 * (1 - self.B + self.B * doc_len / avg_len)
+
+        scores = {
+            term: self.idf(term) * tf * (self.K1 + 1) / (tf + norm)
+            for term, tf in term_counts.items()
+        }
+        return sorted(scores, key=scores.get, reverse=True)[:top_n]
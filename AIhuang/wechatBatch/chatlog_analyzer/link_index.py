@@ -0,0 +1,354 @@
+"""
+链接索引模块
+从消息中提取链接并规范化（去掉跟踪参数、统一主机名），
+按日期持久化 链接 -> (群聊, 时间, 发送者, 原始链接)，"本周各群分享最多的链接"直接查索引
+"""
+
+import argparse
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+try:
+    from .simhash_index import format_message_time
+except ImportError:
+    from simhash_index import format_message_time
+
+
+# 链接：http(s):// 或 www. 开头，遇到空白、引号、中文或中文标点结束
+URL_PATTERN = re.compile(
+    r'(?:https?://|www\.)[^\s<>"\'\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]+',
+    re.IGNORECASE
+)
+
+# 链接末尾常被一起复制进来的标点
+_TRAILING = '.,;:!?)]}\'"'
+
+# 各站点通用的跟踪参数（另外 utm_ 开头的一律去掉）
+TRACKING_PARAMS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'yclid'}
+
+# 只在特定站点（及其子域名）上去掉的参数：from、ts 这类名字在别的站点
+# 可能是有意义的参数，不能一律去掉
+# （公众号文章链接只有 __biz/mid/idx/sn 决定是哪篇）
+HOST_TRACKING_PARAMS = {
+    'mp.weixin.qq.com': {
+        'chksm', 'scene', 'srcid', 'sharer_sharetime', 'sharer_shareid', 'sharer_shareinfo',
+        'sharer_shareinfo_first', 'clicktime', 'enterid', 'exportkey', 'pass_ticket',
+        'ascene', 'devicetype', 'version', 'lang', 'nettype', 'abtest_cookie',
+        'wx_header', 'key', 'subscene', 'sessionid', 'poc_token', 'realreporttime',
+        'from', 'isappinstalled'
+    },
+    'bilibili.com': {
+        'spm_id_from', 'from_spmid', 'vd_source', 'share_source', 'share_medium', 'share_plat',
+        'share_session_id', 'share_tag', 'share_from', 'unique_k', 'bbid', 'ts', 'from'
+    },
+    'b23.tv': {'share_source', 'share_medium', 'share_plat', 'share_session_id', 'share_tag', 'bbid', 'ts'},
+    'taobao.com': {'spm', 'scm', 'pvid', 'ut_sk', 'suid', 'shareuniqueid', 'sharesource', 'sp_tk'},
+    'tmall.com': {'spm', 'scm', 'pvid', 'ut_sk', 'suid', 'shareuniqueid', 'sharesource', 'sp_tk'},
+    'xiaohongshu.com': {'xhsshare', 'appuid', 'apptime', 'share_from_user_hidden', 'author_share', 'shareredid'},
+    'zhihu.com': {'share_code'},
+    'youtube.com': {'si', 'feature', 'pp'},
+    'youtu.be': {'si', 'feature'},
+}
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def _host_tracking_params(host: str) -> set:
+    """某个主机名要去掉的站点参数（按域名后缀匹配，m.bilibili.com 也算 bilibili.com）"""
+    labels = host.split('.')
+    params = set()
+    for i in range(len(labels) - 1):
+        params.update(HOST_TRACKING_PARAMS.get('.'.join(labels[i:]), ()))
+    return params
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化链接（只用作索引的键，展示和跳转仍用原始链接，见 link_href）
+
+    - 协议统一为 https（http 与 https 视为同一链接），主机名转小写并去掉
+      www. 前缀和默认端口
+    - 去掉跟踪参数，其余参数按名称排序
+    - 去掉锚点（#/ 或 #! 开头的前端路由除外）和路径末尾的 /
+
+    Args:
+        url: 原始链接（可以没有协议，如 www.example.com/a）
+
+    Returns:
+        规范化后的链接，无法解析时原样返回
+    """
+    if not re.match(r'https?://', url, re.IGNORECASE):
+        url = 'https://' + url
+    try:
+        parts = urlsplit(url)
+        host = (parts.hostname or '').rstrip('.')
+        port = parts.port
+    except ValueError:
+        return url
+    if not host:
+        return url
+
+    if host.startswith('www.'):
+        host = host[4:]
+    site_params = _host_tracking_params(host)
+    query = sorted(
+        (name, value)
+        for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not _is_tracking(name, site_params)
+    )
+    if port and port != DEFAULT_PORTS.get(parts.scheme.lower()):
+        host = f"{host}:{port}"
+    path = parts.path.rstrip('/')
+    fragment = parts.fragment if parts.fragment[:1] in ('/', '!') else ''
+
+    return urlunsplit(('https', host, path, urlencode(query), fragment))
+
+
+def _is_tracking(name: str, site_params: set) -> bool:
+    """参数是否为跟踪参数"""
+    name = name.lower()
+    return name.startswith('utm_') or name in TRACKING_PARAMS or name in site_params
+
+
+def extract_link_pairs(text: str) -> List[Tuple[str, str]]:
+    """
+    提取文本中的链接（保持出现顺序）
+
+    Args:
+        text: 消息文本
+
+    Returns:
+        [(规范化链接, 原始链接)]
+    """
+    return [(canonicalize_url(url), url) for url in _find_urls(text)]
+
+
+def link_href(url: str) -> str:
+    """原始链接用作 href：www. 开头、没有协议的补上 http://"""
+    return url if re.match(r'https?://', url, re.IGNORECASE) else 'http://' + url
+
+
+def strip_links(text: str) -> str:
+    """去掉文本中的链接，避免 http、com 之类的片段进入分词和关键词"""
+    if not _may_contain_url(text):
+        return text
+    return URL_PATTERN.sub(' ', text)
+
+
+def _may_contain_url(text: str) -> bool:
+    """快速预检：大部分消息没有链接，不必跑正则"""
+    lowered = text.lower()
+    return 'http' in lowered or 'www.' in lowered
+
+
+def _find_urls(text: str) -> List[str]:
+    """正则匹配出的原始链接（去掉末尾标点）"""
+    if not text or not _may_contain_url(text):
+        return []
+    urls = []
+    for match in URL_PATTERN.finditer(text):
+        url = match.group(0).rstrip(_TRAILING)
+        if len(url) > len('www.'):
+            urls.append(url)
+    return urls
+
+
+class LinkIndex:
+    """持久化的链接索引（JSON 文件）
+
+    按日期分桶：日期 -> {规范化链接: [[群聊, 时间, 发送者, 原始链接], ...]}。
+    查询一段日期的热门链接只需合并这几天的桶，代价与这几天出现过的
+    不同链接数成正比，与消息总数无关。每个"文档"是一个群聊的一天
+    （doc_id 形如 '群聊名称|2025-12-09'），同一个 doc_id 只收录一次。
+    """
+
+    # 只保留最近这么多天
+    RETENTION_DAYS = 90
+
+    def __init__(self, path: str = None):
+        """
+        初始化索引
+
+        Args:
+            path: 存储文件路径（None 表示只在内存中使用）
+        """
+        self.path = path
+        self.doc_ids = set()
+        self.days: Dict[str, Dict[str, List[List[str]]]] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'LinkIndex':
+        """
+        从文件加载索引，文件不存在时返回空索引
+
+        Args:
+            path: 存储文件路径
+
+        Returns:
+            LinkIndex
+        """
+        index = cls(path)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            index.doc_ids = set(data.get('doc_ids', []))
+            index.days = data.get('days', {})
+        return index
+
+    def save(self, path: str = None) -> None:
+        """
+        写回文件（先写临时文件再替换），超过保留天数的日期不再写入
+
+        Args:
+            path: 存储文件路径，默认使用加载时的路径
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("未指定链接索引文件路径")
+
+        cutoff = self._cutoff_date()
+        data = {
+            'doc_ids': sorted(d for d in self.doc_ids if d.rpartition('|')[2][:10] >= cutoff),
+            'days': {day: links for day, links in sorted(self.days.items()) if day >= cutoff}
+        }
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.path = path
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """是否有未保存的更新"""
+        return self._dirty
+
+    def add_document(self, doc_id: str, group_name: str, date: str, messages: Iterable[Dict]) -> int:
+        """
+        收录一个群聊一天消息中的链接
+
+        Args:
+            doc_id: 文档ID，已收录的会被忽略
+            group_name: 群聊名称
+            date: 日期 (YYYY-MM-DD)
+            messages: 原始消息列表
+
+        Returns:
+            收录的链接分享次数
+        """
+        if doc_id in self.doc_ids:
+            return 0
+
+        day = self.days.setdefault(date, {})
+        added = 0
+        for msg in messages:
+            content = msg.get('content') or msg.get('message') or msg.get('text', '')
+            if not isinstance(content, str):
+                continue
+            pairs = extract_link_pairs(content)
+            if not pairs:
+                continue
+            time = format_message_time(msg.get('timestamp') or msg.get('time') or msg.get('date'))
+            sender = msg.get('user') or msg.get('sender') or msg.get('from', '')
+            # 同一条消息里重复贴的同一个链接只算一次（记第一次的原始写法）
+            counted = set()
+            for link, url in pairs:
+                if link in counted:
+                    continue
+                counted.add(link)
+                day.setdefault(link, []).append([group_name, time, sender, url])
+                added += 1
+
+        if not day:
+            del self.days[date]
+        self.doc_ids.add(doc_id)
+        self._dirty = True
+        return added
+
+    def top_links(self, end_date: str = None, days: int = 7, top_n: int = 10) -> List[Dict]:
+        """
+        一段日期内各群分享最多的链接
+
+        Args:
+            end_date: 截止日期 (YYYY-MM-DD)，默认为索引中最新的日期
+            days: 向前统计的天数（含截止日期）
+            top_n: 返回数量
+
+        Returns:
+            [{'url', 'shared_url', 'count', 'group_count', 'groups': [(群聊, 次数)],
+              'first_shared': {'group', 'time', 'sender'}}]
+            url 是规范化链接；shared_url 是第一次分享时的原始链接，用于展示和跳转
+        """
+        selected = self._date_range(end_date, days)
+        counts = Counter()
+        for day in selected:
+            for link, shares in self.days[day].items():
+                counts[link] += len(shares)
+
+        results = []
+        for link, count in counts.most_common(top_n):
+            shares = [share for day in selected for share in self.days[day].get(link, ())]
+            first = min(shares, key=lambda share: share[1])
+            group, time, sender = first[:3]
+            groups = Counter(share[0] for share in shares)
+            results.append({
+                'url': link,
+                # 旧版索引没有记录原始链接
+                'shared_url': first[3] if len(first) > 3 else link,
+                'count': count,
+                'group_count': len(groups),
+                'groups': groups.most_common(),
+                'first_shared': {'group': group, 'time': time, 'sender': sender}
+            })
+        return results
+
+    def _date_range(self, end_date: str, days: int) -> List[str]:
+        """索引中落在 (end_date - days, end_date] 内的日期"""
+        if not self.days:
+            return []
+        end_date = end_date or max(self.days)
+        try:
+            start = (datetime.strptime(end_date[:10], '%Y-%m-%d') - timedelta(days=days - 1)).strftime('%Y-%m-%d')
+        except ValueError:
+            return [end_date] if end_date in self.days else []
+        return [day for day in self.days if start <= day <= end_date]
+
+    def _cutoff_date(self) -> str:
+        """保留期的起始日期（以索引里最新的日期为准）"""
+        if not self.days:
+            return ''
+        try:
+            newest = datetime.strptime(max(self.days)[:10], '%Y-%m-%d')
+        except ValueError:
+            return ''
+        return (newest - timedelta(days=self.RETENTION_DAYS)).strftime('%Y-%m-%d')
+
+
+def main():
+    """命令行: 查询热门链接"""
+    parser = argparse.ArgumentParser(description='各群分享最多的链接')
+    parser.add_argument('--index', default='link_index.json', help='链接索引文件 (默认: link_index.json)')
+    parser.add_argument('--date', help='截止日期 YYYY-MM-DD (默认: 索引中最新的日期)')
+    parser.add_argument('--days', type=int, default=7, help='统计天数 (默认: 7)')
+    parser.add_argument('--top', type=int, default=20, help='显示前N个链接 (默认: 20)')
+    args = parser.parse_args()
+
+    if not os.path.exists(args.index):
+        print(f"[ERROR] 链接索引文件不存在: {args.index}")
+        return
+
+    links = LinkIndex.load(args.index).top_links(args.date, args.days, args.top)
+    print(f"[OK] 最近 {args.days} 天分享最多的 {len(links)} 个链接")
+    for item in links:
+        print(f"  {item['count']:>4} 次  {item['group_count']:>2} 个群  {item['url']}")
+
+
+if __name__ == '__main__':
+    main()
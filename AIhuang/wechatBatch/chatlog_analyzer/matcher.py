@@ -0,0 +1,137 @@
+"""
+多模式匹配模块
+Aho-Corasick 自动机：词表只构建一次，一遍扫描找出消息中命中的全部词
+"""
+
+from collections import Counter, deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple, Union
+
+
+class KeywordMatcher:
+    """Aho-Corasick 多模式匹配器
+
+    构建时把 trie 的失败指针展开成完整的状态转移表（每个状态一个 dict），
+    扫描时每个字符只做一次字典查找，不需要沿失败链回退；
+    输出表也沿失败链合并好，某个状态结束的全部模式一次取出。
+
+    适合词表较大、或同一条消息要同时检查很多词的场景
+    （问题指示词、关键词权重、群聊词库、多关键词搜索等）。
+    """
+
+    def __init__(self, patterns: Union[Iterable[str], Dict[str, object]], ignore_case: bool = False):
+        """
+        构建自动机
+
+        Args:
+            patterns: 模式列表，或 模式 -> 值 的字典（值可用于权重等）
+            ignore_case: 是否忽略大小写（模式和文本都转成小写）
+        """
+        if not isinstance(patterns, dict):
+            patterns = dict.fromkeys(patterns)
+
+        self.ignore_case = ignore_case
+        self.values: Dict[str, object] = {}
+        for pattern, value in patterns.items():
+            if not pattern:
+                continue
+            self.values[pattern.lower() if ignore_case else pattern] = value
+
+        self._goto: List[Dict[str, int]] = [{}]
+        self._output: List[Tuple[str, ...]] = [()]
+        self._build()
+
+    def _build(self) -> None:
+        goto = self._goto
+        output = [[]]
+
+        # 1. trie
+        for pattern in self.values:
+            state = 0
+            for char in pattern:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    output.append([])
+                state = next_state
+            output[state].append(pattern)
+
+        # 2. 按层 BFS 计算失败指针，同时把失败状态的转移和输出并进来
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            output[state].extend(output[fail[state]])
+            trie_edges = list(goto[state].items())
+            for char, child in trie_edges:
+                fallback = fail[state]
+                fail[child] = goto[fallback].get(char, 0) if state else 0
+                queue.append(child)
+            # 补全转移：本状态没有的边沿用失败状态的边（失败状态层数更浅，已补全）
+            if state:
+                for char, target in goto[fail[state]].items():
+                    goto[state].setdefault(char, target)
+
+        self._output = [tuple(patterns) for patterns in output]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __bool__(self) -> bool:
+        return bool(self.values)
+
+    def finditer(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        扫描文本，逐个产出命中（允许重叠）
+
+        Args:
+            text: 文本
+
+        Yields:
+            (结束位置, 模式)，起始位置为 结束位置 - len(模式)
+        """
+        if self.ignore_case:
+            text = text.lower()
+
+        goto = self._goto
+        output = self._output
+        root = goto[0]
+        state = 0
+        for position, char in enumerate(text, 1):
+            state = goto[state].get(char) or root.get(char, 0)
+            if output[state]:
+                for pattern in output[state]:
+                    yield position, pattern
+
+    def search(self, text: str) -> bool:
+        """文本中是否出现任意一个模式（命中即返回）"""
+        for _ in self.finditer(text):
+            return True
+        return False
+
+    def find_all(self, text: str) -> Set[str]:
+        """文本中出现过的全部模式"""
+        return {pattern for _, pattern in self.finditer(text)}
+
+    def count(self, text: str) -> Counter:
+        """每个模式在文本中出现的次数"""
+        return Counter(pattern for _, pattern in self.finditer(text))
+
+    def weight(self, text: str, default: float = 1.0) -> float:
+        """
+        文本中命中模式的权重之和（每个模式只算一次）
+
+        Args:
+            text: 文本
+            default: 值为 None 的模式的权重
+
+        Returns:
+            权重之和
+        """
+        values = self.values
+        total = 0.0
+        for pattern in self.find_all(text):
+            value = values[pattern]
+            total += default if value is None else value
+        return total
@@ -0,0 +1,155 @@
+"""
+多进程话题分析模块
+把每个群聊的精简消息分发到进程池，按清单顺序收集结果
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+
+try:
+    from .keyword_index import KeywordIndex
+    from .phrase_miner import PhraseMiner
+    from .segmenter import get_segmenter
+    from .topic_analyzer import TopicAnalyzer
+except ImportError:
+    from keyword_index import KeywordIndex
+    from phrase_miner import PhraseMiner
+    from segmenter import get_segmenter
+    from topic_analyzer import TopicAnalyzer
+
+
+def compact_messages(messages: List[Dict]) -> List[Dict]:
+    """
+    只保留分析需要的字段（时间、用户、内容），减少进程间传输量
+
+    Args:
+        messages: 原始消息列表
+
+    Returns:
+        精简后的消息列表
+    """
+    return [
+        {
+            'timestamp': msg.get('timestamp') or msg.get('time') or msg.get('date'),
+            'user': msg.get('user') or msg.get('sender') or msg.get('from', ''),
+            'content': msg.get('content') or msg.get('message') or msg.get('text', '')
+        }
+        for msg in messages
+    ]
+
+
+# 工作进程内的状态（由 _init_worker 初始化，每个进程一份）
+_worker = {}
+
+
+def _init_worker(keyword_index: Optional[KeywordIndex]) -> None:
+    """工作进程初始化：收到一份语料库快照，加载一次分词词典"""
+    segmenter = get_segmenter()
+    _worker['analyzer'] = TopicAnalyzer(keyword_index)
+    _worker['miner'] = PhraseMiner()
+    _worker['known_words'] = {word for word, freq in segmenter.freq.items() if freq}
+
+
+def analyze_group(task: Dict) -> Dict:
+    """
+    在工作进程中分析一个群聊（新词发现 + 话题分析）
+
+    当天文档只在分析期间加入进程内的语料库快照，分析完就撤销，
+    所以结果与进程调度顺序无关；词和新词返回给主进程统一合并。
+
+    Args:
+        task: {'group_name', 'doc_id', 'messages', 'lexicon'}
+
+    Returns:
+        {'group_name', 'result', 'phrases', 'terms', 'error'}
+    """
+    analyzer = _worker['analyzer']
+    outcome = {'group_name': task['group_name'], 'result': None, 'phrases': {}, 'terms': [], 'error': None}
+    try:
+        messages = task['messages']
+        phrases = _worker['miner'].mine((msg['content'] or '' for msg in messages), _worker['known_words'])
+
+        lexicon = dict(task['lexicon'])
+        for word, info in phrases.items():
+            lexicon[word] = max(lexicon.get(word, 0), info['count'])
+
+        outcome['result'] = analyzer.analyze_chat_data(messages, task['doc_id'], lexicon)
+        outcome['phrases'] = phrases
+        outcome['terms'] = analyzer.last_document_terms
+    except Exception as e:
+        outcome['error'] = str(e)
+    finally:
+        if analyzer.keyword_index is not None and analyzer.last_document_terms:
+            analyzer.keyword_index.remove_document(task['doc_id'], analyzer.last_document_terms)
+    return outcome
+
+
+class ParallelAnalyzer:
+    """进程池话题分析
+
+    - 每个工作进程在启动时收到一份语料库快照（只传一次）
+    - 任务按清单顺序提交、按清单顺序返回
+    - 单个群聊抛出的异常只记在该群聊上；工作进程崩溃导致进程池损坏时，
+      受影响的群聊各自在单独的进程池里重试一次，崩溃不会波及其他群聊
+    """
+
+    def __init__(self, workers: int = 0):
+        """
+        初始化
+
+        Args:
+            workers: 进程数，0 表示使用全部 CPU 核心
+        """
+        self.workers = workers or os.cpu_count() or 1
+
+    def run(self, tasks: List[Dict], keyword_index: Optional[KeywordIndex]) -> List[Dict]:
+        """
+        并行分析
+
+        Args:
+            tasks: analyze_group 的任务列表
+            keyword_index: 语料库快照
+
+        Returns:
+            与 tasks 一一对应的分析结果
+        """
+        outcomes: List[Optional[Dict]] = [None] * len(tasks)
+        broken = self._run_pool(tasks, range(len(tasks)), keyword_index, outcomes, self.workers)
+
+        for index in broken:
+            print(f"    [WARN] 工作进程异常退出，单独重试: {tasks[index]['group_name']}")
+            self._run_pool(tasks, [index], keyword_index, outcomes, 1)
+
+        for index, outcome in enumerate(outcomes):
+            if outcome is None:
+                outcomes[index] = {
+                    'group_name': tasks[index]['group_name'],
+                    'result': None, 'phrases': {}, 'terms': [],
+                    'error': '工作进程异常退出'
+                }
+        return outcomes
+
+    def _run_pool(self, tasks, indices, keyword_index, outcomes, workers) -> List[int]:
+        """提交一批任务，返回因进程池损坏而没有结果的任务下标"""
+        indices = list(indices)
+        broken = []
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(indices)) or 1,
+            initializer=_init_worker,
+            initargs=(keyword_index,)
+        ) as pool:
+            futures = [(index, pool.submit(analyze_group, tasks[index])) for index in indices]
+            for index, future in futures:
+                try:
+                    outcomes[index] = future.result()
+                except BrokenProcessPool:
+                    broken.append(index)
+                except Exception as e:
+                    outcomes[index] = {
+                        'group_name': tasks[index]['group_name'],
+                        'result': None, 'phrases': {}, 'terms': [],
+                        'error': str(e)
+                    }
+        return broken
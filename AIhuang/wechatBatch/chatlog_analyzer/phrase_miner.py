@@ -0,0 +1,224 @@
+"""
+新词发现模块
+在一天（或一周）的群聊文本上建后缀数组，按词频、凝固度和左右邻字熵挖掘群内新词
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+from collections import Counter
+from itertools import groupby
+from typing import Dict, Iterable, List, Set
+
+
+class PhraseMiner:
+    """基于后缀数组的新词发现
+
+    1. 把文本中的中文片段用换行拼成一个串，分别对正序串和逆序串建后缀数组
+       （只按前 MAX_LEN+1 个字排序，n 元组长度有上限，排序近似 O(n log n)）
+    2. 后缀数组中相邻且前 n 个字相同的后缀构成一个 n 元组的全部出现位置，
+       顺带得到它的右邻字分布；逆序串给出左邻字分布
+    3. 候选词需满足：
+       - 词频 >= min_count
+       - 凝固度 = min over 切分点 log(P(w) / (P(a)·P(b))) >= min_cohesion
+       - 左右邻字熵的较小值 >= min_entropy
+    """
+
+    CHINESE_PATTERN = re.compile(r'[\u4e00-\u9fff]+')
+    SEPARATOR = '\n'
+
+    MAX_LEN = 6
+    MIN_COUNT = 5
+    MIN_COHESION = 3.0
+    MIN_ENTROPY = 1.0
+
+    def __init__(
+        self,
+        max_len: int = MAX_LEN,
+        min_count: int = MIN_COUNT,
+        min_cohesion: float = MIN_COHESION,
+        min_entropy: float = MIN_ENTROPY
+    ):
+        """
+        初始化新词发现器
+
+        Args:
+            max_len: 候选词最大长度
+            min_count: 最小词频
+            min_cohesion: 最小凝固度（点互信息，自然对数）
+            min_entropy: 最小左右邻字熵
+        """
+        self.max_len = max_len
+        self.min_count = min_count
+        self.min_cohesion = min_cohesion
+        self.min_entropy = min_entropy
+
+    def mine(self, texts: Iterable[str], known_words: Set[str] = None) -> Dict[str, Dict]:
+        """
+        从文本中挖掘新词
+
+        Args:
+            texts: 消息文本
+            known_words: 已知词（如分词词典），结果中会排除
+
+        Returns:
+            新词 -> {'count', 'cohesion', 'entropy', 'score'}，按 score 降序
+        """
+        pieces = []
+        for text in texts:
+            pieces.extend(self.CHINESE_PATTERN.findall(text))
+        corpus = self.SEPARATOR.join(pieces)
+        total = sum(len(piece) for piece in pieces)
+        if total == 0:
+            return {}
+
+        counts, right_entropy = self._scan(corpus)
+        _, left_reversed = self._scan(corpus[::-1])
+
+        known_words = known_words or set()
+        phrases = {}
+        for gram, count in counts.items():
+            if len(gram) < 2 or gram in known_words:
+                continue
+
+            entropy = min(right_entropy.get(gram, 0.0), left_reversed.get(gram[::-1], 0.0))
+            if entropy < self.min_entropy:
+                continue
+
+            cohesion = min(
+                math.log(count * total / (counts[gram[:i]] * counts[gram[i:]]))
+                for i in range(1, len(gram))
+            )
+            if cohesion < self.min_cohesion:
+                continue
+
+            phrases[gram] = {
+                'count': count,
+                'cohesion': round(cohesion, 3),
+                'entropy': round(entropy, 3),
+                'score': round(count * entropy, 3)
+            }
+
+        return dict(sorted(phrases.items(), key=lambda item: item[1]['score'], reverse=True))
+
+    def _scan(self, corpus: str):
+        """
+        建后缀数组并按长度 1..max_len 统计 n 元组频数和右邻字熵
+
+        Returns:
+            (频数 >= min_count 的 n 元组 -> 频数, n 元组 -> 右邻字熵)
+        """
+        depth = self.max_len + 1
+        suffix_array = sorted(range(len(corpus)), key=lambda i: corpus[i:i + depth])
+
+        counts = {}
+        entropy = {}
+        separator = self.SEPARATOR
+        for n in range(1, self.max_len + 1):
+            for gram, group in groupby(suffix_array, key=lambda i: corpus[i:i + n]):
+                if len(gram) < n or separator in gram:
+                    continue
+                positions = list(group)
+                if len(positions) < self.min_count:
+                    continue
+
+                counts[gram] = len(positions)
+                if n >= 2:
+                    entropy[gram] = self._neighbor_entropy(corpus, positions, n)
+
+        return counts, entropy
+
+    def _neighbor_entropy(self, corpus: str, positions: List[int], n: int) -> float:
+        """右邻字熵；片段边界（分隔符或串尾）每次都算作不同的邻字"""
+        neighbors = Counter()
+        boundaries = 0
+        for position in positions:
+            char = corpus[position + n:position + n + 1]
+            if not char or char == self.SEPARATOR:
+                boundaries += 1
+            else:
+                neighbors[char] += 1
+
+        total = len(positions)
+        entropy = -sum(c / total * math.log(c / total) for c in neighbors.values())
+        if boundaries:
+            entropy += boundaries / total * math.log(total)
+        return entropy
+
+
+class GroupLexicon:
+    """按群聊保存挖掘出的新词（JSON 文件: 群聊名称 -> {新词: 词频}）"""
+
+    def __init__(self, path: str):
+        """
+        初始化群聊词库
+
+        Args:
+            path: 词库文件路径
+        """
+        self.path = path
+        self.groups: Dict[str, Dict[str, int]] = {}
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                self.groups = json.load(f)
+
+    def get(self, group_name: str) -> Dict[str, int]:
+        """某个群聊的新词 -> 词频"""
+        return self.groups.get(group_name, {})
+
+    def update(self, group_name: str, phrases: Dict[str, Dict]) -> int:
+        """
+        合并新挖掘的词，词频取历史最大值
+
+        Args:
+            group_name: 群聊名称
+            phrases: PhraseMiner.mine 的结果
+
+        Returns:
+            新增的词数
+        """
+        lexicon = self.groups.setdefault(group_name, {})
+        added = 0
+        for word, info in phrases.items():
+            if word not in lexicon:
+                added += 1
+            lexicon[word] = max(lexicon.get(word, 0), info['count'])
+        return added
+
+    def save(self) -> None:
+        """写回文件"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.groups, f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def main():
+    """命令行: 从文本文件挖掘新词"""
+    parser = argparse.ArgumentParser(description='群聊新词发现')
+    parser.add_argument('files', nargs='+', help='文本文件（可多个，如一周的聊天记录）')
+    parser.add_argument('--top', type=int, default=30, help='显示前N个新词 (默认: 30)')
+    parser.add_argument('--min-count', type=int, default=PhraseMiner.MIN_COUNT, help='最小词频')
+    args = parser.parse_args()
+
+    texts = []
+    for file_path in args.files:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            texts.extend(f)
+
+    try:
+        from segmenter import get_segmenter
+        known_words = {word for word, freq in get_segmenter().freq.items() if freq}
+    except ImportError:
+        known_words = set()
+
+    phrases = PhraseMiner(min_count=args.min_count).mine(texts, known_words)
+    print(f"[OK] 发现 {len(phrases)} 个新词")
+    for word, info in list(phrases.items())[:args.top]:
+        print(f"  {word:<8} 词频 {info['count']:>4}  凝固度 {info['cohesion']:.2f}  邻字熵 {info['entropy']:.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,297 @@
+"""
+中文分词模块
+基于词典前缀表构建 DAG，用一元语言模型动态规划求最大概率切分
+"""
+
+import argparse
+import math
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Tuple
+
+
+class Segmenter:
+    """词典分词器
+
+    词典文件每行 "词 词频"。内置词典取自 jieba 的一元词频词典（约 8 万个中文词），
+    常用词都能整体切出。加载时把每个词的所有前缀也放进前缀表（词频为0），
+    这样构建 DAG 时从每个位置向后扩展，前缀不在表中即可停止。
+    中文片段按最大概率路径切分；英文单词和数字整体保留；标点、表情等丢弃。
+    词典没收录的字不做合并、保持单字，群聊里的新词靠 PhraseMiner 挖出后
+    用 with_words 加进来，避免把相邻单字拼成"龄认证"这类半截词。
+    """
+
+    DICT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'segmenter_dict.txt')
+
+    # 中文片段 | 英文单词（允许 C++、gpt-4o、node.js 这类写法） | 数字
+    BLOCK_PATTERN = re.compile(
+        r'([\u4e00-\u9fff]+)|([a-zA-Z][a-zA-Z0-9+#]*(?:[.\-][a-zA-Z0-9]+)*|\d+(?:\.\d+)?)'
+    )
+
+    # 片段切分结果缓存上限（群聊里重复的短句很多）
+    CACHE_SIZE = 50000
+
+    def __init__(self, dict_file: str = None):
+        """
+        初始化分词器
+
+        Args:
+            dict_file: 词典文件路径，默认使用内置词典
+        """
+        self.freq: Dict[str, int] = {}
+        self.total = 0
+        self._log_prob: Dict[str, float] = {}
+        self._log_total = 0.0
+        self._cache: Dict[str, Tuple[str, ...]] = {}
+        self.load_dict(dict_file or self.DICT_FILE)
+
+    def load_dict(self, dict_file: str) -> int:
+        """
+        加载词典文件（可多次调用叠加）
+
+        Args:
+            dict_file: 词典文件路径
+
+        Returns:
+            加载的词数
+        """
+        count = 0
+        with open(dict_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                parts = line.split()
+                word = parts[0]
+                freq = int(parts[1]) if len(parts) > 1 else 1
+                self._set_word(word, freq)
+                count += 1
+
+        self._refresh_probabilities()
+        return count
+
+    def add_word(self, word: str, freq: int = None) -> None:
+        """
+        加入一个词（如群聊新词）
+
+        Args:
+            word: 词
+            freq: 词频，默认取刚好能让这个词整体切出的值
+        """
+        if freq is None:
+            freq = self._suggest_freq(word)
+        self._set_word(word, freq)
+        self._refresh_probabilities()
+
+    def add_words(self, words: Dict[str, int]) -> None:
+        """
+        批量加入词
+
+        Args:
+            words: 词 -> 词频（词频为 None 时自动估计）
+        """
+        for word, freq in words.items():
+            self._set_word(word, freq if freq is not None else self._suggest_freq(word))
+        self._refresh_probabilities()
+
+    def with_words(self, words: Dict[str, int]) -> 'Segmenter':
+        """
+        返回加入了额外词的副本（如某个群聊的新词），不影响当前分词器
+
+        Args:
+            words: 词 -> 词频（词频为 None 时自动估计）
+
+        Returns:
+            新的 Segmenter
+        """
+        segmenter = Segmenter.__new__(Segmenter)
+        segmenter.freq = dict(self.freq)
+        segmenter.total = self.total
+        segmenter._log_prob = self._log_prob
+        segmenter._log_total = self._log_total
+        segmenter._cache = {}
+        segmenter.add_words(words)  # 重新计算概率表，不会改动 self
+        return segmenter
+
+    def _set_word(self, word: str, freq: int) -> None:
+        old = self.freq.get(word, 0)
+        self.freq[word] = freq
+        self.total += freq - old
+        for i in range(1, len(word)):
+            self.freq.setdefault(word[:i], 0)
+
+    def _suggest_freq(self, word: str) -> int:
+        """使整词概率不低于按现有词典切开后的概率"""
+        if not self.total:
+            return 1
+        log_prob = sum(self._log_prob.get(piece, -self._log_total) for piece in self._cut_chinese(word))
+        return max(1, int(math.exp(log_prob) * self.total) + 1)
+
+    def _refresh_probabilities(self) -> None:
+        self._log_total = math.log(self.total) if self.total > 0 else 0.0
+        self._log_prob = {
+            word: math.log(freq) - self._log_total
+            for word, freq in self.freq.items() if freq > 0
+        }
+        self._cache.clear()
+
+    def cut(self, text: str) -> List[str]:
+        """
+        切分一段文本
+
+        Args:
+            text: 文本
+
+        Returns:
+            词列表
+        """
+        words = []
+        cache = self._cache
+        for match in self.BLOCK_PATTERN.finditer(text):
+            chinese, other = match.groups()
+            if other:
+                words.append(other)
+                continue
+
+            pieces = cache.get(chinese)
+            if pieces is None:
+                pieces = self._cut_chinese(chinese)
+                if len(cache) >= self.CACHE_SIZE:
+                    cache.clear()
+                cache[chinese] = pieces
+            words.extend(pieces)
+        return words
+
+    def cut_batch(self, texts: Iterable[str]) -> List[List[str]]:
+        """
+        批量切分（如一个会话的全部消息），共享片段缓存
+
+        Args:
+            texts: 文本序列
+
+        Returns:
+            每段文本的词列表
+        """
+        cut = self.cut
+        return [cut(text) for text in texts]
+
+    def _cut_chinese(self, sentence: str) -> Tuple[str, ...]:
+        """对纯中文片段求最大概率切分"""
+        n = len(sentence)
+        if n == 1:
+            return (sentence,)
+
+        freq = self.freq
+        log_prob = self._log_prob
+        unknown = -self._log_total  # 未登录单字按词频1计算
+
+        # DAG: 每个起点可以到达的词尾位置
+        dag = []
+        for start in range(n):
+            ends = []
+            end = start + 1
+            fragment = sentence[start]
+            while fragment in freq:
+                if freq[fragment]:
+                    ends.append(end)
+                end += 1
+                if end > n:
+                    break
+                fragment = sentence[start:end]
+            dag.append(ends or [start + 1])
+
+        # 从右向左动态规划
+        best = [0.0] * (n + 1)
+        route = [0] * n
+        for start in range(n - 1, -1, -1):
+            best_score = None
+            for end in dag[start]:
+                score = log_prob.get(sentence[start:end], unknown) + best[end]
+                if best_score is None or score > best_score:
+                    best_score = score
+                    route[start] = end
+            best[start] = best_score
+
+        # 未登录字保持单字（群内新词由 PhraseMiner 挖出后经 with_words 加入）
+        pieces = []
+        start = 0
+        while start < n:
+            end = route[start]
+            pieces.append(sentence[start:end])
+            start = end
+        return tuple(pieces)
+
+
+_default_segmenter = None
+
+
+def get_segmenter() -> Segmenter:
+    """获取共享的默认分词器（首次调用时加载内置词典）"""
+    global _default_segmenter
+    if _default_segmenter is None:
+        _default_segmenter = Segmenter()
+    return _default_segmenter
+
+
+def benchmark(texts: List[str], repeat: int = 3) -> List[Tuple[str, float, int]]:
+    """
+    与原有的正则/空格切分做对比
+
+    Args:
+        texts: 消息文本列表
+        repeat: 重复次数，取最快一次
+
+    Returns:
+        [(名称, 耗时秒, 产出词数)]
+    """
+    han_or_latin = re.compile(r'[\u4e00-\u9fff]+|[a-zA-Z]+')
+    han_run = re.compile(r'[\u4e00-\u9fff]{2,6}')
+    non_word = re.compile(r'[^\w\s]')
+
+    candidates = [
+        ('空格切分 (TopicAnalyzer)', lambda: [non_word.sub(' ', t).split() for t in texts]),
+        ('[\\u4e00-\\u9fff]+|[a-zA-Z]+ (ChatAnalyzer)', lambda: [han_or_latin.findall(t) for t in texts]),
+        ('[\\u4e00-\\u9fff]{2,6} (Antigravity)', lambda: [han_run.findall(t) for t in texts]),
+        ('Segmenter.cut_batch (冷缓存)', lambda: Segmenter().cut_batch(texts)),
+        ('Segmenter.cut_batch (热缓存)', lambda: segmenter.cut_batch(texts)),
+    ]
+    segmenter = Segmenter()
+    segmenter.cut_batch(texts)
+
+    results = []
+    for name, run in candidates:
+        elapsed = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = run()
+            spent = time.perf_counter() - started
+            elapsed = spent if elapsed is None else min(elapsed, spent)
+        results.append((name, elapsed, sum(len(words) for words in output)))
+    return results
+
+
+def main():
+    """命令行: 切分文本或运行性能对比"""
+    parser = argparse.ArgumentParser(description='中文分词 / 分词性能对比')
+    parser.add_argument('text', nargs='?', help='要切分的文本')
+    parser.add_argument('--bench', metavar='FILE', help='用文本文件（每行一条消息）做性能对比')
+    parser.add_argument('--repeat', type=int, default=3, help='性能对比重复次数 (默认: 3)')
+    args = parser.parse_args()
+
+    if args.bench:
+        with open(args.bench, 'r', encoding='utf-8') as f:
+            texts = [line.strip() for line in f if line.strip()]
+        chars = sum(len(t) for t in texts)
+        print(f"[BENCH] {len(texts)} 行, {chars} 字")
+        for name, elapsed, word_count in benchmark(texts, args.repeat):
+            speed = chars / elapsed / 1e6 if elapsed else float('inf')
+            print(f"  {name:<45} {elapsed * 1000:8.1f} ms  {speed:6.2f} M字/秒  {word_count} 词")
+        return
+
+    text = args.text or '我在小红书卖出了两份HTML互动网页，发现大家比较喜欢这一类'
+    print(' / '.join(get_segmenter().cut(text)))
+
+
+if __name__ == '__main__':
+    main()
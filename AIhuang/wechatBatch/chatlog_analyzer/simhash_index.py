@@ -0,0 +1,421 @@
+"""
+转发内容识别模块
+给每条有实质内容的消息计算 64 位 SimHash 指纹，存进分段索引，
+跨群聊、跨日期找出被转发到多个群的同一篇内容（允许少量改动）
+"""
+
+import hashlib
+import json
+import os
+import re
+from array import array
+from collections import defaultdict
+from datetime import datetime, timedelta
+from itertools import compress, repeat
+from operator import getitem, xor
+from typing import Dict, Iterable, List, Set, Tuple
+
+# 指纹位数
+FINGERPRINT_BITS = 64
+
+# 计数槽位宽：每一位的计数占 16 位（特征数不超过 SimHasher.MAX_LENGTH，不会溢出）
+_LANE = 16
+_LANE_MASK = (1 << _LANE) - 1
+
+# 哈希第 k 个字节的值 -> 该字节 8 位在第 8k..8k+7 个计数槽上的展开
+_BYTE_LANES = [
+    [
+        sum(1 << ((position * 8 + bit) * _LANE) for bit in range(8) if value >> bit & 1)
+        for value in range(256)
+    ]
+    for position in range(FINGERPRINT_BITS // 8)
+]
+
+# 归一化时去掉的空白和标点
+_NOISE = re.compile(r'[\W_]+')
+
+
+def normalize_text(text: str) -> str:
+    """去掉空白和标点并转小写，转发时加减的空格、换行和标点不影响指纹"""
+    return _NOISE.sub('', text or '').lower()
+
+
+def format_message_time(timestamp) -> str:
+    """消息时间统一成 'YYYY-MM-DD HH:MM'"""
+    if isinstance(timestamp, (int, float)):
+        return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+    return str(timestamp or '')[:16]
+
+
+# 整数中 1 的个数（Python 3.10 起有 int.bit_count）
+_popcount = getattr(int, 'bit_count', None) or (lambda value: bin(value).count('1'))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个指纹的汉明距离"""
+    return _popcount(a ^ b)
+
+
+class SimHasher:
+    """SimHash 指纹
+
+    特征是归一化文本的字符 2-gram（重复出现的按次数计）。改一个字只影响
+    两个特征，比 3-gram 更能容忍转发时的小改动。每个特征的 64 位
+    哈希预先展开成"每位一个 16 位计数槽"的大整数并缓存，一条消息的 64 个
+    计数就只是一串大整数加法（在 C 层完成），不需要逐位循环。
+    """
+
+    SHINGLE_SIZE = 2
+
+    # 只看前这么多个字符（足以区分内容，也保证计数槽不溢出）
+    MAX_LENGTH = 4096
+
+    # 特征展开缓存上限（超过后清空）
+    MAX_CACHE = 200000
+
+    def __init__(self):
+        """初始化"""
+        self._spreads: Dict[str, int] = {}
+
+    def fingerprint(self, text: str) -> int:
+        """
+        计算指纹
+
+        Args:
+            text: 归一化后的文本（normalize_text 的结果）
+
+        Returns:
+            64 位指纹
+        """
+        n = self.SHINGLE_SIZE
+        text = text[:self.MAX_LENGTH]
+        grams = [text[i:i + n] for i in range(len(text) - n + 1)] or [text]
+
+        spreads = self._spreads
+        if len(spreads) > self.MAX_CACHE:
+            spreads.clear()
+        for gram in grams:
+            if gram not in spreads:
+                spreads[gram] = self._spread(gram)
+        total = sum(map(spreads.__getitem__, grams))
+
+        # 某一位上过半数的特征为 1，指纹的这一位就取 1
+        lanes = array('H', total.to_bytes(FINGERPRINT_BITS * _LANE // 8, 'little'))
+        return sum(1 << bit for bit, count in enumerate(lanes) if count * 2 > len(grams))
+
+    @staticmethod
+    def _spread(gram: str) -> int:
+        """特征哈希的每一位展开到各自的计数槽"""
+        digest = hashlib.blake2b(gram.encode('utf-8'), digest_size=FINGERPRINT_BITS // 8).digest()
+        return sum(map(getitem, _BYTE_LANES, digest))
+
+
+class SimHashIndex:
+    """持久化的转发内容指纹索引
+
+    每个"文档"是一个群聊的一天（doc_id 形如 '群聊名称|2025-12-09'），
+    其中有实质内容的消息各记一条指纹。64 位指纹切成 8 段、每段 8 位，
+    每段一个哈希表，查询只比较至少有一段完全相同的候选，而不是整个索引：
+    汉明距离不超过 7 的两个指纹必然有一段相同，相差 8 位的也有 99.6%
+    的概率有一段相同，所以 MAX_DISTANCE 取 8。
+    改动两个字的转发内容，百字左右的约九成、150 字以上的几乎都能认出，
+    四五十字的短消息只有一半左右；不相关的内容一般相差 15 位以上。
+    相互接近的指纹用并查集归成一组，一组就是同一篇被转发的内容；
+    分组随索引一起保存，加载时不必重新查询。
+
+    磁盘格式（JSON）：
+        version  格式版本（指纹算法变化时递增，旧版本文件直接忽略）
+        doc_ids  已收录的文档
+        entries  [十六进制指纹, doc_id, 群聊, 日期, 时间, 发送者, 内容预览, 组代表序号]
+    """
+
+    VERSION = 2
+
+    BANDS = 8
+    BAND_BITS = FINGERPRINT_BITS // BANDS
+    MAX_DISTANCE = 8
+
+    # 归一化后至少这么长才算有实质内容（"收到""好的"之类不参与）
+    MIN_LENGTH = 30
+
+    # 只保留最近这么多天的指纹
+    RETENTION_DAYS = 14
+
+    PREVIEW_LENGTH = 80
+
+    def __init__(self, path: str = None):
+        """
+        初始化索引
+
+        Args:
+            path: 存储文件路径（None 表示只在内存中使用）
+        """
+        self.path = path
+        self.hasher = SimHasher()
+        self.doc_ids: Set[str] = set()
+        self.fingerprints: List[int] = []
+        self.entries: List[Dict] = []
+        # 每段一个哈希表：段值 -> (条目ID数组, 指纹数组)，查询时整桶在 C 层比较
+        self.bands: List[Dict[int, Tuple[array, array]]] = [
+            defaultdict(lambda: (array('L'), array('Q'))) for _ in range(self.BANDS)
+        ]
+        self.parent: List[int] = []
+        # 组代表 -> 组内条目；doc_id -> 条目
+        self.groups: Dict[int, List[int]] = {}
+        self.doc_entries: Dict[str, List[int]] = defaultdict(list)
+        # 本次运行中每条指纹对应的原文（不落盘，用于在话题里认出转发内容）
+        self.texts: Dict[int, str] = {}
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: str) -> 'SimHashIndex':
+        """
+        从文件加载索引，文件不存在时返回空索引
+
+        Args:
+            path: 存储文件路径
+
+        Returns:
+            SimHashIndex
+        """
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != cls.VERSION:
+            # 指纹算法不同，旧指纹无法与新指纹比较，重新开始
+            return index
+
+        index.doc_ids = set(data.get('doc_ids', []))
+        for row in data.get('entries', []):
+            fingerprint, doc_id, group, date, time, user, preview = row[:7]
+            entry = {
+                'doc_id': doc_id, 'group': group, 'date': date,
+                'time': time, 'user': user, 'preview': preview
+            }
+            root = row[7]
+            if 0 <= root < len(index.entries) and index.parent[root] == root:
+                index._append(int(fingerprint, 16), entry, root)
+            else:
+                index._append(int(fingerprint, 16), entry)
+        return index
+
+    def save(self, path: str = None) -> None:
+        """
+        写回文件（先写临时文件再替换），超过保留天数的指纹不再写入
+
+        Args:
+            path: 存储文件路径，默认使用加载时的路径
+        """
+        path = path or self.path
+        if not path:
+            raise ValueError("未指定指纹索引文件路径")
+
+        cutoff = self._cutoff_date()
+        rows = []
+        # 组代表 -> 该组第一条保留下来的条目在新列表中的序号
+        saved_roots = {}
+        for entry_id, (fingerprint, entry) in enumerate(zip(self.fingerprints, self.entries)):
+            if entry['date'][:10] < cutoff:
+                continue
+            root = saved_roots.setdefault(self._find(entry_id), len(rows))
+            rows.append([
+                format(fingerprint, '016x'), entry['doc_id'], entry['group'],
+                entry['date'], entry['time'], entry['user'], entry['preview'], root
+            ])
+        data = {
+            'version': self.VERSION,
+            'doc_ids': sorted(d for d in self.doc_ids if d.rpartition('|')[2][:10] >= cutoff),
+            'entries': rows
+        }
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self.path = path
+        self._dirty = False
+
+    @property
+    def dirty(self) -> bool:
+        """是否有未保存的更新"""
+        return self._dirty
+
+    def add_document(self, doc_id: str, group_name: str, date: str, messages: Iterable[Dict]) -> int:
+        """
+        为一个群聊一天的消息建立指纹
+
+        同一个 doc_id 重复加入时不会重复记录，只把原文重新对应到已有指纹上。
+
+        Args:
+            doc_id: 文档ID
+            group_name: 群聊名称
+            date: 日期 (YYYY-MM-DD)
+            messages: 原始消息列表
+
+        Returns:
+            新记录的指纹数
+        """
+        known = doc_id in self.doc_ids
+        added = 0
+        for msg in messages:
+            content = msg.get('content') or msg.get('message') or msg.get('text', '')
+            if not isinstance(content, str):
+                continue
+            normalized = normalize_text(content)
+            if len(normalized) < self.MIN_LENGTH:
+                continue
+
+            fingerprint = self.hasher.fingerprint(normalized)
+            if known:
+                entry_id = next(
+                    (i for i in self.doc_entries.get(doc_id, ()) if self.fingerprints[i] == fingerprint),
+                    None
+                )
+                if entry_id is None:
+                    continue
+            else:
+                entry_id = self._insert(fingerprint, {
+                    'doc_id': doc_id,
+                    'group': group_name,
+                    'date': date,
+                    'time': format_message_time(msg.get('timestamp') or msg.get('time') or msg.get('date')),
+                    'user': msg.get('user') or msg.get('sender') or msg.get('from', ''),
+                    'preview': ' '.join(content.split())[:self.PREVIEW_LENGTH]
+                })
+                added += 1
+            self.texts[entry_id] = content
+
+        if not known:
+            self.doc_ids.add(doc_id)
+            self._dirty = True
+        return added
+
+    def query(self, fingerprint: int) -> List[int]:
+        """
+        查找与指纹的汉明距离不超过 MAX_DISTANCE 的条目
+
+        Args:
+            fingerprint: 64 位指纹
+
+        Returns:
+            条目ID列表
+        """
+        matches = set()
+        close_enough = self.MAX_DISTANCE.__ge__
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            bucket = self.bands[band].get(key)
+            if bucket:
+                entry_ids, fingerprints = bucket
+                distances = map(_popcount, map(xor, repeat(fingerprint), fingerprints))
+                matches.update(compress(entry_ids, map(close_enough, distances)))
+        return sorted(matches)
+
+    def cross_posted(self, doc_ids: Iterable[str], min_groups: int = 2) -> List[Dict]:
+        """
+        涉及给定文档、且出现在至少 min_groups 个群聊中的转发内容
+
+        Args:
+            doc_ids: 本次分析的文档ID
+            min_groups: 最少群聊数
+
+        Returns:
+            [{'preview', 'first_seen', 'groups': [{'name', 'date', 'time', 'count'}],
+              'group_count', 'message_count', 'texts'}]，按群聊数从多到少排序；
+            texts 是本次运行中属于这条内容的原文
+        """
+        # 只看本次文档的条目所在的组，不遍历整个索引
+        roots = {self._find(i) for doc_id in set(doc_ids) for i in self.doc_entries.get(doc_id, ())}
+
+        results = []
+        for root in roots:
+            entry_ids = sorted(self.groups[root], key=lambda i: (self.entries[i]['date'], self.entries[i]['time']))
+            groups = {}
+            for entry_id in entry_ids:
+                entry = self.entries[entry_id]
+                spread = groups.get(entry['group'])
+                if spread is None:
+                    spread = groups[entry['group']] = {
+                        'name': entry['group'], 'date': entry['date'], 'time': entry['time'], 'count': 0
+                    }
+                spread['count'] += 1
+            if len(groups) < min_groups:
+                continue
+
+            spread = list(groups.values())
+            results.append({
+                'preview': self.entries[entry_ids[0]]['preview'],
+                'first_seen': spread[0],
+                'groups': spread,
+                'group_count': len(spread),
+                'message_count': len(entry_ids),
+                'texts': [self.texts[i] for i in entry_ids if i in self.texts]
+            })
+
+        results.sort(key=lambda item: (item['group_count'], item['message_count']), reverse=True)
+        return results
+
+    def _insert(self, fingerprint: int, entry: Dict) -> int:
+        """加入一条指纹，并与已有的相近指纹归为一组"""
+        matches = self.query(fingerprint)
+        entry_id = self._append(fingerprint, entry)
+        for match in matches:
+            self._union(entry_id, match)
+        return entry_id
+
+    def _append(self, fingerprint: int, entry: Dict, root: int = None) -> int:
+        """
+        加入一条指纹，不做查询
+
+        Args:
+            fingerprint: 64 位指纹
+            entry: 条目信息
+            root: 所属组的代表条目（已保存的分组），None 表示自成一组
+        """
+        entry_id = len(self.entries)
+        if root is None:
+            root = entry_id
+        self.fingerprints.append(fingerprint)
+        self.entries.append(entry)
+        self.parent.append(root)
+        self.groups.setdefault(root, []).append(entry_id)
+        self.doc_entries[entry['doc_id']].append(entry_id)
+        for band, key in enumerate(self._band_keys(fingerprint)):
+            entry_ids, fingerprints = self.bands[band][key]
+            entry_ids.append(entry_id)
+            fingerprints.append(fingerprint)
+        return entry_id
+
+    def _band_keys(self, fingerprint: int) -> List[int]:
+        """指纹切成 BANDS 段"""
+        mask = (1 << self.BAND_BITS) - 1
+        return [fingerprint >> (band * self.BAND_BITS) & mask for band in range(self.BANDS)]
+
+    def _find(self, entry_id: int) -> int:
+        """并查集：所属组的代表条目（路径减半）"""
+        parent = self.parent
+        while parent[entry_id] != entry_id:
+            parent[entry_id] = parent[parent[entry_id]]
+            entry_id = parent[entry_id]
+        return entry_id
+
+    def _union(self, a: int, b: int) -> None:
+        """并查集：合并两组，较早的条目做代表"""
+        root_a, root_b = self._find(a), self._find(b)
+        if root_a != root_b:
+            keep, drop = min(root_a, root_b), max(root_a, root_b)
+            self.parent[drop] = keep
+            self.groups[keep].extend(self.groups.pop(drop))
+
+    def _cutoff_date(self) -> str:
+        """保留期的起始日期（以索引里最新的日期为准）"""
+        dates = [entry['date'][:10] for entry in self.entries]
+        if not dates:
+            return ''
+        try:
+            newest = datetime.strptime(max(dates), '%Y-%m-%d')
+        except ValueError:
+            return ''
+        return (newest - timedelta(days=self.RETENTION_DAYS)).strftime('%Y-%m-%d')
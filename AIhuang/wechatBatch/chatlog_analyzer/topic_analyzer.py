@@ -3,12 +3,25 @@
 对聊天记录进行智能分析，提取话题
 """
 
+from array import array
 from datetime import datetime, timedelta
 from typing import List, Dict, Tuple, Set
 from collections import defaultdict, Counter
-import re
 import statistics
 
+try:
+    from .keyword_index import KeywordIndex
+    from .segmenter import Segmenter, get_segmenter
+    from .matcher import KeywordMatcher
+    from .interaction import InteractionMatrix, encode_senders
+    from .link_index import extract_link_pairs, strip_links
+except ImportError:
+    from keyword_index import KeywordIndex
+    from segmenter import Segmenter, get_segmenter
+    from matcher import KeywordMatcher
+    from interaction import InteractionMatrix, encode_senders
+    from link_index import extract_link_pairs, strip_links
+
 
 class TopicAnalyzer:
     """话题分析器"""
@@ -34,20 +47,40 @@ class TopicAnalyzer:
         'decision': 2.3,  # 决策
     }
 
-    def __init__(self):
-        """初始化分析器"""
+    # 问题/讨论指示词
+    QUESTION_INDICATORS = ['?', '？', '怎么', '如何', '为什么', '什么', 'how', 'why', 'what']
+
+    # 停用词
+    STOP_WORDS = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '得', '之', '与', '能', '下', '而', '为', '以', '他', '时', '用', '什', '么', '想', '她', '中', '么', '可', '我们', '他们', '她们', '它们', '这个', '那个', '这里', '那里'}
+
+    def __init__(self, keyword_index: KeywordIndex = None):
+        """
+        初始化分析器
+
+        Args:
+            keyword_index: 跨群聊/日期的关键词语料库，提供时关键词按 BM25 打分，
+                否则按窗口内词频
+        """
         self.time_window = self.TIME_WINDOW
+        self.keyword_index = keyword_index
+        self.last_document_terms: List[str] = []
+        self.question_matcher = KeywordMatcher(self.QUESTION_INDICATORS, ignore_case=True)
+        self.user_names: List[str] = []
 
-    def analyze_chat_data(self, messages: List[Dict]) -> Dict:
+    def analyze_chat_data(self, messages: List[Dict], doc_id: str = None, lexicon: Dict[str, int] = None) -> Dict:
         """
         分析聊天数据，提取话题
 
         Args:
             messages: 消息列表
+            doc_id: 语料库文档ID（如 '群聊名称|2025-12-09'），提供时先把这一天
+                加入语料库
+            lexicon: 群聊新词 -> 词频，分词时作为额外词典
 
         Returns:
             分析结果
         """
+        self.last_document_terms = []
         if not messages:
             return {
                 'topics': [],
@@ -56,17 +89,33 @@ class TopicAnalyzer:
                 'time_range': None
             }
 
+        # 群聊新词只对这个群聊生效：分词器只在这次调用里使用，逐层传下去
+        segmenter = get_segmenter().with_words(lexicon) if lexicon else get_segmenter()
+
         # 预处理消息
         processed_messages = self._preprocess_messages(messages)
 
+        # 发言人编码成整数ID，会话和全天的互动矩阵共用一套ID
+        sender_ids, self.user_names = encode_senders(msg['user'] for msg in processed_messages)
+        for msg, sender_id in zip(processed_messages, sender_ids):
+            msg['user_id'] = sender_id
+
+        # 把这一天加入语料库（重复分析同一天不会重复计数；没有词的一天不收录，
+        # 这样 last_document_terms 为空就表示语料库没有变化）
+        if self.keyword_index is not None and doc_id:
+            terms = self._tokenize(processed_messages, segmenter)
+            if terms and self.keyword_index.add_document(doc_id, terms):
+                self.last_document_terms = terms
+
         # 按时间分组
         time_groups = self._group_by_time(processed_messages)
 
         # 提取话题
-        topics = self._extract_topics(time_groups)
+        topics = self._extract_topics(time_groups, segmenter)
 
         # 计算统计信息
         stats = self._calculate_stats(messages, processed_messages)
+        stats['interaction'] = InteractionMatrix(sender_ids, len(self.user_names)).summary(self.user_names)
 
         return {
             'topics': topics,
@@ -120,6 +169,9 @@ class TopicAnalyzer:
                     'timestamp': dt,
                     'user': user,
                     'content': content,
+                    # 分词用去掉链接的文本，链接单独提取为 (规范化链接, 原始链接)
+                    'text': strip_links(content),
+                    'links': extract_link_pairs(content),
                     'original': msg
                 })
             except Exception:
@@ -160,12 +212,13 @@ class TopicAnalyzer:
 
         return groups
 
-    def _extract_topics(self, time_groups: Dict[datetime, List[Dict]]) -> List[Dict]:
+    def _extract_topics(self, time_groups: Dict[datetime, List[Dict]], segmenter: Segmenter) -> List[Dict]:
         """
         从时间组中提取话题
 
         Args:
             time_groups: 时间分组
+            segmenter: 分词器（含群聊新词）
 
         Returns:
             话题列表
@@ -177,7 +230,7 @@ class TopicAnalyzer:
                 continue
 
             # 分析话题
-            topic = self._analyze_window(window_time, window_messages)
+            topic = self._analyze_window(window_time, window_messages, segmenter)
             if topic:
                 topics.append(topic)
 
@@ -186,22 +239,24 @@ class TopicAnalyzer:
 
         return topics[:3]
 
-    def _analyze_window(self, window_time: datetime, messages: List[Dict]) -> Dict:
+    def _analyze_window(self, window_time: datetime, messages: List[Dict], segmenter: Segmenter) -> Dict:
         """
         分析单个时间窗口
 
         Args:
             window_time: 窗口时间
             messages: 窗口内的消息
+            segmenter: 分词器（含群聊新词）
 
         Returns:
             话题信息
         """
         # 提取关键词
-        keywords = self._extract_keywords(messages)
+        keywords = self._extract_keywords(messages, segmenter)
 
-        # 计算参与者
-        participants = list(set(msg['user'] for msg in messages))
+        # 互动矩阵（参与者、轮次等都从矩阵读出）
+        interaction = InteractionMatrix(array('i', (msg['user_id'] for msg in messages)), len(self.user_names))
+        participants = [self.user_names[sender_id] for sender_id in interaction.message_counts]
 
         # 生成标题
         title = self._generate_title(keywords, messages)
@@ -210,7 +265,7 @@ class TopicAnalyzer:
         summary = self._generate_summary(messages)
 
         # 计算评分
-        score = self._calculate_topic_score(messages, keywords, participants)
+        score = self._calculate_topic_score(messages, keywords, interaction)
 
         return {
             'title': title,
@@ -221,42 +276,72 @@ class TopicAnalyzer:
             'message_count': len(messages),
             'participant_count': len(participants),
             'participants': participants,
+            'interaction': interaction.summary(self.user_names),
+            'links': self._top_links(messages),
             'score': score,
             'messages': [msg['original'] for msg in messages]
         }
 
-    def _extract_keywords(self, messages: List[Dict]) -> List[str]:
+    @staticmethod
+    def _top_links(messages: List[Dict], top_n: int = 3) -> List[str]:
+        """
+        话题中分享最多的链接
+
+        按规范化链接计数，返回第一次分享时的原始链接（用于展示和跳转）
+        """
+        counts = Counter()
+        shared = {}
+        for msg in messages:
+            for link, url in msg['links']:
+                counts[link] += 1
+                shared.setdefault(link, url)
+        return [shared[link] for link, _ in counts.most_common(top_n)]
+
+    def _extract_keywords(self, messages: List[Dict], segmenter: Segmenter) -> List[str]:
         """
         提取关键词
 
         Args:
             messages: 消息列表
+            segmenter: 分词器（含群聊新词）
 
         Returns:
             关键词列表
         """
-        # 合并所有文本
-        text = ' '.join(msg['content'] for msg in messages)
-
-        # 清理文本
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text).lower()
-
-        # 分词
-        words = text.split()
-
-        # 过滤停用词和短词
-        stop_words = {'的', '了', '在', '是', '我', '有', '和', '就', '不', '人', '都', '一', '一个', '上', '也', '很', '到', '说', '要', '去', '你', '会', '着', '没有', '看', '好', '自己', '这', '那', '得', '之', '与', '能', '下', '而', '为', '以', '他', '时', '用', '什', '么', '想', '她', '中', '么', '可', '我们', '他们', '她们', '它们', '这个', '那个', '这里', '那里'}
-        words = [w for w in words if len(w) >= 2 and w not in stop_words]
-
         # 统计词频
-        word_counts = Counter(words)
+        word_counts = Counter(self._tokenize(messages, segmenter))
+
+        # 有语料库时按 BM25 打分，压低各个群里都常见的词
+        if self.keyword_index is not None:
+            return self.keyword_index.top_keywords(word_counts, 5)
 
         # 获取高频词作为关键词
         keywords = [word for word, count in word_counts.most_common(5)]
 
         return keywords
 
+    def _tokenize(self, messages: List[Dict], segmenter: Segmenter) -> List[str]:
+        """
+        分词并过滤停用词、短词和纯数字（"12""08" 这类时间、序号不是关键词）
+
+        Args:
+            messages: 消息列表
+            segmenter: 分词器（含群聊新词）
+
+        Returns:
+            词列表
+        """
+        # 按消息批量分词（中文按词典切分，英文单词整体保留）
+        words = []
+        for message_words in segmenter.cut_batch(msg['text'] for msg in messages):
+            words.extend(message_words)
+
+        words = [w.lower() for w in words]
+        return [
+            w for w in words
+            if len(w) >= 2 and w not in self.STOP_WORDS and not w.replace('.', '', 1).isdigit()
+        ]
+
     def _generate_title(self, keywords: List[str], messages: List[Dict]) -> str:
         """
         生成话题标题
@@ -277,11 +362,8 @@ class TopicAnalyzer:
         title_keywords = keywords[:3]
         title = ' · '.join(title_keywords)
 
-        # 检查是否有问题或讨论
-        question_indicators = ['?', '？', '怎么', '如何', '为什么', '什么', '?', 'how', 'why', 'what']
-        content_text = ' '.join(msg['content'] for msg in messages).lower()
-
-        if any(indicator in content_text for indicator in question_indicators):
+        # 检查是否有问题或讨论（逐条扫描，命中即停）
+        if any(self.question_matcher.search(msg['content']) for msg in messages):
             title = f"讨论: {title}"
         else:
             title = f"话题: {title}"
@@ -316,7 +398,7 @@ class TopicAnalyzer:
         self,
         messages: List[Dict],
         keywords: List[str],
-        participants: List[str]
+        interaction: InteractionMatrix
     ) -> float:
         """
         计算话题价值评分
@@ -324,7 +406,7 @@ class TopicAnalyzer:
         Args:
             messages: 消息列表
             keywords: 关键词列表
-            participants: 参与者列表
+            interaction: 话题的互动矩阵
 
         Returns:
             评分（0-10）
@@ -336,7 +418,7 @@ class TopicAnalyzer:
         score += min(msg_count / 10, 3)
 
         # 参与者数量评分（最多2分）
-        participant_count = len(participants)
+        participant_count = interaction.participants
         score += min(participant_count / 5, 2)
 
         # 内容长度评分（最多2分）
@@ -347,18 +429,9 @@ class TopicAnalyzer:
         keyword_score = sum(self.KEYWORD_WEIGHTS.get(kw, 1.0) for kw in keywords)
         score += min(keyword_score / 5, 2)
 
-        # 互动性评分（最多1分）
-        # 计算是否有来回对话
-        unique_users = set(msg['user'] for msg in messages)
-        if len(unique_users) >= 2:
-            # 检查是否有至少2轮对话
-            conversations = 0
-            current_user = None
-            for msg in messages:
-                if msg['user'] != current_user:
-                    conversations += 1
-                    current_user = msg['user']
-            score += min(conversations / 10, 1)
+        # 互动性评分（最多1分）：有来回对话时按发言轮次计分
+        if participant_count >= 2:
+            score += min(interaction.turns / 10, 1)
 
         return min(score, 10)
 
@@ -12,6 +12,38 @@ import math
 logger = logging.getLogger(__name__)
 
 
+class GroupFeatures:
+    """单个消息分组的特征
+
+    一次遍历计算关键词、发言人、字数和时间范围，
+    评分、标题和渲染都读取同一份结果，不再重复提取关键词。
+    """
+
+    __slots__ = ('messages', 'keywords', 'speakers', 'char_count', 'start_time', 'end_time')
+
+    def __init__(self, messages: List[Dict[str, Any]], keywords: List[str], speakers: set,
+                 char_count: int, start_time: datetime, end_time: datetime):
+        self.messages = messages
+        self.keywords = keywords
+        self.speakers = speakers
+        self.char_count = char_count
+        self.start_time = start_time
+        self.end_time = end_time
+
+    @property
+    def message_count(self) -> int:
+        return len(self.messages)
+
+    def time_range(self) -> Dict[str, str]:
+        """{'start': '时间', 'end': '时间'} 字典"""
+        if self.start_time is None:
+            return {'start': '', 'end': ''}
+        return {
+            'start': self.start_time.strftime('%H:%M:%S'),
+            'end': self.end_time.strftime('%H:%M:%S')
+        }
+
+
 class ChatAnalyzer:
     """聊天数据分析器"""
 
@@ -94,39 +126,74 @@ class ChatAnalyzer:
         Returns:
             话题列表（包含标题、摘要、关键词等）
         """
-        # 计算每个分组的分数
+        # 每个分组只计算一次特征，再据此评分
         scored_groups = []
 
         for i, group in enumerate(message_groups):
-            score = self._score_group(group)
-            scored_groups.append((i, group, score))
+            features = self.compute_features(group)
+            scored_groups.append((i, features, self._score_group(features)))
 
         # 按分数排序，获取前top_n
         top_groups = sorted(scored_groups, key=lambda x: x[2], reverse=True)[:top_n]
 
         topics = []
-        for idx, (original_idx, group, score) in enumerate(top_groups):
+        for idx, (original_idx, features, score) in enumerate(top_groups):
             topic = {
                 'order': idx + 1,
                 'original_index': original_idx,
-                'messages': group,
-                'title': self._generate_title(group),
-                'summary': self._generate_summary(group),
-                'keywords': self._extract_keywords(group),
+                'messages': features.messages,
+                'title': self._generate_title(features),
+                'summary': self._generate_summary(features.messages),
+                'keywords': features.keywords,
                 'stats': {
-                    'message_count': len(group),
-                    'unique_speakers': len(set(m.get('user', 'unknown') for m in group)),
-                    'char_count': sum(len(m.get('content', '')) for m in group),
+                    'message_count': features.message_count,
+                    'unique_speakers': len(features.speakers),
+                    'char_count': features.char_count,
                     'score': round(score, 2)
                 },
-                'time_range': self._get_time_range(group)
+                'time_range': features.time_range()
             }
             topics.append(topic)
 
         logger.info(f"提取了 {len(topics)} 个话题")
         return topics
 
-    def _score_group(self, group: List[Dict[str, Any]]) -> float:
+    def compute_features(self, group: List[Dict[str, Any]]) -> GroupFeatures:
+        """一次遍历计算消息分组的特征
+
+        Args:
+            group: 消息分组
+
+        Returns:
+            GroupFeatures
+        """
+        texts = []
+        speakers = set()
+        char_count = 0
+        start_time = end_time = None
+
+        for msg in group:
+            content = msg.get('content', '')
+            texts.append(content)
+            char_count += len(content)
+            speakers.add(msg.get('user', 'unknown'))
+
+            msg_time = self._get_message_time(msg)
+            if start_time is None or msg_time < start_time:
+                start_time = msg_time
+            if end_time is None or msg_time > end_time:
+                end_time = msg_time
+
+        return GroupFeatures(
+            messages=group,
+            keywords=self._keywords_from_text(" ".join(texts)),
+            speakers=speakers,
+            char_count=char_count,
+            start_time=start_time,
+            end_time=end_time
+        )
+
+    def _score_group(self, features: GroupFeatures) -> float:
         """计算消息分组的分数
 
         基于：
@@ -136,42 +203,40 @@ class ChatAnalyzer:
         - 关键词数量（权重：0.2）
 
         Args:
-            group: 消息分组
+            features: 消息分组的特征
 
         Returns:
             分数（0-100）
         """
-        if not group:
+        if not features.messages:
             return 0
 
         # 消息数量分数 (最多10条为满分)
-        message_score = min(len(group) / 10, 1.0) * 30
+        message_score = min(features.message_count / 10, 1.0) * 30
 
         # 文本长度分数 (最多500字为满分)
-        total_chars = sum(len(m.get('content', '')) for m in group)
-        length_score = min(total_chars / 500, 1.0) * 30
+        length_score = min(features.char_count / 500, 1.0) * 30
 
         # 参与者多样性分数
-        speakers = set(m.get('user', 'unknown') for m in group)
-        diversity_score = min(len(speakers) / 5, 1.0) * 20
+        diversity_score = min(len(features.speakers) / 5, 1.0) * 20
 
         # 关键词分数
-        keywords = self._extract_keywords(group)
-        keyword_score = min(len(keywords) / 5, 1.0) * 20
+        keyword_score = min(len(features.keywords) / 5, 1.0) * 20
 
         return message_score + length_score + diversity_score + keyword_score
 
-    def _generate_title(self, group: List[Dict[str, Any]]) -> str:
+    def _generate_title(self, features: GroupFeatures) -> str:
         """生成话题标题
 
         Args:
-            group: 消息分组
+            features: 消息分组的特征
 
         Returns:
             话题标题
         """
         # 从关键词生成标题
-        keywords = self._extract_keywords(group)
+        keywords = features.keywords
+        group = features.messages
 
         if keywords:
             return f"话题：{' · '.join(keywords[:2])}"
@@ -234,7 +299,10 @@ class ChatAnalyzer:
         """
         # 合并所有文本
         all_text = " ".join(m.get('content', '') for m in group)
+        return self._keywords_from_text(all_text, top_n)
 
+    def _keywords_from_text(self, all_text: str, top_n: int = 5) -> List[str]:
+        """从合并后的文本提取关键词"""
         # 分词（简单方式：按空格和标点符号分割）
         # 对于真实应用，应该使用专业的中文分词库如jieba
         words = re.findall(r'[\u4e00-\u9fff]+|[a-zA-Z]+', all_text)
@@ -259,27 +327,6 @@ class ChatAnalyzer:
 
         return [word for word, _ in sorted_keywords]
 
-    def _get_time_range(self, group: List[Dict[str, Any]]) -> Dict[str, str]:
-        """获取消息分组的时间范围
-
-        Args:
-            group: 消息分组
-
-        Returns:
-            {'start': '时间', 'end': '时间'} 字典
-        """
-        if not group:
-            return {'start': '', 'end': ''}
-
-        times = [self._get_message_time(m) for m in group]
-        start_time = min(times)
-        end_time = max(times)
-
-        return {
-            'start': start_time.strftime('%H:%M:%S'),
-            'end': end_time.strftime('%H:%M:%S')
-        }
-
     @staticmethod
     def _get_message_time(message: Dict[str, Any]) -> datetime:
         """从消息字典中提取时间
@@ -7,106 +7,435 @@
 import os
 import sys
 import json
+import mmap
 import re
 import argparse
+from array import array
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 from collections import defaultdict, Counter
 
 
-class RealChatlogReader:
-    """真实聊天记录读取器"""
+class ChatlogArchive:
+    """导出聊天记录目录 - 按 (群聊, 日期) 建索引的离线数据源
+
+    递归扫描目录下的 .txt / .json 文本导出文件，用文件 mtime 判断是否需要重新
+    索引。每个文件只做一次 mmap + 正则扫描，记录每个日期对应的字节区间；
+    读取时只解析需要的区间。对外提供与 ChatlogMCPClient 相同的
+    get_chatlog(group_name, date) 接口，date 支持 'YYYY-MM-DD~YYYY-MM-DD' 范围。
+    """
+
+    INDEX_FILE = '.chatlog_index.json'
+    INDEX_VERSION = 2
+    EXTENSIONS = ('.txt', '.json')
+
+    # 消息头: "昵称(wxid) [MM-DD] HH:MM:SS"、"系统消息 [MM-DD] HH:MM:SS" 或只有时间
+    # ("> " 开头的是引用内容，不是消息头)
+    HEADER_PATTERN = re.compile(
+        r'^(?!>)(?:(?P<sender>[^\n]*)\((?P<id>[^()\n]+)\)|(?P<system>系统消息)|)'
+        r'[ \t]*(?:(?P<md>\d{2}-\d{2})[ \t]+)?(?P<time>\d{2}:\d{2}:\d{2})\r?$'.encode('utf-8'),
+        re.MULTILINE
+    )
+    # 引用块第一行（已去掉 "> "），格式同消息头
+    QUOTE_HEADER_PATTERN = re.compile(
+        r'^(?:(?P<sender>.*)\((?P<id>[^()]+)\)|(?P<system>系统消息)|)'
+        r'\s*(?:(?P<md>\d{2}-\d{2})\s+)?(?P<time>\d{2}:\d{2}:\d{2})$'
+    )
+    DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+    NAME_NOISE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}|chatlog|群聊记录|聊天记录')
+
+    def __init__(self, data_dir: str = None):
+        self.data_dir = os.path.abspath(data_dir or os.getcwd())
+        self.index_path = os.path.join(self.data_dir, self.INDEX_FILE)
+        self.files = {}   # 相对路径 -> {'mtime', 'size', 'chatroom', 'segments'}
+        self.by_key = defaultdict(list)  # (chatroom, date) -> [(相对路径, start, end)]
+        self._indexed = False
+
+    # ---------- 索引 ----------
+
+    def refresh(self) -> int:
+        """增量更新索引，只重新扫描新增或 mtime/大小变化的文件
+
+        Returns:
+            重新扫描的文件数
+        """
+        old_files = self._load_index()
+        files = {}
+        scanned = 0
+
+        for rel_path, full_path in self._walk():
+            stat = os.stat(full_path)
+            entry = old_files.get(rel_path)
+            if not entry or entry['mtime'] != stat.st_mtime or entry['size'] != stat.st_size:
+                entry = self._index_file(full_path, rel_path, stat)
+                scanned += 1
+            files[rel_path] = entry
+
+        if scanned or set(files) != set(old_files):
+            self._save_index(files)
+
+        self.files = files
+        self.by_key = defaultdict(list)
+        for rel_path, entry in files.items():
+            for date, start, end in entry['segments']:
+                if date:  # 日期未知的区间不进索引
+                    self.by_key[(entry['chatroom'], date)].append((rel_path, start, end))
+        self._indexed = True
+
+        if scanned:
+            print(f"[INFO] 已索引 {scanned} 个导出文件 (共 {len(files)} 个)")
+        return scanned
+
+    def _walk(self):
+        for root, dirs, names in os.walk(self.data_dir):
+            dirs[:] = [d for d in dirs if not d.startswith('.') and d != '__pycache__']
+            for name in names:
+                if name.endswith(self.EXTENSIONS) and name != self.INDEX_FILE:
+                    full_path = os.path.join(root, name)
+                    yield os.path.relpath(full_path, self.data_dir), full_path
+
+    def _load_index(self) -> Dict[str, Dict]:
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.INDEX_VERSION:
+                return data.get('files', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def _save_index(self, files: Dict[str, Dict]):
+        try:
+            with open(self.index_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.INDEX_VERSION, 'files': files}, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"[WARN] 无法写入索引文件: {e}")
+
+    def _index_file(self, full_path: str, rel_path: str, stat) -> Dict:
+        """扫描单个文件，把连续的同一日期的消息合并成一个字节区间"""
+        base_date = self._base_date(rel_path)
+        segments = []
+        with self._open(full_path) as data:
+            headers = self._scan_headers(data, base_date) if data is not None else []
+
+        for date, start, _, _, _, _ in headers:
+            if segments and segments[-1][0] == date:
+                continue
+            if segments:
+                segments[-1][2] = start
+            segments.append([date, start, None])
+        if segments:
+            segments[-1][2] = stat.st_size
+        if any(date is None for date, _, _ in segments):
+            print(f"[WARN] {rel_path}: 部分消息无法确定日期（文件名、目录名和消息头都没有日期），已跳过")
+
+        return {
+            'mtime': stat.st_mtime,
+            'size': stat.st_size,
+            'chatroom': self._chatroom_key(os.path.basename(full_path)),
+            'segments': segments,
+        }
 
-    def __init__(self):
-        self.data_dir = os.getcwd()
+    def _base_date(self, rel_path: str) -> Optional[str]:
+        """文件名或所在目录名中的日期（由近及远）；都没有时返回 None，表示日期未知
 
-    def read_chatlog(self, date: str) -> List[Dict]:
-        """读取指定日期的聊天记录"""
-        file_path = f"{self.data_dir}/chatlog_{date}.json"
+        不用文件修改时间：git 检出、复制都会改掉它。
+        """
+        for part in reversed(rel_path.split(os.sep)):
+            match = self.DATE_PATTERN.search(part)
+            if match:
+                return match.group()
+        return None
+
+    @staticmethod
+    def _resolve_month_day(month_day: str, anchor):
+        """给 MM-DD 补上年份，返回 date（02-29 之类无效日期返回 anchor）
+
+        有参照日期时取离参照日期最近的年份（前后各半年，跨年时加一年或减一年）；
+        没有参照日期时取不晚于今天的最近一次（导出的记录不会来自未来）。
+        """
+        reference = anchor or datetime.now().date()
+        try:
+            resolved = datetime.strptime(f"{reference.year}-{month_day}", '%Y-%m-%d').date()
+        except ValueError:  # 如平年的 02-29
+            return anchor
+        days = (resolved - reference).days
+        if anchor is None:
+            if days > 0:
+                resolved = resolved.replace(year=resolved.year - 1)
+        elif days < -182:
+            resolved = resolved.replace(year=resolved.year + 1)
+        elif days > 182:
+            resolved = resolved.replace(year=resolved.year - 1)
+        return resolved
+
+    def _chatroom_key(self, file_name: str) -> str:
+        """从文件名推断群聊名称；chatlog_{date}.json 这类通用文件返回空串"""
+        stem = os.path.splitext(file_name)[0]
+        return self.NAME_NOISE_PATTERN.sub('', stem).strip(' _-')
+
+    @staticmethod
+    @contextmanager
+    def _open(full_path: str):
+        """只读 mmap 打开文件；空文件产出 None"""
+        with open(full_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield None
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                yield data
 
-        if not os.path.exists(file_path):
-            print(f"[WARN] 文件不存在: {file_path}")
-            return []
+    def _scan_headers(self, data, base_date: Optional[str], start: int = 0, end: int = None) -> List[Tuple]:
+        """扫描消息头，返回 [(日期, 头起始偏移, 头结束偏移, 发送者, 发送者ID, 时间)]
 
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+        带 MM-DD 的消息头直接给出日期；只有时间的消息头在时间倒退时
+        (跨过午夜) 把日期加一天。base_date 为 None 且还没遇到 MM-DD 时，
+        日期未知，记为 None。
+        """
+        current = datetime.strptime(base_date, '%Y-%m-%d').date() if base_date else None
+        last_time = None
+        headers = []
+
+        for match in self.HEADER_PATTERN.finditer(data, start, len(data) if end is None else end):
+            time_str = match.group('time').decode('ascii')
+            month_day = match.group('md')
+            if month_day:
+                current = self._resolve_month_day(month_day.decode('ascii'), current)
+            elif current is not None and last_time is not None and time_str < last_time:
+                current += timedelta(days=1)
+            last_time = time_str
+
+            if match.group('system'):
+                sender = '系统消息'
+            else:
+                sender = (match.group('sender') or b'').decode('utf-8', errors='replace').strip()
+            sender_id = (match.group('id') or b'').decode('utf-8', errors='replace')
+            headers.append((current.strftime('%Y-%m-%d') if current else None, match.start(), match.end(), sender, sender_id, time_str))
+
+        return headers
+
+    # ---------- 读取 ----------
+
+    def dates(self, group_name: str = '') -> List[str]:
+        """某个群聊（或通用导出）可用的日期，升序"""
+        self._ensure_index()
+        rooms = set(self._match_chatrooms(group_name))
+        return sorted({date for room, date in self.by_key if room in rooms})
+
+    def get_chatlog(self, group_name: str, date: str) -> List[Dict]:
+        """读取指定群聊、日期（或日期范围）的消息，接口与 ChatlogMCPClient 一致"""
+        self._ensure_index()
+        messages = []
+        for day in self._expand_dates(date):
+            for room in self._match_chatrooms(group_name):
+                for rel_path, start, end in self.by_key.get((room, day), []):
+                    messages.extend(self._read_segment(rel_path, day, start, end))
+        return messages
+
+    def _ensure_index(self):
+        if not self._indexed:
+            self.refresh()
+
+    def _match_chatrooms(self, group_name: str) -> List[str]:
+        """文件名与群聊名称互相包含即视为匹配；没有专属导出时退回通用导出"""
+        rooms = {room for room, _ in self.by_key}
+        matched = [room for room in rooms if room and group_name and (room in group_name or group_name in room)]
+        return matched or ['']
+
+    @staticmethod
+    def _expand_dates(date: str) -> List[str]:
+        bounds = re.split(r'\s*[~,]\s*', date.strip())
+        if len(bounds) == 1:
+            return bounds
+        start, end = sorted(datetime.strptime(b, '%Y-%m-%d') for b in bounds[:2])
+        return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range((end - start).days + 1)]
+
+    def _read_segment(self, rel_path: str, date: str, start: int, end: int) -> List[Dict]:
+        """解析一个日期区间内的消息；区间起点一定是消息头"""
+        with self._open(os.path.join(self.data_dir, rel_path)) as data:
+            if data is None:
+                return []
+            headers = self._scan_headers(data, date, start, end)
+            bounds = [header[1] for header in headers[1:]] + [end]
 
-            # Parse messages
             messages = []
-            current_msg = ""
-            current_sender = ""
-            current_time = ""
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
+            for (_, _, header_end, sender, sender_id, time_str), content_end in zip(headers, bounds):
+                content = data[header_end:content_end].decode('utf-8', errors='replace').strip()
+                message = {
+                    'timestamp': f"{date}T{time_str}",
+                    'sender': sender,
+                    'sender_id': sender_id,
+                    'content': content
+                }
+                if content.startswith('>'):
+                    self._split_quote(message, date)
+                messages.append(message)
+            return messages
 
-                # Check if this is a timestamp line (HH:MM:SS format)
-                if re.match(r'^\d{2}:\d{2}:\d{2}$', line):
-                    if current_msg:
-                        # Add current message
-                        msg_time = f"2025-12-09T{current_time}"
-                        messages.append({
-                            'timestamp': msg_time,
-                            'sender': current_sender,
-                            'content': current_msg
-                        })
-                    current_time = line
-                    current_msg = ""
-                    continue
+    def _split_quote(self, message: Dict, date: str):
+        """把开头的 "> " 引用块拆到 message['quote']，content 只保留回复正文"""
+        lines = message['content'].split('\n')
+        quoted = []
+        while lines and lines[0].startswith('>'):
+            quoted.append(lines.pop(0)[1:].strip())
+        header = self.QUOTE_HEADER_PATTERN.match(quoted[0]) if quoted else None
+        if not header:
+            return
+
+        quote_date = date
+        if header.group('md'):
+            year = int(date[:4])
+            if header.group('md') > date[5:]:  # 引用的是去年的消息
+                year -= 1
+            quote_date = f"{year}-{header.group('md')}"
+
+        message['quote'] = {
+            'timestamp': f"{quote_date}T{header.group('time')}",
+            'sender': '系统消息' if header.group('system') else (header.group('sender') or '').strip(),
+            'sender_id': header.group('id') or '',
+            'content': '\n'.join(quoted[1:]).strip()
+        }
+        message['content'] = '\n'.join(lines).strip()
 
-                # Check if this is a sender line (ends with time)
-                if re.search(r'\(\w+\)\s+\d{2}:\d{2}:\d{2}$', line):
-                    # Extract sender and content
-                    match = re.match(r'^(.+?)\((wxid_[^)]+)\)\s+(\d{2}:\d{2}:\d{2})$', line)
-                    if match:
-                        if current_msg:
-                            # Add current message
-                            msg_time = f"2025-12-09T{current_time}"
-                            messages.append({
-                                'timestamp': msg_time,
-                                'sender': current_sender,
-                                'content': current_msg
-                            })
-                        current_sender = match.group(1)
-                        current_time = match.group(3)
-                        current_msg = ""
-                    continue
 
-                # Check if this is a system message (quoted)
-                if line.startswith('>'):
-                    if current_msg:
-                        current_msg += "\n" + line
-                    else:
-                        current_msg = line
-                    continue
+class RealChatlogReader:
+    """真实聊天记录读取器（基于导出目录索引）"""
 
-                # Regular message content
-                if current_msg:
-                    current_msg += "\n" + line
-                else:
-                    current_msg = line
-
-            # Add the last message
-            if current_msg:
-                msg_time = f"2025-12-09T{current_time}"
-                messages.append({
-                    'timestamp': msg_time,
-                    'sender': current_sender,
-                    'content': current_msg
-                })
-
-            print(f"[INFO] 成功解析 {len(messages)} 条消息")
-            return messages
+    def __init__(self, data_dir: str = None):
+        self.data_dir = data_dir or os.getcwd()
+        self.archive = ChatlogArchive(self.data_dir)
 
+    def read_chatlog(self, date: str, group_name: str = '') -> List[Dict]:
+        """读取指定日期（或日期范围）的聊天记录"""
+        try:
+            messages = self.archive.get_chatlog(group_name, date)
         except Exception as e:
             print(f"[ERROR] 读取聊天记录失败: {str(e)}")
             import traceback
             traceback.print_exc()
             return []
 
+        if not messages:
+            print(f"[WARN] 导出目录中没有 {date} 的聊天记录: {self.data_dir}")
+            return []
+
+        print(f"[INFO] 成功解析 {len(messages)} 条消息")
+        return messages
+
+
+class ConversationGraph:
+    """回复关系图（紧凑邻接表）
+
+    parent[i]  消息 i 回复的消息下标，-1 表示不是回复
+    thread[i]  消息 i 所在讨论串的编号（讨论串根消息的下标）
+    子节点按 CSR 格式存放: children[offsets[i]:offsets[i + 1]] 是回复消息 i 的消息
+    """
+
+    def __init__(self, parent: array):
+        self.parent = parent
+        size = len(parent)
+
+        # 计数 -> 前缀和 -> 填充，得到 CSR 邻接表（子节点保持时间顺序）
+        self.offsets = array('i', [0]) * (size + 1)
+        for target in parent:
+            if target >= 0:
+                self.offsets[target + 1] += 1
+        for i in range(size):
+            self.offsets[i + 1] += self.offsets[i]
+        self.children = array('i', [0]) * self.offsets[size]
+        cursor = array('i', self.offsets[:size])
+        for i, target in enumerate(parent):
+            if target >= 0:
+                self.children[cursor[target]] = i
+                cursor[target] += 1
+
+        # parent 总是指向更早的消息，顺序扫一遍即可得到讨论串编号
+        self.thread = array('i', range(size))
+        for i, target in enumerate(parent):
+            if target >= 0:
+                self.thread[i] = self.thread[target]
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def replies(self, index: int) -> array:
+        """直接回复消息 index 的消息下标"""
+        return self.children[self.offsets[index]:self.offsets[index + 1]]
+
+    def threads(self, min_size: int = 1) -> List[List[int]]:
+        """按讨论串分组的消息下标（时间顺序），按讨论串大小降序"""
+        groups = defaultdict(list)
+        for i, root in enumerate(self.thread):
+            groups[root].append(i)
+        threads = [members for members in groups.values() if len(members) >= min_size]
+        threads.sort(key=len, reverse=True)
+        return threads
+
+    @property
+    def reply_count(self) -> int:
+        return self.offsets[-1]
+
+
+class ThreadBuilder:
+    """把引用和 @提及 链接到被回复的消息，构建 ConversationGraph
+
+    消息按时间顺序处理，维护两个最近消息索引：
+    - (发送者ID 或 昵称, 时间戳) -> 下标：引用块里带着被引用消息的发送者和时间，一次哈希查找
+    - 昵称 -> 该昵称最近一条消息的下标：@某人 链接到他 MENTION_WINDOW_MINUTES 内的最后一条消息
+    """
+
+    MENTION_PATTERN = re.compile(r'@([^\s@\u2005]+)')
+    MENTION_WINDOW_MINUTES = 120
+
+    def build(self, messages: List[Dict]) -> ConversationGraph:
+        """
+        Args:
+            messages: 按时间排序的消息（RealChatlogReader 的输出）
+
+        Returns:
+            ConversationGraph，下标与 messages 一一对应
+        """
+        parent = array('i', [-1]) * len(messages)
+        by_key = {}        # (发送者, 时间戳) -> 下标
+        last_by_name = {}  # 昵称 -> (下标, 时间)
+        window = timedelta(minutes=self.MENTION_WINDOW_MINUTES)
+
+        for i, msg in enumerate(messages):
+            sender = msg.get('sender', '')
+            timestamp = msg.get('timestamp', '')
+            moment = self._parse_time(timestamp)
+
+            quote = msg.get('quote')
+            if quote:
+                target = by_key.get((quote.get('sender_id') or quote.get('sender', ''), quote['timestamp']))
+                if target is None:
+                    target = by_key.get((quote.get('sender', ''), quote['timestamp']))
+                if target is not None:
+                    parent[i] = target
+
+            if parent[i] < 0 and moment is not None:
+                for name in self.MENTION_PATTERN.findall(msg.get('content', '')):
+                    recent = last_by_name.get(name)
+                    if recent and recent[0] != i and moment - recent[1] <= window:
+                        parent[i] = recent[0]
+                        break
+
+            if msg.get('sender_id'):
+                by_key[(msg['sender_id'], timestamp)] = i
+            by_key.setdefault((sender, timestamp), i)
+            if sender and moment is not None:
+                last_by_name[sender] = (i, moment)
+
+        return ConversationGraph(parent)
+
+    @staticmethod
+    def _parse_time(timestamp: str) -> Optional[datetime]:
+        try:
+            return datetime.fromisoformat(timestamp)
+        except (TypeError, ValueError):
+            return None
+
 
 class MarkdownParser:
     """Markdown清单解析器"""
@@ -163,6 +492,7 @@ class ChatlogAnalyzer:
         self.time_window = 30  # 30分钟时间窗口
         self.min_messages_per_topic = 3  # 每个话题最少消息数
         self.chatlog_reader = RealChatlogReader()
+        self.thread_builder = ThreadBuilder()
 
     def group_messages_by_time(self, messages: List[Dict]) -> List[List[Dict]]:
         """按时间窗口分组消息"""
@@ -203,8 +533,8 @@ class ChatlogAnalyzer:
 
         return groups
 
-    def calculate_topic_value(self, topic_messages: List[Dict]) -> float:
-        """计算话题价值分数"""
+    def calculate_topic_value(self, topic_messages: List[Dict], keywords: List[str] = None) -> float:
+        """计算话题价值分数（keywords 已提取时直接复用）"""
         if not topic_messages:
             return 0
 
@@ -225,7 +555,8 @@ class ChatlogAnalyzer:
         score += min(participant_count / 5, 1) * 20  # 5个参与者为满分
 
         # 关键词权重 (10%)
-        keywords = self.extract_keywords(topic_messages)
+        if keywords is None:
+            keywords = self.extract_keywords(topic_messages)
         keyword_score = min(len(keywords) / 10, 1) * 10  # 10个关键词为满分
         score += keyword_score
 
@@ -247,14 +578,20 @@ class ChatlogAnalyzer:
         counter = Counter(keywords)
         return [word for word, _ in counter.most_common(10)]
 
-    def generate_topic_summary(self, topic_messages: List[Dict]) -> str:
-        """生成话题摘要"""
+    def generate_topic_summary(self, topic_messages: List[Dict], graph: ConversationGraph = None) -> str:
+        """生成话题摘要（有回复关系时取最大讨论串的开头）"""
         if not topic_messages:
             return "无内容"
 
+        summary_messages = topic_messages
+        if graph is not None:
+            threads = graph.threads(min_size=2)
+            if threads:
+                summary_messages = [topic_messages[i] for i in threads[0]]
+
         # 取前3条消息的开头作为摘要
         summary_parts = []
-        for msg in topic_messages[:3]:
+        for msg in summary_messages[:3]:
             content = msg.get('content', '').strip()
             if content:
                 # 截取前80个字符
@@ -272,11 +609,11 @@ class ChatlogAnalyzer:
             print(f"[INFO] 开始分析群聊: {group_name}")
 
             # 解析日期配置
-            date_str = self._parse_date_config(config.get('date', '昨天'))
+            date_str = self._parse_date_config(config.get('date', '昨天'), group_name)
 
             # 从真实数据获取聊天记录
             print(f"[INFO] 正在读取 {date_str} 的聊天记录...")
-            messages = self.chatlog_reader.read_chatlog(date_str)
+            messages = self.chatlog_reader.read_chatlog(date_str, group_name)
 
             if not messages:
                 return {
@@ -292,12 +629,13 @@ class ChatlogAnalyzer:
             time_groups = self.group_messages_by_time(messages)
             print(f"[INFO] 识别到 {len(time_groups)} 个话题")
 
-            # 计算每个话题的价值
+            # 计算每个话题的价值（关键词每个话题只提取一次）
             topic_scores = []
             for group in time_groups:
                 if len(group) >= self.min_messages_per_topic:
-                    score = self.calculate_topic_value(group)
-                    topic_scores.append((score, group))
+                    keywords = self.extract_keywords(group)
+                    score = self.calculate_topic_value(group, keywords)
+                    topic_scores.append((score, group, keywords))
 
             # 按价值排序，取前3个
             topic_scores.sort(key=lambda x: x[0], reverse=True)
@@ -305,14 +643,17 @@ class ChatlogAnalyzer:
 
             # 生成话题详情
             topics = []
-            for i, (score, group) in enumerate(top_topics, 1):
+            for i, (score, group, keywords) in enumerate(top_topics, 1):
+                graph = self.thread_builder.build(group)
                 topic = {
                     'rank': i,
                     'score': round(score, 2),
                     'message_count': len(group),
                     'participant_count': len(set(msg.get('sender', '') for msg in group if msg.get('sender'))),
-                    'keywords': self.extract_keywords(group),
-                    'summary': self.generate_topic_summary(group),
+                    'keywords': keywords,
+                    'summary': self.generate_topic_summary(group, graph),
+                    'thread_count': len(graph.threads(min_size=2)),
+                    'reply_count': graph.reply_count,
                     'start_time': group[0].get('timestamp', ''),
                     'end_time': group[-1].get('timestamp', ''),
                     'messages': group
@@ -335,7 +676,7 @@ class ChatlogAnalyzer:
                 'topics': []
             }
 
-    def _parse_date_config(self, date_config: str) -> str:
+    def _parse_date_config(self, date_config: str, group_name: str = '') -> str:
         """解析日期配置"""
         today = datetime.now().date()
         yesterday = today - timedelta(days=1)
@@ -344,12 +685,11 @@ class ChatlogAnalyzer:
         if date_config == '昨天':
             return yesterday.strftime('%Y-%m-%d')
         elif date_config == '今天':
-            # 如果今天是2025-12-10，但只有12-09的数据，返回12-09
-            # 检查是否存在今天的数据文件
+            # 导出目录中没有今天的数据时，使用最新的可用数据
             today_str = today.strftime('%Y-%m-%d')
-            if not os.path.exists(f"{self.chatlog_reader.data_dir}/chatlog_{today_str}.json"):
-                # 如果今天的数据不存在，使用最新的可用数据
-                latest_date = "2025-12-09"  # 假设这是最新的
+            available = self.chatlog_reader.archive.dates(group_name)
+            if available and today_str not in available:
+                latest_date = available[-1]
                 print(f"[WARN] 未找到今天({today_str})的数据，使用最新数据: {latest_date}")
                 return latest_date
             return today_str
@@ -551,6 +891,14 @@ class HTMLReportGenerator:
             margin-left: 10px;
         }
 
+        .message-quote {
+            color: #718096;
+            font-size: 0.85em;
+            border-left: 3px solid #cbd5e0;
+            padding-left: 8px;
+            margin-bottom: 4px;
+        }
+
         .message-content {
             color: #4a5568;
             line-height: 1.5;
@@ -654,6 +1002,7 @@ class HTMLReportGenerator:
                 <div class="topic-meta">
                     <div class="meta-item">💬 {topic['message_count']} 条消息</div>
                     <div class="meta-item">👥 {topic['participant_count']} 位参与者</div>
+                    <div class="meta-item">🧵 {topic.get('thread_count', 0)} 个讨论串 / {topic.get('reply_count', 0)} 条回复</div>
                     <div class="meta-item">⏰ {self._format_datetime(topic['start_time'])} - {self._format_datetime(topic['end_time'])}</div>
                 </div>
 
@@ -683,12 +1032,19 @@ class HTMLReportGenerator:
 
         messages_html = []
         for msg in messages:
+            quote = msg.get('quote')
+            quote_html = ''
+            if quote:
+                quoted = quote.get('content', '')
+                quoted = quoted[:60] + ('...' if len(quoted) > 60 else '')
+                quote_html = f'<div class="message-quote">↪ {quote.get("sender", "")}: {quoted}</div>'
             msg_html = f"""
             <div class="message-item">
                 <div class="message-sender">
                     {msg.get('sender', '未知用户')}
                     <span class="message-time">{self._format_datetime(msg.get('timestamp', ''))}</span>
                 </div>
+                {quote_html}
                 <div class="message-content">{msg.get('content', '')}</div>
             </div>
             """